@@ -9,51 +9,16 @@ This script analyzes spirits data from Firebase to identify names that contain:
 It generates a report without making any changes to the database.
 """
 
-import re
 import json
-from collections import defaultdict
 import sys
 import os
 
 # Add parent directory to path to import from lib
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-# Patterns to detect in spirit names
-PATTERNS = {
-    'volume': [
-        r'\d+\s*ml\b',           # 700ml, 750 ml
-        r'\d+\s*l\b',            # 1l, 1.5l
-        r'\d+\s*리터',           # 1리터
-        r'\d+\s*밀리리터',       # 700밀리리터
-    ],
-    'lot': [
-        r'lot\s*[#:]?\s*\d+',    # Lot 2023, Lot#5
-        r'batch\s*[#:]?\s*\d+',  # Batch 5
-        r'로트\s*\d+',           # 로트 2023
-    ],
-    'abv': [
-        r'\d+\.?\d*\s*%',        # 40%, 43.5%
-        r'\d+\.?\d*\s*도',       # 40도, 43.5도
-        r'\d+\.?\d*\s*proof',    # 80 proof
-    ]
-}
-
-def analyze_name(name: str) -> dict:
-    """Analyze a spirit name for patterns that should be extracted."""
-    findings = defaultdict(list)
-    
-    name_lower = name.lower()
-    
-    for category, patterns in PATTERNS.items():
-        for pattern in patterns:
-            matches = re.finditer(pattern, name_lower, re.IGNORECASE)
-            for match in matches:
-                findings[category].append({
-                    'text': match.group(),
-                    'position': match.span()
-                })
-    
-    return dict(findings)
+# Pattern matching lives in name_analyzer (single-pass scanner shared with analyze_all_spirits.py)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from name_analyzer import analyze_name, analyze_spirits  # noqa: E402,F401
 
 def load_spirits_sample():
     """Load ALL spirits data from the API."""
@@ -85,52 +50,13 @@ def load_spirits_sample():
 def generate_report(spirits):
     """Generate a detailed report of normalization needs."""
     
-    issues_found = []
-    stats = {
-        'total': len(spirits),
-        'with_volume_in_name': 0,
-        'with_lot_in_name': 0,
-        'with_abv_in_name': 0,
-        'needs_normalization': 0
-    }
-    
     print("\n" + "="*80)
     print("ANALYZING SPIRIT NAMES FOR NORMALIZATION ISSUES")
     print("="*80 + "\n")
     
-    for spirit in spirits:
-        name = spirit.get('name', '')
-        spirit_id = spirit.get('id', 'unknown')
-        current_volume = spirit.get('volume')
-        current_abv = spirit.get('abv')
-        
-        findings = analyze_name(name)
-        
-        if findings:
-            has_issue = False
-            issue_detail = {
-                'id': spirit_id,
-                'name': name,
-                'current_volume': current_volume,
-                'current_abv': current_abv,
-                'findings': findings
-            }
-            
-            if 'volume' in findings:
-                stats['with_volume_in_name'] += 1
-                has_issue = True
-            
-            if 'lot' in findings:
-                stats['with_lot_in_name'] += 1
-                has_issue = True
-            
-            if 'abv' in findings:
-                stats['with_abv_in_name'] += 1
-                has_issue = True
-            
-            if has_issue:
-                stats['needs_normalization'] += 1
-                issues_found.append(issue_detail)
+    # One pass over all names (process pool for large inputs)
+    report = analyze_spirits(spirits)['normalization']
+    stats, issues_found = report['stats'], report['issues']
     
     # Print summary statistics
     print("SUMMARY STATISTICS:")
@@ -7,29 +7,40 @@ Published 데이터의 제조국, 지역, 증류소, 병입자, ABV 필드를 
 
 Usage:
     python scripts/audit_database.py [--dry-run] [--limit N] [--skip-upload]
+                                     [--concurrency N] [--max-concurrency N] [--rps R] [--batch-size N]
+                                     [--no-rules] [--no-cache | --refresh]
+                                     [--journal PATH] [--resume] [--write-batch-size N]
+                                     [--incremental] [--since ISO]
+
+    LLM_BACKEND=stub|http://127.0.0.1:8089 로 Gemini 대신 로컬 스텁을 사용할 수 있습니다 (기본값: gemini).
 """
 
 import os
 import sys
 import json
 import time
-from datetime import datetime
-from typing import Dict, List, Optional
+import hashlib
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
 import argparse
 
 # Firebase Admin SDK (Lazy Loader)
 # from google.cloud import firestore
 # from google.oauth2 import service_account
 
-# Google Gemini AI (새 SDK)
-from google import genai
-from google.genai import types
-
 # 환경 변수 로드
 from dotenv import load_dotenv
 load_dotenv('.env.local')
 load_dotenv()
 
+from pipeline_utils import TokenBucket, LatencyStats, AdaptiveConcurrency, ordered_map, chunked
+from audit_rules import RulePreNormalizer
+from sqlite_cache import SQLiteCache, make_key
+from jsonl_journal import JsonlJournal
+from firestore_io import FirestoreWriteBuffer, stream_documents
+from llm_backend import LLMBackend, create_backend
+
 def get_db_client():
     """Firestore 클라이언트를 지연 초기화합니다."""
     global _db
@@ -44,6 +55,12 @@ def get_db_client():
     FIREBASE_PRIVATE_KEY = os.getenv('FIREBASE_PRIVATE_KEY', '').replace('\\n', '\n')
     FIREBASE_CLIENT_EMAIL = os.getenv('FIREBASE_CLIENT_EMAIL')
     
+    # 에뮬레이터 (FIRESTORE_EMULATOR_HOST 설정 시)
+    if os.getenv('FIRESTORE_EMULATOR_HOST'):
+        from google.auth.credentials import AnonymousCredentials
+        _db = firestore.Client(credentials=AnonymousCredentials(), project=FIREBASE_PROJECT_ID or 'demo-k-spirits')
+        return _db
+    
     # Credentials 생성
     credentials = service_account.Credentials.from_service_account_info({
         'type': 'service_account',
@@ -56,11 +73,24 @@ def get_db_client():
     _db = firestore.Client(credentials=credentials, project=FIREBASE_PROJECT_ID)
     return _db
 
-# Gemini AI 클라이언트 초기화
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-client = genai.Client(api_key=GEMINI_API_KEY)
+# LLM 백엔드 (지연 초기화, LLM_BACKEND=gemini|stub|http://... 로 선택)
+_llm: Optional[LLMBackend] = None
+
+def get_llm() -> LLMBackend:
+    """LLM 백엔드를 지연 초기화합니다 (기본값: Gemini)."""
+    global _llm
+    if _llm is None:
+        _llm = create_backend(model=MODEL_ID)
+    return _llm
+
+def set_llm(backend: LLMBackend):
+    """벤치마크/테스트용 백엔드 교체"""
+    global _llm
+    _llm = backend
 
 # ==================== AI Configuration ====================
+MODEL_ID = 'gemini-2.0-flash'  # 안정 버전
+
 SYSTEM_INSTRUCTION = """You are a database normalization expert specializing in spirits (alcohol) data.
 Your role is to standardize country, region, distillery, bottler, and ABV fields with ABSOLUTE CONSISTENCY.
 
@@ -195,120 +225,226 @@ Respond in JSON format:
 
 JSON only, no extra text:"""
 
+BATCH_USER_PROMPT_TEMPLATE = """Please normalize each of the following {count} spirits independently.
+Apply the rules to every item as if it were the only one.
+
+{items}
+
+Respond with a JSON array containing exactly one object per input item, echoing its "id":
+[
+  {{
+    "id": "...",
+    "country": "...",
+    "region": "..." or null,
+    "distillery": "...",
+    "bottler": "..." or null,
+    "abv": 43.0 or null,
+    "metadata": {{ "importer": "..." or null }},
+    "corrections": ["description of each correction made"]
+  }}
+]
+
+JSON only, no extra text:"""
+
+# 프롬프트 규칙이 바뀌면 캐시 키도 바뀌도록 SYSTEM_INSTRUCTION 해시를 키에 포함
+SYSTEM_INSTRUCTION_HASH = hashlib.sha256(SYSTEM_INSTRUCTION.encode('utf-8')).hexdigest()[:16]
+DEFAULT_CACHE_PATH = 'data/cache/audit_cache.sqlite'
+DEFAULT_JOURNAL_PATH = 'data/audit_journal.jsonl'
+
+DEFAULT_STATE_PATH = 'data/audit_state.json'
+
+# Firestore에서 가져올 감사 대상 필드 (필드 마스크)
+AUDIT_FIELDS = [
+    'name', 'category', 'subcategory', 'country', 'region', 'distillery', 'bottler', 'abv',
+    'isPublished', 'status', 'updatedAt', 'metadata.auditDate',
+]
+
 # ==================== Helper Functions ====================
 
-def fetch_all_spirits(limit: Optional[int] = None) -> List[Dict]:
-    """Firestore에서 모든 데이터 가져오기 (published + unpublished)"""
-    print("🔍 Fetching ALL spirits from Firestore (published + unpublished)...")
+def spirit_prompt_fields(spirit: Dict) -> Dict:
+    """프롬프트에 들어가는 감사 대상 필드 추출"""
+    return {
+        'name': spirit.get('name', 'Unknown'),
+        'category': spirit.get('category', 'Unknown'),
+        'subcategory': spirit.get('subcategory', 'N/A'),
+        'country': spirit.get('country', 'N/A'),
+        'region': spirit.get('region', 'N/A'),
+        'distillery': spirit.get('distillery', 'N/A'),
+        'bottler': spirit.get('bottler', 'N/A'),
+        'abv': spirit.get('abv', 'N/A'),
+    }
+
+
+def parse_timestamp(value) -> Optional[datetime]:
+    """ISO 문자열/Firestore Timestamp를 UTC aware datetime으로 변환 (타임존 없는 값은 UTC로 간주)"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        try:
+            dt = datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def needs_audit(spirit: Dict) -> bool:
+    """마지막 감사(metadata.auditDate) 이후 수정된 문서인지 확인"""
+    audit_date = parse_timestamp((spirit.get('metadata') or {}).get('auditDate'))
+    if audit_date is None:
+        return True
+    updated_at = parse_timestamp(spirit.get('updatedAt'))
+    return updated_at is not None and updated_at > audit_date
+
+
+def load_high_water_mark(path: str) -> Optional[str]:
+    """이전 감사 실행의 high-water mark(ISO, UTC) 로드"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('high_water_mark')
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def save_high_water_mark(path: str, mark: str):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'high_water_mark': mark, 'savedAt': datetime.now(timezone.utc).isoformat()}, f, ensure_ascii=False, indent=2)
+
+
+def _stream_updated_since(query, since: Optional[datetime], page_size: int, limit: Optional[int]) -> Iterator[Dict]:
+    """
+    since 이후 updatedAt 문서만 스트리밍.
+    updatedAt은 ISO 문자열과 Timestamp가 섞여 있어 타입별로 한 번씩 범위 쿼리합니다 (두 결과는 서로 겹치지 않음).
+    """
+    if since is None:
+        yield from stream_documents(query, page_size=page_size, fields=AUDIT_FIELDS, limit=limit)
+        return
+    
+    remaining = limit
+    since_str = since.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+    for bound in (since_str, since):
+        ranged = query.where('updatedAt', '>', bound)
+        for data in stream_documents(ranged, page_size=page_size, fields=AUDIT_FIELDS,
+                                     limit=remaining, order_by=['updatedAt']):
+            yield data
+            if remaining is not None:
+                remaining -= 1
+        if remaining is not None and remaining <= 0:
+            return
+
+
+def _is_published(spirit: Dict) -> bool:
+    return spirit.get('isPublished') == True or spirit.get('status') == 'PUBLISHED'
+
+
+def fetch_all_spirits(limit: Optional[int] = None, counts: Optional[Dict[str, int]] = None,
+                      page_size: int = 300, since: Optional[datetime] = None) -> Iterator[Dict]:
+    """
+    Firestore에서 모든 데이터를 페이지 단위로 스트리밍 (published + unpublished).
+    스트림이 예외로 끊기면 counts['stream_error']에 기록하고 종료합니다.
+    """
+    print("🔍 Streaming ALL spirits from Firestore (published + unpublished)...")
     db = get_db_client()
+    counts = counts if counts is not None else {}
+    counts.setdefault('published', 0)
+    counts.setdefault('unpublished', 0)
     
     try:
         # 모든 spirits 조회 (isPublished 필터 없음)
         query = db.collection('spirits')
         
-        if limit:
-            query = query.limit(limit)
-        
-        docs = list(query.stream())
-        
-        spirits = []
-        for doc in docs:
-            data = doc.to_dict()
-            data['id'] = doc.id
-            spirits.append(data)
-        
-        # 통계 출력
-        published_count = sum(1 for s in spirits if s.get('isPublished') == True or s.get('status') == 'PUBLISHED')
-        unpublished_count = len(spirits) - published_count
-        
-        print(f"📊 Loaded {len(spirits)} total spirits:")
-        print(f"   - Published: {published_count}")
-        print(f"   - Unpublished: {unpublished_count}")
-        
-        return spirits
+        for data in _stream_updated_since(query, since, page_size, limit):
+            # 통계는 스트리밍하면서 누적
+            counts['published' if _is_published(data) else 'unpublished'] += 1
+            yield data
     
     except Exception as e:
+        # 스트림 중단을 '데이터 끝'과 구분 (high-water mark를 전진시키지 않도록 기록)
+        counts['stream_error'] = f"{type(e).__name__}: {str(e)[:200]}"
         print(f"❌ Error fetching spirits: {e}")
         import traceback
         traceback.print_exc()
-        return []
+    
+    print(f"📊 Streamed {counts['published'] + counts['unpublished']} total spirits:")
+    print(f"   - Published: {counts['published']}")
+    print(f"   - Unpublished: {counts['unpublished']}")
 
 
-def fetch_published_spirits(limit: Optional[int] = None) -> List[Dict]:
-    """Firestore에서 published 데이터 가져오기"""
-    print("🔍 Fetching published spirits from Firestore...")
+def fetch_published_spirits(limit: Optional[int] = None, counts: Optional[Dict[str, int]] = None,
+                            page_size: int = 300, since: Optional[datetime] = None) -> Iterator[Dict]:
+    """Firestore에서 published 데이터를 페이지 단위로 스트리밍 (중단 시 counts['stream_error'] 기록)"""
+    print("🔍 Streaming published spirits from Firestore...")
     db = get_db_client()
+    counts = counts if counts is not None else {}
+    counts.setdefault('published', 0)
+    counts.setdefault('unpublished', 0)
     
     try:
         # isPublished=True 또는 status=PUBLISHED 조건으로 쿼리
         query1 = db.collection('spirits').where('isPublished', '==', True)
-        
-        if limit:
-            query1 = query1.limit(limit)
-        
-        docs1 = list(query1.stream())
+        for data in _stream_updated_since(query1, since, page_size, limit):
+            counts['published'] += 1
+            yield data
         
         # isPublished로 찾지 못한 경우 status로 시도
-        if len(docs1) == 0:
+        if counts['published'] == 0:
             print("  ⚠️  No spirits with isPublished=True, trying status=PUBLISHED...")
             query2 = db.collection('spirits').where('status', '==', 'PUBLISHED')
-            
-            if limit:
-                query2 = query2.limit(limit)
-            
-            docs1 = list(query2.stream())
-        
-        spirits = []
-        for doc in docs1:
-            data = doc.to_dict()
-            data['id'] = doc.id
-            spirits.append(data)
-        
-        print(f"📊 Loaded {len(spirits)} published spirits")
-        return spirits
+            for data in _stream_updated_since(query2, since, page_size, limit):
+                counts['published'] += 1
+                yield data
     
     except Exception as e:
+        # 스트림 중단을 '데이터 끝'과 구분 (high-water mark를 전진시키지 않도록 기록)
+        counts['stream_error'] = f"{type(e).__name__}: {str(e)[:200]}"
         print(f"❌ Error fetching spirits: {e}")
         import traceback
         traceback.print_exc()
-        return []
+    
+    print(f"📊 Streamed {counts['published']} published spirits")
+
 
+def audit_cache_key(spirit: Dict) -> str:
+    """프롬프트 입력 + 모델 + SYSTEM_INSTRUCTION 해시 기반 캐시 키"""
+    return make_key(MODEL_ID, SYSTEM_INSTRUCTION_HASH, spirit_prompt_fields(spirit))
 
-def call_audit_ai(spirit: Dict) -> Optional[Dict]:
+
+def generate_audit(prompt: str, limiter: Optional[TokenBucket] = None,
+                   controller: Optional[AdaptiveConcurrency] = None) -> str:
+    """감사 프롬프트로 LLM 호출 (재시도 호출도 limiter를 거치고, 429/5xx는 controller가 재시도)"""
+    def attempt() -> str:
+        if limiter:
+            limiter.acquire()
+        return get_llm().generate(prompt, system_instruction=SYSTEM_INSTRUCTION, temperature=0.1)
+    
+    if controller:
+        return controller.call(attempt)
+    return attempt()
+
+
+def call_audit_ai(spirit: Dict, limiter: Optional[TokenBucket] = None,
+                  controller: Optional[AdaptiveConcurrency] = None) -> Optional[Dict]:
     """Gemini AI 호출하여 정규화"""
     try:
         # 프롬프트 생성
-        user_prompt = USER_PROMPT_TEMPLATE.format(
-            name=spirit.get('name', 'Unknown'),
-            category=spirit.get('category', 'Unknown'),
-            subcategory=spirit.get('subcategory', 'N/A'),
-            country=spirit.get('country', 'N/A'),
-            region=spirit.get('region', 'N/A'),
-            distillery=spirit.get('distillery', 'N/A'),
-            bottler=spirit.get('bottler', 'N/A'),
-            abv=spirit.get('abv', 'N/A')
-        )
+        user_prompt = USER_PROMPT_TEMPLATE.format(**spirit_prompt_fields(spirit))
         
-        # Gemini 호출 (새 SDK)
-        response = client.models.generate_content(
-            model='gemini-2.0-flash',  # 안정 버전
-            contents=user_prompt,
-            config=types.GenerateContentConfig(
-                system_instruction=SYSTEM_INSTRUCTION,
-                temperature=0.1,
-                response_mime_type='application/json'
-            )
-        )
+        # Gemini 호출
+        response_text = generate_audit(user_prompt, limiter, controller)
         
         # JSON 파싱
-        normalized = json.loads(response.text)
+        normalized = json.loads(response_text)
         
         return normalized
     
     except json.JSONDecodeError as e:
         print(f"  ❌ JSON Parse Error for {spirit.get('name')}: {e}")
-        if 'response' in locals():
-            print(f"     Raw response: {response.text[:200]}")
+        if 'response_text' in locals():
+            print(f"     Raw response: {response_text[:200]}")
         return None
     except Exception as e:
         print(f"  ❌ AI Error for {spirit.get('name')}: {str(e)[:200]}")
@@ -317,6 +453,64 @@ def call_audit_ai(spirit: Dict) -> Optional[Dict]:
         return None
 
 
+def call_audit_ai_batch(spirits: List[Dict], limiter: Optional[TokenBucket] = None,
+                        controller: Optional[AdaptiveConcurrency] = None) -> List[Optional[Dict]]:
+    """
+    여러 제품을 한 번의 Gemini 호출로 정규화합니다.
+    응답이 일부만 오거나 깨진(JSON 파싱 실패) 경우에만 실패한 항목을 더 작은 배치로 나누어 재시도합니다.
+    호출 자체가 실패하면(재시도를 마친 429/5xx 포함) 나누지 않고 배치 전체를 실패로 반환합니다.
+    반환 리스트는 입력 순서와 동일합니다 (실패 항목은 None).
+    """
+    if len(spirits) == 1:
+        return [call_audit_ai(spirits[0], limiter, controller)]
+    
+    # 배치 내 매핑 키 (id가 없거나 중복이면 위치 기반 키 사용)
+    keys = []
+    for idx, spirit in enumerate(spirits):
+        key = str(spirit.get('id') or f'item_{idx}')
+        keys.append(key if key not in keys else f'{key}#{idx}')
+    
+    items = [{'id': key, **spirit_prompt_fields(spirit)} for key, spirit in zip(keys, spirits)]
+    user_prompt = BATCH_USER_PROMPT_TEMPLATE.format(
+        count=len(items),
+        items=json.dumps(items, ensure_ascii=False, default=str, indent=1)
+    )
+    
+    mapping = {}
+    try:
+        response_text = generate_audit(user_prompt, limiter, controller)
+        parsed = json.loads(response_text)
+        if isinstance(parsed, dict):
+            parsed = [parsed]
+        for entry in parsed:
+            if isinstance(entry, dict) and entry.get('id') is not None:
+                mapping[str(entry.pop('id'))] = entry
+    except json.JSONDecodeError as e:
+        print(f"  ❌ JSON Parse Error for batch of {len(spirits)}: {e}")
+    except Exception as e:
+        print(f"  ❌ AI Error for batch of {len(spirits)}: {str(e)[:200]}")
+        return [None] * len(spirits)
+    
+    results = [mapping.get(key) for key in keys]
+    failed = [idx for idx, res in enumerate(results) if not res or 'country' not in res]
+    
+    if not failed:
+        return results
+    
+    if len(failed) == len(spirits):
+        # 응답 전체가 실패 → 절반으로 나누어 재시도
+        mid = len(spirits) // 2
+        print(f"  🔁 Batch of {len(spirits)} failed, splitting into {mid} + {len(spirits) - mid}")
+        return call_audit_ai_batch(spirits[:mid], limiter, controller) + call_audit_ai_batch(spirits[mid:], limiter, controller)
+    
+    # 일부만 누락 → 누락된 항목만 재시도
+    print(f"  🔁 {len(failed)}/{len(spirits)} items missing from batch response, retrying them")
+    retried = call_audit_ai_batch([spirits[idx] for idx in failed], limiter, controller)
+    for idx, res in zip(failed, retried):
+        results[idx] = res
+    return results
+
+
 def validate_normalized_data(normalized: Dict) -> bool:
     """정규화된 데이터 검증"""
     # 필수 필드 체크
@@ -366,43 +560,104 @@ def apply_normalization_to_dict(spirit: Dict, normalized: Dict) -> Dict:
     return new_spirit
 
 
-def apply_normalization(spirit_id: str, normalized: Dict, dry_run: bool = False):
-    """Firestore 업데이트"""
+def build_update_data(normalized: Dict) -> Dict:
+    """정규화 결과를 Firestore update 필드로 변환"""
+    # metadata 병합
+    update_data = {
+        'country': normalized['country'],
+        'region': normalized.get('region'),
+        'distillery': normalized['distillery'],
+        'bottler': normalized.get('bottler'),
+        'abv': normalized.get('abv'),
+    }
+    
+    # importer가 있으면 metadata에 추가
+    if normalized.get('metadata', {}).get('importer'):
+        update_data['metadata.importer'] = normalized['metadata']['importer']
+    
+    # audit 정보 추가
+    update_data['metadata.auditDate'] = datetime.utcnow().isoformat()
+    update_data['metadata.corrections'] = normalized.get('corrections', [])
+    return update_data
+
+
+def apply_normalization(spirit_id: str, normalized: Dict, dry_run: bool = False,
+                        writer: Optional[FirestoreWriteBuffer] = None):
+    """
+    Firestore 업데이트 (writer가 있으면 배치 버퍼에 적재).
+    직접 업데이트가 실패하면 False (버퍼 적재는 커밋 결과를 writer의 on_commit으로 확인)
+    """
     if dry_run:
         print(f"  [DRY RUN] Would update {spirit_id}")
-        return
+        return True
+    
+    update_data = build_update_data(normalized)
+    
+    if writer:
+        writer.update(spirit_id, update_data)
+        print(f"  📤 Queued {spirit_id}")
+        return True
     
     db = get_db_client()
     try:
-        # metadata 병합
-        update_data = {
-            'country': normalized['country'],
-            'region': normalized.get('region'),
-            'distillery': normalized['distillery'],
-            'bottler': normalized.get('bottler'),
-            'abv': normalized.get('abv'),
-        }
-        
-        # importer가 있으면 metadata에 추가
-        if normalized.get('metadata', {}).get('importer'):
-            update_data['metadata.importer'] = normalized['metadata']['importer']
-        
-        # audit 정보 추가
-        update_data['metadata.auditDate'] = datetime.utcnow().isoformat()
-        update_data['metadata.corrections'] = normalized.get('corrections', [])
-        
         # Firestore 업데이트
         db.collection('spirits').document(spirit_id).update(update_data)
         
         print(f"  ✅ Updated {spirit_id}")
+        return True
     
     except Exception as e:
         print(f"  ❌ Update Error for {spirit_id}: {e}")
+        return False
+
+
+def journal_key(spirit: Dict) -> str:
+    """체크포인트 저널에서 항목을 식별하는 키"""
+    return str(spirit.get('id') or spirit.get('name', 'Unknown'))
+
+
+def tally_audit_entry(audit_log: Dict, entry: Dict):
+    """처리 결과 1건을 감사 로그 집계에 반영 (저널 재생 시에도 사용)"""
+    if entry['status'] != 'ok':
+        audit_log['errors'] += 1
+        return
+    
+    corrections = entry.get('corrections', [])
+    if corrections:
+        audit_log['corrected'] += 1
+        
+        # 카테고리별 집계
+        for correction in corrections:
+            correction_lower = correction.lower()
+            if '제조국' in correction or 'country' in correction_lower:
+                audit_log['corrections']['country'] += 1
+            if '지역' in correction or 'region' in correction_lower:
+                audit_log['corrections']['region'] += 1
+            if '증류소' in correction or 'distillery' in correction_lower:
+                audit_log['corrections']['distillery'] += 1
+            if '병입' in correction or 'bottler' in correction_lower:
+                audit_log['corrections']['bottler'] += 1
+            if 'abv' in correction_lower or '도수' in correction:
+                audit_log['corrections']['abv'] += 1
+            if '수입' in correction or 'importer' in correction_lower:
+                audit_log['corrections']['importer_separated'] += 1
+    else:
+        audit_log['unchanged'] += 1
+    
+    # 로그 상세 기록
+    audit_log['details'].append({
+        'id': entry['id'],
+        'name': entry['name'],
+        'corrections': corrections,
+        'normalized': entry['normalized']
+    })
+    
+    audit_log['processed'] += 1
 
 
 def save_audit_log(log_data: Dict, filename: str):
     """감사 로그 저장"""
-    os.makedirs('data', exist_ok=True)
+    os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
     
     with open(filename, 'w', encoding='utf-8') as f:
         json.dump(log_data, f, ensure_ascii=False, indent=2)
@@ -412,7 +667,7 @@ def save_audit_log(log_data: Dict, filename: str):
 
 # ==================== Main Function ====================
 
-def main():
+def main(argv: Optional[List[str]] = None) -> Optional[Dict]:
     parser = argparse.ArgumentParser(description='Database Audit AI for All Spirits')
     parser.add_argument('--input', help='Input local JSON file path (skips Firestore)')
     parser.add_argument('--output', help='Output JSON file path (for local mode)')
@@ -420,8 +675,38 @@ def main():
     parser.add_argument('--limit', type=int, default=None, help='Limit number of spirits to process')
     parser.add_argument('--skip-upload', action='store_true', help='Skip Firestore update (local log only)')
     parser.add_argument('--published-only', action='store_true', help='Only audit published spirits (default: all)')
-    
-    args = parser.parse_args()
+    parser.add_argument('--concurrency', type=int, default=1, help='Initial in-flight Gemini requests (default: 1)')
+    parser.add_argument('--max-concurrency', type=int, default=16, help='Ceiling for adaptive (AIMD) concurrency (default: 16)')
+    parser.add_argument('--max-retries', type=int, default=5, help='Retries per Gemini call on 429/5xx (default: 5)')
+    parser.add_argument('--rps', type=float, default=2.0, help='Max Gemini requests per second (default: 2.0)')
+    parser.add_argument('--batch-size', type=int, default=1, help='Spirits packed into one Gemini request (default: 1)')
+    parser.add_argument('--no-rules', action='store_true', help='Disable the local rule engine (send every spirit to Gemini)')
+    cache_group = parser.add_mutually_exclusive_group()
+    cache_group.add_argument('--no-cache', action='store_true', help='Disable the normalization result cache')
+    cache_group.add_argument('--refresh', action='store_true', help='Ignore cached results but store fresh ones')
+    parser.add_argument('--cache-path', default=DEFAULT_CACHE_PATH, help=f'Cache database path (default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--cache-max-mb', type=int, default=256, help='Cache size limit in MB before LRU eviction (default: 256)')
+    parser.add_argument('--journal', default=DEFAULT_JOURNAL_PATH, help=f'Checkpoint journal path (default: {DEFAULT_JOURNAL_PATH})')
+    parser.add_argument('--resume', action='store_true', help='Skip spirits already completed in the journal and continue the run')
+    parser.add_argument('--write-batch-size', type=int, default=500, help='Firestore updates per batch commit, 1 = unbatched (default: 500)')
+    parser.add_argument('--page-size', type=int, default=300, help='Firestore documents fetched per page (default: 300)')
+    parser.add_argument('--incremental', action='store_true', help='Only audit spirits updated since their last audit (uses the stored high-water mark)')
+    parser.add_argument('--since', help='Only audit spirits with updatedAt after this ISO timestamp (implies --incremental)')
+    parser.add_argument('--state', default=DEFAULT_STATE_PATH, help=f'High-water mark state file (default: {DEFAULT_STATE_PATH})')
+    parser.add_argument('--report-dir', default='data', help='Directory for audit_report_*.json (default: data)')
+    
+    args = parser.parse_args(argv)
+    
+    run_started = datetime.now(timezone.utc)
+    since = None
+    if args.since:
+        since = parse_timestamp(args.since)
+        if since is None:
+            print(f"❌ Invalid --since timestamp: {args.since}")
+            return
+        args.incremental = True
+    elif args.incremental:
+        since = parse_timestamp(load_high_water_mark(args.state))
     
     print("=" * 80)
     print("🤖 Database Audit AI")
@@ -434,13 +719,21 @@ def main():
         print(f"Output: {args.output}")
     else:
         print(f"Scope: {'Published Only' if args.published_only else 'ALL SPIRITS (published + unpublished)'}")
+        if args.incremental:
+            print(f"Incremental: changed since {since.isoformat() if since else 'last audit (no high-water mark, full scan)'}")
     
     print(f"Mode: {'DRY RUN' if args.dry_run else 'LIVE'}")
     print(f"Limit: {args.limit or 'None (all)'}")
     print(f"Upload: {'Disabled' if (args.skip_upload or args.input) else 'Enabled'}")
+    print(f"Concurrency: {args.concurrency} → {max(args.concurrency, args.max_concurrency)} adaptive in-flight / {args.rps} req/s")
+    print(f"Batch Size: {args.batch_size}")
+    print(f"Rule Engine: {'Disabled' if args.no_rules else 'Enabled'}")
+    print(f"Cache: {'Disabled' if args.no_cache else ('Refresh' if args.refresh else 'Enabled')}")
+    print(f"Journal: {args.journal}{' (resume)' if args.resume else ''}")
     print("=" * 80)
     
-    # 1. 데이터 가져오기
+    # 1. 데이터 가져오기 (Firestore는 페이지 단위 스트리밍 - 첫 페이지부터 바로 처리 시작)
+    stream_counts = {}
     if args.input:
         # 로콜 파일 로드
         if not os.path.exists(args.input):
@@ -450,21 +743,33 @@ def main():
             spirits = json.load(f)
             if args.limit:
                 spirits = spirits[:args.limit]
+        
+        if not spirits:
+            print("❌ No spirits found to process")
+            return
+        total = len(spirits)
     else:
         # Firestore에서 가져오기
         if args.published_only:
-            spirits = fetch_published_spirits(limit=args.limit)
+            spirits = fetch_published_spirits(limit=args.limit, counts=stream_counts, page_size=args.page_size, since=since)
         else:
-            spirits = fetch_all_spirits(limit=args.limit)
-    
-    if not spirits:
-        print("❌ No spirits found to process")
-        return
+            spirits = fetch_all_spirits(limit=args.limit, counts=stream_counts, page_size=args.page_size, since=since)
+        total = None  # 스트리밍 중에는 전체 건수를 알 수 없음
+        
+        # 증분 모드: 마지막 감사 이후 수정되지 않은 문서는 건너뜀
+        if args.incremental:
+            def changed_only(stream: Iterable[Dict]) -> Iterator[Dict]:
+                for spirit in stream:
+                    if needs_audit(spirit):
+                        yield spirit
+                    else:
+                        stream_counts['unchanged_since_audit'] = stream_counts.get('unchanged_since_audit', 0) + 1
+            spirits = changed_only(spirits)
     
     # 2. 감사 로그 초기화
     audit_log = {
         'timestamp': datetime.now().isoformat(),
-        'total': len(spirits),
+        'total': total or 0,
         'processed': 0,
         'corrected': 0,
         'unchanged': 0,
@@ -480,94 +785,193 @@ def main():
         'details': []
     }
     
-    processed_spirits = []
-    
-    # 3. 각 제품 처리
-    print(f"\n🔄 Processing {len(spirits)} spirits...\n")
-    
-    for i, spirit in enumerate(spirits, 1):
-        spirit_id = spirit.get('id', 'local_item')
-        spirit_name = spirit.get('name', 'Unknown')
-        
-        print(f"[{i}/{len(spirits)}] {spirit_name} ({spirit_id})")
-        
-        # AI 호출
-        normalized = call_audit_ai(spirit)
+    # 로컬 모드 결과는 입력 순서대로 (자리마다 채우고, 처리되지 않은 자리는 저장 시 제외)
+    processed_spirits: List[Optional[Dict]] = [None] * total if args.input else []
+    slot_of = {id(spirit): idx for idx, spirit in enumerate(spirits)} if args.input else {}
+    
+    # 2-1. 체크포인트 재생 (--resume): 성공한 항목은 집계에 반영하고 건너뜀, 에러 항목은 재시도
+    todo: Iterable[Dict] = spirits
+    completed = {}
+    if args.resume:
+        for entry in JsonlJournal.read(args.journal):
+            completed[entry['id']] = entry
+        completed = {key: entry for key, entry in completed.items() if entry['status'] == 'ok'}
+        if args.input:
+            # 다른 입력 파일/Firestore 모드의 저널 항목(결과 레코드 없음)은 무시
+            input_keys = {journal_key(spirit) for spirit in spirits}
+            completed = {key: entry for key, entry in completed.items()
+                         if key in input_keys and entry.get('spirit') is not None}
+            for idx, spirit in enumerate(spirits):
+                entry = completed.get(journal_key(spirit))
+                if entry:
+                    processed_spirits[idx] = entry['spirit']
         
-        if not normalized:
-            audit_log['errors'] += 1
-            processed_spirits.append(spirit)
-            continue
+        for entry in completed.values():
+            tally_audit_entry(audit_log, entry)
+        todo = (spirit for spirit in spirits if journal_key(spirit) not in completed)
+        print(f"\n♻️  Resumed from journal: {len(completed)} done")
+    
+    journal = JsonlJournal(args.journal, truncate=not args.resume)
+    
+    # 버퍼에 적재한 항목은 커밋이 확인된 뒤에만 저널에 'ok'로 기록 (크래시 후 --resume이 미반영 항목을 건너뛰지 않도록)
+    queued_entries: Dict[str, Dict] = {}
+    committed_ids = set()
+    queued_lock = threading.Lock()
+    
+    def on_commit(doc_ids: List[str]):
+        with queued_lock:
+            entries = [queued_entries[doc_id] for doc_id in doc_ids if doc_id in queued_entries]
+            committed_ids.update(doc_ids)
+        for entry in entries:
+            journal.append(entry)
+    
+    # Firestore 쓰기 버퍼 (배치 커밋)
+    writer = None
+    if not args.input and not args.skip_upload and not args.dry_run and args.write_batch_size > 1:
+        writer = FirestoreWriteBuffer(get_db_client(), 'spirits', batch_size=args.write_batch_size, on_commit=on_commit)
+    
+    # 3. 각 제품 처리 (AI 호출은 동시 실행, 결과 집계는 입력 순서대로)
+    print(f"\n🔄 Processing {total - len(completed) if total else 'streamed'} spirits...\n")
+    
+    limiter = TokenBucket(rate=args.rps)
+    controller = AdaptiveConcurrency(initial=args.concurrency, max_limit=max(args.concurrency, args.max_concurrency),
+                                     max_retries=args.max_retries)
+    latency = LatencyStats()
+    rules = None if args.no_rules else RulePreNormalizer()
+    cache = None if args.no_cache else SQLiteCache(args.cache_path, max_bytes=args.cache_max_mb * 1024 * 1024)
+    
+    def audit_worker(batch: List[Dict]) -> List[Optional[Dict]]:
+        # 규칙으로 확정 가능한 항목은 로컬 처리, 나머지만 AI 호출
+        normalized = [rules.resolve(spirit) if rules else None for spirit in batch]
         
-        # 검증
-        if not validate_normalized_data(normalized):
-            print(f"  ⚠️  Validation failed")
-            audit_log['errors'] += 1
-            processed_spirits.append(spirit)
-            continue
+        # 캐시 조회 (입력이 바뀌지 않은 항목은 API 호출 생략)
+        if cache and not args.refresh:
+            for idx, res in enumerate(normalized):
+                if res is None:
+                    normalized[idx] = cache.get(audit_cache_key(batch[idx]))
         
-        # 변경사항 체크
-        corrections = normalized.get('corrections', [])
+        pending = [idx for idx, res in enumerate(normalized) if res is None]
+        if not pending:
+            return normalized
         
-        if corrections:
-            audit_log['corrected'] += 1
+        # Rate limiting (API 과부하 방지) - 실제 동시 호출 수는 controller가 AIMD로 조절
+        started = time.monotonic()
+        ai_results = call_audit_ai_batch([batch[idx] for idx in pending], limiter, controller)
+        latency.record(time.monotonic() - started)
+        for idx, res in zip(pending, ai_results):
+            normalized[idx] = res
+            if cache and res and 'country' in res:
+                cache.put(audit_cache_key(batch[idx]), res)
+        return normalized
+    
+    batches = chunked(todo, args.batch_size)
+    results = (
+        (spirit, normalized)
+        for batch, normalized_list in ordered_map(audit_worker, batches, concurrency=controller.max_limit)
+        for spirit, normalized in zip(batch, normalized_list)
+    )
+    
+    try:
+        for i, (spirit, normalized) in enumerate(results, len(completed) + 1):
+            spirit_id = spirit.get('id', 'local_item')
+            spirit_name = spirit.get('name', 'Unknown')
             
-            # 카테고리별 집계
-            for correction in corrections:
-                correction_lower = correction.lower()
-                if '제조국' in correction or 'country' in correction_lower:
-                    audit_log['corrections']['country'] += 1
-                if '지역' in correction or 'region' in correction_lower:
-                    audit_log['corrections']['region'] += 1
-                if '증류소' in correction or 'distillery' in correction_lower:
-                    audit_log['corrections']['distillery'] += 1
-                if '병입' in correction or 'bottler' in correction_lower:
-                    audit_log['corrections']['bottler'] += 1
-                if 'abv' in correction_lower or '도수' in correction:
-                    audit_log['corrections']['abv'] += 1
-                if '수입' in correction or 'importer' in correction_lower:
-                    audit_log['corrections']['importer_separated'] += 1
+            print(f"[{i}/{total or '?'}] {spirit_name} ({spirit_id})")
             
-            print(f"  📝 Corrections: {len(corrections)}")
-            for correction in corrections:
-                print(f"     - {correction}")
-        else:
-            audit_log['unchanged'] += 1
-            print(f"  ✓ No changes needed")
-        
-        # 결과 적용
-        if args.input:
-            # 로컬 데이터에 적용
-            updated_spirit = apply_normalization_to_dict(spirit, normalized)
-            processed_spirits.append(updated_spirit)
+            entry = {'id': journal_key(spirit), 'name': spirit_name, 'status': 'error', 'corrections': [], 'normalized': None}
+            processed_spirit = spirit
+            
+            if not normalized:
+                pass
+            elif not validate_normalized_data(normalized):
+                # 검증
+                print(f"  ⚠️  Validation failed")
+            else:
+                # 변경사항 체크
+                corrections = normalized.get('corrections', [])
+                entry.update(status='ok', corrections=corrections, normalized=normalized)
+                
+                if corrections:
+                    print(f"  📝 Corrections: {len(corrections)}")
+                    for correction in corrections:
+                        print(f"     - {correction}")
+                else:
+                    print(f"  ✓ No changes needed")
+                
+                # 결과 적용
+                if args.input:
+                    # 로컬 데이터에 적용
+                    processed_spirit = apply_normalization_to_dict(spirit, normalized)
+                elif not args.skip_upload:
+                    # Firestore 업데이트 (원본 유지, FireStore는 직접 업데이트됨)
+                    if writer and not args.dry_run:
+                        # 저널 기록과 집계는 커밋 결과가 나온 뒤 (on_commit / 아래 finally)
+                        with queued_lock:
+                            queued_entries[spirit_id] = entry
+                        apply_normalization(spirit_id, normalized, dry_run=args.dry_run, writer=writer)
+                        continue
+                    if not apply_normalization(spirit_id, normalized, dry_run=args.dry_run, writer=writer):
+                        entry['status'] = 'error'
+            
+            if args.input:
+                entry['spirit'] = processed_spirit
+            journal.append(entry)
+            tally_audit_entry(audit_log, entry)
+            if args.input:
+                processed_spirits[slot_of[id(spirit)]] = processed_spirit
+    finally:
+        if writer:
+            writer.close()
+            # 커밋되지 않은 항목(writer.failed_ids 포함)은 'error'로 기록해 --resume에서 다시 처리
+            with queued_lock:
+                entries = list(queued_entries.items())
+            for doc_id, entry in entries:
+                if doc_id not in committed_ids:
+                    entry['status'] = 'error'
+                    journal.append(entry)
+                tally_audit_entry(audit_log, entry)
+        journal.close()
+    
+    if total is None:
+        audit_log['total'] = audit_log['processed'] + audit_log['errors']
+        audit_log['stream'] = stream_counts
+    
+    # 증분 기준점 갱신: 전체 범위를 빠짐없이 반영한 실행만 high-water mark를 전진
+    if not args.input:
+        write_failures = writer.stats['failed'] if writer else 0
+        if stream_counts.get('stream_error'):
+            audit_log['stream_error'] = stream_counts['stream_error']
+            print(f"\n❌ Firestore stream failed before the end ({stream_counts['stream_error']})")
+            print(f"ℹ️  High-water mark not advanced (unread documents remain)")
+        elif args.limit or args.dry_run or args.skip_upload or audit_log['errors'] or write_failures:
+            print(f"\nℹ️  High-water mark not advanced (partial run, dry run or errors)")
         else:
-            # Firestore 업데이트
-            if not args.skip_upload:
-                apply_normalization(spirit_id, normalized, dry_run=args.dry_run)
-            processed_spirits.append(spirit) # 원본 유지 (FireStore는 직접 업데이트됨)
-        
-        # 로그 상세 기록
-        audit_log['details'].append({
-            'id': spirit_id,
-            'name': spirit_name,
-            'corrections': corrections,
-            'normalized': normalized
-        })
-        
-        audit_log['processed'] += 1
-        
-        # Rate limiting (API 과부하 방지)
-        time.sleep(0.5)
+            save_high_water_mark(args.state, run_started.isoformat())
+            print(f"\n🕒 High-water mark advanced to {run_started.isoformat()} ({args.state})")
+    
+    if audit_log['total'] == 0:
+        print("❌ No spirits found to process")
+        return
+    
+    audit_log['performance'] = latency.summary()
+    audit_log['concurrency'] = controller.summary()
+    if rules:
+        audit_log['rules'] = rules.summary()
+    if cache:
+        audit_log['cache'] = cache.summary()
+        cache.close()
+    if writer:
+        audit_log['writes'] = writer.summary()
     
     # 4. 결과 저장 (로컬 모드인 경우)
     if args.input and args.output:
         with open(args.output, 'w', encoding='utf-8') as f:
-            json.dump(processed_spirits, f, ensure_ascii=False, indent=2)
+            json.dump([spirit for spirit in processed_spirits if spirit is not None], f, ensure_ascii=False, indent=2)
         print(f"\n✅ Processed data saved to: {args.output}")
     
     # 5. 감사 리포트 저장
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    log_filename = f"data/audit_report_{timestamp}.json"
+    log_filename = os.path.join(args.report_dir, f"audit_report_{timestamp}.json")
     save_audit_log(audit_log, log_filename)
     
     # 6. 요약 출력
@@ -582,7 +986,30 @@ def main():
     print("\nCorrections by category:")
     for category, count in audit_log['corrections'].items():
         print(f"  - {category}: {count}")
+    perf = audit_log['performance']
+    print("\nPerformance:")
+    print(f"  - Requests: {perf['requests']} in {perf['elapsed_sec']}s ({perf['requests_per_sec']} req/s)")
+    print(f"  - Latency p50: {perf['p50_ms']}ms / p95: {perf['p95_ms']}ms")
+    conc = audit_log['concurrency']
+    print(f"  - Concurrency: {conc['limit']} now / {conc['peak_limit']} peak (max {conc['max_limit']})")
+    print(f"  - Throttled (429): {conc['throttled']} → {conc['decreases']} decreases, paused {conc['paused_sec']}s")
+    print(f"  - Server errors: {conc['server_errors']}, retries: {conc['retries']}, gave up: {conc['gave_up']}")
+    if rules:
+        rule_stats = audit_log['rules']
+        print(f"\nRule engine: {rule_stats['resolved']} resolved locally / {rule_stats['deferred']} sent to AI ({rule_stats['hit_rate']}% hit rate)")
+        for reason, count in rule_stats['deferred_reasons'].items():
+            print(f"  - deferred ({reason}): {count}")
+    if cache:
+        cache_stats = audit_log['cache']
+        print(f"\nCache: {cache_stats['hits']} hits / {cache_stats['misses']} misses ({cache_stats['hit_rate']}% hit rate)")
+        print(f"  - Entries: {cache_stats['entries']} ({cache_stats['bytes'] / 1024:.1f} KB), evictions: {cache_stats['evictions']}")
+    if writer:
+        write_stats = audit_log['writes']
+        print(f"\nFirestore writes: {write_stats['committed']} committed in {write_stats['batches']} batches")
+        print(f"  - Failed: {write_stats['failed']}, retried: {write_stats['retried']}")
     print("=" * 80)
+    
+    return audit_log
 
 
 if __name__ == '__main__':
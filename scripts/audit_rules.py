@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Audit Rule Engine
+=================
+audit_database.py의 SYSTEM_INSTRUCTION에 정의된 고정 규칙(법인 형태 제거, 국가 별칭,
+도시→도 매핑)을 로컬에서 결정적으로 적용하는 사전 정규화기.
+
+규칙만으로 완전히 처리 가능한 레코드는 Gemini 호출 없이 결과를 만들고,
+판단이 필요한 레코드(수입사 의심, 독립 병입자, 미등록 지역 등)는 None을 반환해 AI로 넘깁니다.
+결과의 corrections 메시지는 SYSTEM_INSTRUCTION의 표준 포맷을 그대로 사용합니다.
+"""
+
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# ==================== Rule Tables ====================
+
+# 표준 국가명 → 별칭 목록 (소문자 비교)
+COUNTRY_ALIASES = {
+    '대한민국': ['한국', 'korea', 'south korea', 'republic of korea', 'kr'],
+    '영국': ['uk', 'united kingdom', 'great britain', 'scotland', 'england', 'wales', '스코틀랜드', '잉글랜드'],
+    '미국': ['usa', 'us', 'u.s.a.', 'united states', 'america', 'american'],
+    '프랑스': ['france'],
+    '일본': ['japan'],
+    '벨기에': ['belgium'],
+    '아일랜드': ['ireland'],
+    '캐나다': ['canada'],
+    '독일': ['germany'],
+    '이탈리아': ['italy'],
+    '스페인': ['spain'],
+    '멕시코': ['mexico'],
+    '대만': ['taiwan'],
+    '중국': ['china'],
+    '호주': ['australia'],
+    '뉴질랜드': ['new zealand'],
+    '네덜란드': ['netherlands', 'holland'],
+}
+
+# 한국 광역자치단체 표준명 → 약칭
+KOREAN_PROVINCES = {
+    '서울특별시': ['서울', '서울시'],
+    '부산광역시': ['부산', '부산시'],
+    '대구광역시': ['대구', '대구시'],
+    '인천광역시': ['인천', '인천시'],
+    '광주광역시': [],
+    '대전광역시': ['대전', '대전시'],
+    '울산광역시': ['울산', '울산시'],
+    '세종특별자치시': ['세종', '세종시'],
+    '경기도': ['경기'],
+    '강원특별자치도': ['강원', '강원도'],
+    '충청북도': ['충북'],
+    '충청남도': ['충남'],
+    '전라북도': ['전북', '전북특별자치도'],
+    '전라남도': ['전남'],
+    '경상북도': ['경북'],
+    '경상남도': ['경남'],
+    '제주특별자치도': ['제주', '제주도'],
+}
+
+# 시/군 → 도 (SYSTEM_INSTRUCTION의 City-to-Province mapping)
+# 안동은 프롬프트 표기가 모호하므로 로컬 규칙에서 제외하고 AI 판단에 맡깁니다.
+KOREAN_CITY_TO_PROVINCE = {
+    '가평': '경기도',
+    '고양': '경기도',
+    '나주': '전라남도',
+    '여수': '전라남도',
+    '순천': '전라남도',
+    '고흥': '전라남도',
+    '부안': '전라북도',
+    '김해': '경상남도',
+    '산청': '경상남도',
+    '원주': '강원특별자치도',
+    '홍천': '강원특별자치도',
+}
+
+# 스카치 위스키 지역
+SCOTCH_REGIONS = {
+    '스페이사이드': ['speyside'],
+    '아일라': ['islay'],
+    '하이랜드': ['highland', 'highlands'],
+    '로우랜드': ['lowland', 'lowlands'],
+    '캠벨타운': ['campbeltown'],
+    '아일랜드': ['island', 'islands'],
+}
+
+# 미국 주
+US_STATES = {
+    '켄터키': ['kentucky', 'ky'],
+    '테네시': ['tennessee', 'tn'],
+    '캘리포니아': ['california', 'ca'],
+    '뉴욕': ['new york', 'ny'],
+    '알래스카': ['alaska', 'ak'],
+}
+
+UNKNOWN_REGION_VALUES = {'미상', 'unknown', 'n/a', 'na', '-'}
+
+# 법인 형태 (SYSTEM_INSTRUCTION 3. DISTILLERY NORMALIZATION)
+_KO_FORMS = ['농업회사법인', '영농조합법인', '주식회사', '유한회사', '합자회사', '합동제조장', '㈜', '(주)', '( 주 )', '(유)']
+_KO_TOKEN_FORMS = ['합동', '법인']  # 단독 토큰으로 쓰일 때만 제거
+_EN_FORMS = [r'CO\.?\s*,?\s*LTD\.?', r'LIMITED', r'LTD\.?', r'INC\.?', r'LLC', r'CORPORATION', r'CORP\.?', r'COMPANY']
+_EN_SUFFIX_FORMS = [r'N\.?V\.?', r'S\.?A\.?', r'S\.?L\.?', r'OY']  # 이름 끝에 올 때만 제거
+
+LEGAL_FORM_RE = re.compile(
+    '|'.join([
+        '(?:' + '|'.join(re.escape(form) for form in _KO_FORMS) + ')',
+        r'(?<!\S)(?:' + '|'.join(_KO_TOKEN_FORMS) + r')(?!\S)',
+        r'(?<![A-Za-z0-9])(?:' + '|'.join(_EN_FORMS) + r')(?![A-Za-z0-9])',
+        r'(?<![A-Za-z0-9])(?:' + '|'.join(_EN_SUFFIX_FORMS) + r')\s*$',
+    ]),
+    re.IGNORECASE
+)
+
+# 수입사 의심 키워드 (SYSTEM_INSTRUCTION 4. IMPORTER DETECTION) → AI 판단 필요
+IMPORTER_RE = re.compile(
+    r'무역|인터내셔널|수입|\b(?:trading|import|imports|distribution|international|global)\b',
+    re.IGNORECASE
+)
+
+_ABV_RE = re.compile(r'-?\d+(?:\.\d+)?')
+
+
+def _build_alias_index(table: Dict[str, List[str]]) -> Dict[str, str]:
+    index = {}
+    for canonical, aliases in table.items():
+        index[canonical.lower()] = canonical
+        for alias in aliases:
+            index[alias.lower()] = canonical
+    return index
+
+
+COUNTRY_INDEX = _build_alias_index(COUNTRY_ALIASES)
+PROVINCE_INDEX = _build_alias_index(KOREAN_PROVINCES)
+SCOTCH_REGION_INDEX = _build_alias_index(SCOTCH_REGIONS)
+US_STATE_INDEX = _build_alias_index(US_STATES)
+
+
+# ==================== Field Rules ====================
+
+def _blank(value) -> bool:
+    return value is None or (isinstance(value, str) and value.strip() in ('', 'N/A'))
+
+
+def normalize_country(country) -> Optional[str]:
+    """별칭 테이블로 표준 국가명을 찾고, 없으면 None"""
+    if _blank(country):
+        return None
+    return COUNTRY_INDEX.get(str(country).strip().lower())
+
+
+def normalize_region(region, country: str) -> Tuple[bool, Optional[str]]:
+    """
+    (resolved, region) 반환.
+    resolved=False면 로컬 규칙으로 결정할 수 없는 지역값입니다.
+    """
+    if _blank(region):
+        return True, None
+
+    raw = str(region).strip()
+    key = raw.lower()
+
+    if key in UNKNOWN_REGION_VALUES or COUNTRY_INDEX.get(key) == country:
+        return True, None
+
+    if country == '대한민국':
+        province = PROVINCE_INDEX.get(key)
+        if province:
+            return True, province
+        # "경기도 가평군"처럼 표준 도명으로 시작하면 그대로 유지
+        if raw.split()[0] in KOREAN_PROVINCES:
+            return True, raw
+        city = re.sub(r'(시|군)$', '', raw)
+        if city in KOREAN_CITY_TO_PROVINCE:
+            return True, KOREAN_CITY_TO_PROVINCE[city]
+        return False, None
+
+    if country == '영국':
+        if key in SCOTCH_REGION_INDEX:
+            return True, SCOTCH_REGION_INDEX[key]
+        return False, None
+
+    if country == '미국':
+        if key in US_STATE_INDEX:
+            return True, US_STATE_INDEX[key]
+        return False, None
+
+    return False, None
+
+
+def strip_legal_forms(distillery: str) -> Tuple[str, List[str]]:
+    """법인 형태를 한 번의 정규식 패스로 제거하고 (정리된 이름, 제거된 형태 목록) 반환"""
+    removed = [m.group(0).strip() for m in LEGAL_FORM_RE.finditer(distillery)]
+    cleaned = LEGAL_FORM_RE.sub(' ', distillery)
+    cleaned = re.sub(r'\s+', ' ', cleaned).strip(' ,.-&')
+    return cleaned, removed
+
+
+def normalize_abv(abv) -> Tuple[bool, Optional[float]]:
+    """(resolved, abv) 반환. 0-100 범위 밖이면 None"""
+    if _blank(abv):
+        return True, None
+    if isinstance(abv, bool):
+        return False, None
+    if isinstance(abv, (int, float)):
+        value = float(abv)
+    else:
+        match = _ABV_RE.search(str(abv))
+        if not match:
+            return True, None
+        value = float(match.group(0))
+    if not (0 <= value <= 100):
+        return True, None
+    return True, value
+
+
+# ==================== Pre-Normalizer ====================
+
+class RulePreNormalizer:
+    """규칙으로 처리 가능한 레코드를 정규화하고 적중률 통계를 집계"""
+
+    def __init__(self):
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+    def _defer(self, reason: str) -> None:
+        with self._lock:
+            self.stats['deferred'] += 1
+            self.stats[f'deferred:{reason}'] += 1
+        return None
+
+    def resolve(self, spirit: Dict) -> Optional[Dict]:
+        """AI 응답과 동일한 형태의 정규화 결과 또는 None(AI 필요)"""
+        corrections = []
+
+        # 1. Country
+        country = normalize_country(spirit.get('country'))
+        if not country:
+            return self._defer('country')
+        if country != spirit.get('country'):
+            corrections.append(f"Standardized country to {country}")
+
+        # 2. Region
+        original_region = spirit.get('region')
+        resolved, region = normalize_region(original_region, country)
+        if not resolved:
+            return self._defer('region')
+        if region != original_region and not _blank(original_region):
+            raw_key = str(original_region).strip().lower()
+            if region is None and raw_key not in UNKNOWN_REGION_VALUES:
+                corrections.append("Region duplicated country - set to null")
+            else:
+                corrections.append(f"Standardized region to {region if region is not None else 'null'}")
+
+        # 3. Distillery (수입사 판단은 AI에 위임)
+        distillery = spirit.get('distillery')
+        if _blank(distillery):
+            return self._defer('distillery')
+        if IMPORTER_RE.search(str(distillery)):
+            return self._defer('importer')
+        cleaned, removed = strip_legal_forms(str(distillery))
+        if not cleaned:
+            return self._defer('distillery')
+        if removed:
+            corrections.append(f"Removed corporate forms: {', '.join(removed)}")
+
+        # 4. Bottler (독립 병입자 판단은 AI에 위임)
+        if not _blank(spirit.get('bottler')):
+            return self._defer('bottler')
+
+        # 5. ABV
+        original_abv = spirit.get('abv')
+        resolved, abv = normalize_abv(original_abv)
+        if not resolved:
+            return self._defer('abv')
+        if not _blank(original_abv):
+            try:
+                changed = abv is None or float(original_abv) != abv
+            except (TypeError, ValueError):
+                changed = True
+            if changed:
+                corrections.append(f"ABV adjusted to {abv if abv is not None else 'null'}")
+
+        with self._lock:
+            self.stats['resolved'] += 1
+
+        return {
+            'country': country,
+            'region': region,
+            'distillery': cleaned,
+            'bottler': None,
+            'abv': abv,
+            'metadata': {'importer': None},
+            'corrections': corrections,
+        }
+
+    def summary(self) -> Dict:
+        with self._lock:
+            resolved = self.stats['resolved']
+            deferred = self.stats['deferred']
+            reasons = {k.split(':', 1)[1]: v for k, v in self.stats.items() if k.startswith('deferred:')}
+        total = resolved + deferred
+        return {
+            'resolved': resolved,
+            'deferred': deferred,
+            'hit_rate': round(resolved / total * 100, 1) if total else 0.0,
+            'deferred_reasons': reasons,
+        }
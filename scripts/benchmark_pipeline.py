@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pipeline Benchmark
+==================
+audit_database.py(정규화 감사)와 fetch_reviews_gemini.py(리뷰 보완) 파이프라인을
+로컬 LLM 스텁에 대해 실행하고, 동시성 수준별 처리량/지연 시간/실패 호출 수를 비교합니다.
+실제 Gemini API나 Firestore에는 접근하지 않습니다.
+
+Usage:
+    python scripts/benchmark_pipeline.py [--sample 200] [--concurrency 1,2,4,8]
+                                         [--latency-ms 300] [--error-rate 0.02] [--quota-rps 10]
+                                         [--batch-size 1] [--http] [--adaptive --max-concurrency 32]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from llm_backend import HttpBackend, LLMBackend, StubBackend, StubServer
+
+DATA_FILE = Path('lib/db/ingested-data.json')
+
+
+def load_sample(path: Path, size: int) -> List[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)[:size]
+
+
+def run_audit(sample: List[Dict], backend: LLMBackend, workdir: str, concurrency: int, batch_size: int,
+              max_concurrency: int, fixed: bool) -> Dict:
+    """
+    감사 파이프라인을 로컬 파일 모드로 실행 (규칙 엔진/캐시 비활성화 → 전 항목 LLM 호출).
+    fixed이면 동시성을 concurrency로 고정하고, 아니면 concurrency에서 시작해 AIMD로 max_concurrency까지 조절합니다.
+    """
+    import audit_database
+
+    input_path = os.path.join(workdir, 'audit_input.json')
+    with open(input_path, 'w', encoding='utf-8') as f:
+        json.dump(sample, f, ensure_ascii=False)
+
+    audit_database.set_llm(backend)
+    argv = [
+        '--input', input_path,
+        '--output', os.path.join(workdir, 'audit_output.json'),
+        '--journal', os.path.join(workdir, 'audit_journal.jsonl'),
+        '--report-dir', workdir,
+        '--no-rules', '--no-cache',
+        '--concurrency', str(concurrency),
+        '--max-concurrency', str(concurrency if fixed else max_concurrency),
+        '--rps', '1000',
+        '--batch-size', str(batch_size),
+    ]
+    started = time.monotonic()
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        audit_log = audit_database.main(argv)
+    elapsed = time.monotonic() - started
+    return {'items': audit_log['processed'] + audit_log['errors'], 'elapsed': elapsed, 'item_errors': audit_log['errors'],
+            'concurrency': audit_log['concurrency']}
+
+
+def run_enrichment(sample: List[Dict], backend: LLMBackend, workdir: str, concurrency: int,
+                   max_concurrency: int, fixed: bool) -> Dict:
+    """리뷰 보완 파이프라인을 임시 데이터 파일에 대해 실행 (동시성 설정은 run_audit과 동일)"""
+    import fetch_reviews_gemini
+
+    # 모든 항목이 보완 대상이 되도록 기존 노트 제거
+    targets = []
+    for item in sample:
+        item = json.loads(json.dumps(item))
+        item.setdefault('metadata', {})
+        item['metadata'].pop('tasting_note', None)
+        item['metadata'].pop('description', None)
+        targets.append(item)
+
+    data_path = os.path.join(workdir, 'enrich_data.json')
+    with open(data_path, 'w', encoding='utf-8') as f:
+        json.dump(targets, f, ensure_ascii=False)
+
+    fetch_reviews_gemini.set_llm(backend)
+    argv = [
+        '--data-file', data_path,
+        '--rps', '0',
+        '--concurrency', str(concurrency),
+        '--max-concurrency', str(concurrency if fixed else max_concurrency),
+    ]
+    started = time.monotonic()
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        result = fetch_reviews_gemini.main(argv)
+    elapsed = time.monotonic() - started
+    return {'items': result['processed'], 'elapsed': elapsed, 'item_errors': result['processed'] - result['updated'],
+            'concurrency': result['concurrency']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Gemini pipelines against a local LLM stub')
+    parser.add_argument('--data-file', default=str(DATA_FILE), help=f'Sample source (default: {DATA_FILE})')
+    parser.add_argument('--sample', type=int, default=200, help='Number of spirits per run (default: 200)')
+    parser.add_argument('--concurrency', default='1,2,4,8', help='Comma-separated concurrency levels (default: 1,2,4,8)')
+    parser.add_argument('--batch-size', type=int, default=1, help='Audit --batch-size (default: 1)')
+    parser.add_argument('--latency-ms', type=float, default=300)
+    parser.add_argument('--jitter-ms', type=float, default=100)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--quota-rps', type=float, default=None)
+    parser.add_argument('--pipelines', default='audit,enrich', help='Pipelines to run (default: audit,enrich)')
+    parser.add_argument('--http', action='store_true', help='Serve the stub over localhost HTTP instead of in-process')
+    parser.add_argument('--adaptive', action='store_true', help='Let AIMD raise concurrency from each level up to --max-concurrency')
+    parser.add_argument('--max-concurrency', type=int, default=32, help='AIMD ceiling with --adaptive (default: 32)')
+    args = parser.parse_args()
+
+    sample = load_sample(Path(args.data_file), args.sample)
+    levels = [int(level) for level in args.concurrency.split(',') if level.strip()]
+    pipelines = [name.strip() for name in args.pipelines.split(',') if name.strip()]
+
+    print("=" * 80)
+    print("🧪 Pipeline Benchmark (LLM stub)")
+    print("=" * 80)
+    print(f"Sample: {len(sample)} spirits from {args.data_file}")
+    print(f"Stub: latency {args.latency_ms}±{args.jitter_ms}ms, error rate {args.error_rate}, quota {args.quota_rps or 'unlimited'} rps")
+    print(f"Transport: {'HTTP (localhost)' if args.http else 'in-process'}")
+    print("=" * 80)
+
+    rows = []
+    for pipeline in pipelines:
+        for level in levels:
+            stub = StubBackend(args.latency_ms, args.jitter_ms, args.error_rate, args.quota_rps)
+            server = StubServer(stub).start() if args.http else None
+            backend = HttpBackend(server.url) if server else stub
+            try:
+                with tempfile.TemporaryDirectory() as workdir:
+                    if pipeline == 'audit':
+                        result = run_audit(sample, backend, workdir, level, args.batch_size,
+                                           args.max_concurrency, fixed=not args.adaptive)
+                    elif pipeline == 'enrich':
+                        result = run_enrichment(sample, backend, workdir, level, args.max_concurrency,
+                                                fixed=not args.adaptive)
+                    else:
+                        print(f"⚠️  Unknown pipeline: {pipeline}")
+                        continue
+            finally:
+                if server:
+                    server.stop()
+
+            latency = backend.latency.summary()
+            row = {
+                'pipeline': pipeline,
+                'concurrency': level,
+                'items': result['items'],
+                'elapsed_sec': round(result['elapsed'], 2),
+                'items_per_sec': round(result['items'] / result['elapsed'], 2) if result['elapsed'] else 0.0,
+                'calls': backend.stats['calls'],
+                'throttled': backend.stats['throttled'],
+                'errors': backend.stats['errors'],
+                'item_errors': result['item_errors'],
+                'final_limit': result['concurrency']['limit'],
+                'retries': result['concurrency']['retries'],
+                'p50_ms': latency['p50_ms'],
+                'p95_ms': latency['p95_ms'],
+            }
+            rows.append(row)
+            print(f"  ✓ {pipeline:<7} c={level:<3} {row['items_per_sec']:>8} items/s  "
+                  f"p50 {row['p50_ms']}ms  p95 {row['p95_ms']}ms  calls {row['calls']}  "
+                  f"429s {row['throttled']}  5xx {row['errors']}  retries {row['retries']}  final c={row['final_limit']}")
+
+    print("\n" + "=" * 80)
+    print(" 📊 [SUMMARY] Pipeline Benchmark")
+    print("-" * 80)
+    print(f"  {'pipeline':<8} {'conc':>4} {'final':>5} {'items':>6} {'sec':>8} {'items/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'calls':>6} {'429':>5} {'5xx':>5} {'retry':>5} {'failed':>6}")
+    for row in rows:
+        print(f"  {row['pipeline']:<8} {row['concurrency']:>4} {row['final_limit']:>5} {row['items']:>6} {row['elapsed_sec']:>8} "
+              f"{row['items_per_sec']:>8} {row['p50_ms']:>8} {row['p95_ms']:>8} {row['calls']:>6} "
+              f"{row['throttled']:>5} {row['errors']:>5} {row['retries']:>5} {row['item_errors']:>6}")
+    print("=" * 80 + "\n")
+    return rows
+
+
+if __name__ == '__main__':
+    main()
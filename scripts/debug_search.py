@@ -1,3 +1,4 @@
+import re
 import requests
 import random
 from bs4 import BeautifulSoup
@@ -24,7 +25,10 @@ def debug_search():
             src = img.get('src', '')
             print(f"Img {i}: src={src[:50]}...")
             
-        debug_file = Path('c:/k-spirits-club-hub/debug_search.html')
+        # image_extractor.py bench 용 fixture로도 사용
+        slug = re.sub(r'[^a-z0-9]+', '_', query.split(' bottle')[0].lower()).strip('_')
+        debug_file = Path('data/html_fixtures') / f"{slug}.html"
+        debug_file.parent.mkdir(parents=True, exist_ok=True)
         with open(debug_file, 'w', encoding='utf-8') as f:
             f.write(response.text)
         print(f"Saved to {debug_file}")
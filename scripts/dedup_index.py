@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Dedup Index
+===========
+식품안전나라(fsk-), 수입식품정보마루(mfds-), Firestore 레코드를 아우르는 영구 중복 인덱스.
+
+- 키: 'id:<id>' (fsk-/mfds- 접두사 포함), 'ext:<source>:<externalId>', 'name:<정규화 이름>'
+- 실행 시 키 전체를 메모리 dict로 올려 O(1)로 조회하고, 신규 키는 SQLite에 배치로 기록
+- 이미 다른 레코드가 가진 키와 겹치면 중복으로 기록 → report로 소스 간 중복 클러스터 확인
+
+Usage:
+    python scripts/dedup_index.py seed lib/db/ingested-data.json data/spirits_*.json data/raw_imported/*
+    python scripts/dedup_index.py seed --firestore
+    python scripts/dedup_index.py report [--output data/dedup_report.json]
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_INDEX_PATH = 'data/dedup_index.sqlite'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS keys (
+    key TEXT PRIMARY KEY,
+    record_id TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS records (
+    id TEXT PRIMARY KEY,
+    source TEXT,
+    category TEXT,
+    name TEXT,
+    name_en TEXT
+);
+CREATE TABLE IF NOT EXISTS duplicates (
+    record_id TEXT PRIMARY KEY,
+    canonical_id TEXT NOT NULL,
+    matched_key TEXT NOT NULL,
+    source TEXT,
+    category TEXT,
+    name TEXT,
+    seen_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_duplicates_canonical ON duplicates(canonical_id);
+"""
+
+_VOLUME_RE = re.compile(r'\d+(?:\.\d+)?\s*(?:ml|mℓ|l|ℓ|리터|밀리리터)\b', re.IGNORECASE)
+_NON_WORD_RE = re.compile(r'[^0-9a-z가-힣]+')
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """비교용 이름 키: NFKC + 소문자, 용량 표기/공백/기호 제거 (너무 짧으면 빈 문자열)"""
+    if not name:
+        return ''
+    text = unicodedata.normalize('NFKC', str(name)).lower()
+    text = _VOLUME_RE.sub('', text)
+    text = _NON_WORD_RE.sub('', text)
+    return text if len(text) >= 3 else ''
+
+
+def record_source(record: Dict[str, Any]) -> str:
+    record_id = str(record.get('id') or '')
+    if record.get('source'):
+        return record['source']
+    if record_id.startswith('fsk-'):
+        return 'food_safety_korea'
+    if record_id.startswith('mfds-'):
+        return 'imported_food_maru'
+    return 'firestore'
+
+
+def record_keys(record: Dict[str, Any]) -> List[str]:
+    """레코드의 중복 판정 키 목록 (id → externalId → 이름 순)"""
+    keys = []
+    if record.get('id'):
+        keys.append(f"id:{record['id']}")
+    external_id = record.get('externalId')
+    if external_id and external_id != 'unknown':
+        keys.append(f"ext:{record_source(record)}:{external_id}")
+    for field in ('name', 'name_en'):
+        normalized = normalize_name(record.get(field))
+        if normalized:
+            keys.append(f"name:{normalized}")
+    return list(dict.fromkeys(keys))
+
+
+class DedupIndex:
+    """스레드 안전 영구 중복 인덱스 (메모리 dict + SQLite)"""
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.stats = {'checked': 0, 'added': 0, 'duplicates': 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        self._keys: Dict[str, str] = dict(self._conn.execute('SELECT key, record_id FROM keys'))
+        self._pending_keys: List[Tuple[str, str]] = []
+        self._pending_records: List[Tuple] = []
+        self._pending_dups: List[Tuple] = []
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def find(self, record: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """다른 레코드가 이미 가진 키가 있으면 (canonical_id, key) 반환"""
+        own_id = str(record.get('id') or '')
+        for key in record_keys(record):
+            owner = self._keys.get(key)
+            if owner is not None and owner != own_id:
+                return owner, key
+        return None
+
+    def check_and_add(self, record: Dict[str, Any]) -> Optional[str]:
+        """
+        중복이면 기존 레코드 id를 반환하고 중복으로 기록, 아니면 키를 등록하고 None 반환.
+        같은 id로 다시 들어온 레코드(재수집)는 중복이 아닙니다.
+        """
+        with self._lock:
+            self.stats['checked'] += 1
+            match = self.find(record)
+            if match:
+                canonical_id, key = match
+                self.stats['duplicates'] += 1
+                # 중복 레코드만 가진 키(영문명 등)도 canonical에 연결 → 다음 변형도 같은 클러스터로 묶임
+                for extra_key in record_keys(record):
+                    if extra_key not in self._keys:
+                        self._keys[extra_key] = canonical_id
+                        self._pending_keys.append((extra_key, canonical_id))
+                self._pending_dups.append((
+                    str(record.get('id') or key), canonical_id, key, record_source(record),
+                    record.get('category'), record.get('name') or record.get('name_en'),
+                    datetime.now().isoformat()
+                ))
+                return canonical_id
+            self._add_locked(record)
+            return None
+
+    def add(self, record: Dict[str, Any]):
+        with self._lock:
+            self._add_locked(record)
+
+    def _add_locked(self, record: Dict[str, Any]):
+        record_id = str(record.get('id') or '')
+        if not record_id:
+            return
+        new_keys = [key for key in record_keys(record) if key not in self._keys]
+        for key in new_keys:
+            self._keys[key] = record_id
+            self._pending_keys.append((key, record_id))
+        self._pending_records.append((record_id, record_source(record), record.get('category'),
+                                      record.get('name'), record.get('name_en')))
+        self.stats['added'] += 1
+        if len(self._pending_keys) >= 1000:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        with self._conn:
+            if self._pending_keys:
+                self._conn.executemany('INSERT OR IGNORE INTO keys (key, record_id) VALUES (?, ?)', self._pending_keys)
+            if self._pending_records:
+                self._conn.executemany('INSERT OR REPLACE INTO records (id, source, category, name, name_en) VALUES (?, ?, ?, ?, ?)',
+                                       self._pending_records)
+            if self._pending_dups:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO duplicates (record_id, canonical_id, matched_key, source, category, name, seen_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)', self._pending_dups)
+        self._pending_keys, self._pending_records, self._pending_dups = [], [], []
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def clusters(self, cross_source_only: bool = False) -> List[Dict[str, Any]]:
+        """canonical 레코드별 중복 묶음 (소스가 여러 개인 클러스터 우선)"""
+        self.flush()
+        records = {row[0]: row for row in self._conn.execute('SELECT id, source, category, name, name_en FROM records')}
+        grouped = defaultdict(list)
+        for record_id, canonical_id, key, source, category, name, seen_at in self._conn.execute(
+                'SELECT record_id, canonical_id, matched_key, source, category, name, seen_at FROM duplicates'):
+            grouped[canonical_id].append({'id': record_id, 'source': source, 'category': category,
+                                          'name': name, 'matched_key': key, 'seen_at': seen_at})
+
+        result = []
+        for canonical_id, members in grouped.items():
+            canonical = records.get(canonical_id, (canonical_id, None, None, None, None))
+            sources = sorted({canonical[1] or 'unknown'} | {member['source'] or 'unknown' for member in members})
+            if cross_source_only and len(sources) < 2:
+                continue
+            result.append({
+                'canonical': {'id': canonical_id, 'source': canonical[1], 'category': canonical[2],
+                              'name': canonical[3] or canonical[4]},
+                'sources': sources,
+                'duplicates': members,
+            })
+        result.sort(key=lambda cluster: (-len(cluster['sources']), -len(cluster['duplicates'])))
+        return result
+
+    def summary(self) -> Dict[str, Any]:
+        return dict(self.stats, keys=len(self._keys))
+
+
+def add_dedup_arguments(parser):
+    """수집 스크립트 공통 중복 인덱스 옵션"""
+    parser.add_argument('--dedup-index', default=DEFAULT_INDEX_PATH,
+                        help=f'Cross-source dedup index path (default: {DEFAULT_INDEX_PATH})')
+    parser.add_argument('--no-dedup', action='store_true', help='Skip the cross-source dedup index')
+
+
+def _iter_firestore() -> Iterable[Dict[str, Any]]:
+    from audit_database import get_db_client
+    from firestore_io import stream_documents
+    db = get_db_client()
+    fields = ['name', 'name_en', 'externalId', 'source', 'category']
+    yield from stream_documents(db.collection('spirits'), fields=fields)
+
+
+def main():
+    from spirit_store import iter_records
+
+    parser = argparse.ArgumentParser(description='Cross-source dedup index')
+    parser.add_argument('--index', default=DEFAULT_INDEX_PATH, help=f'Index path (default: {DEFAULT_INDEX_PATH})')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_seed = sub.add_parser('seed', help='Register existing datasets (first registration wins, later ones are duplicates)')
+    p_seed.add_argument('paths', nargs='*', help='Dataset files or globs (.json / .jsonl / .jsonl.zst / .sqlite)')
+    p_seed.add_argument('--firestore', action='store_true', help='Also register the Firestore spirits collection')
+    p_report = sub.add_parser('report', help='Print cross-source duplicate clusters')
+    p_report.add_argument('--all', action='store_true', help='Include single-source clusters')
+    p_report.add_argument('--top', type=int, default=20)
+    p_report.add_argument('--output', help='Write the full cluster list as JSON')
+    args = parser.parse_args()
+
+    with DedupIndex(args.index) as index:
+        if args.command == 'seed':
+            sources = []
+            if args.firestore:
+                sources.append(('firestore', _iter_firestore()))
+            for pattern in args.paths:
+                for path in sorted(glob.glob(pattern)) or [pattern]:
+                    sources.append((path, iter_records(path)))
+            for label, records in sources:
+                before = dict(index.stats)
+                for record in records:
+                    index.check_and_add(record)
+                print(f"  • {label}: +{index.stats['added'] - before['added']} records, "
+                      f"{index.stats['duplicates'] - before['duplicates']} duplicates")
+            print(f"✅ Index: {len(index):,} keys ({args.index})")
+
+        elif args.command == 'report':
+            clusters = index.clusters(cross_source_only=not args.all)
+            print("=" * 80)
+            print(f" 🔁 Duplicate clusters: {len(clusters):,}{'' if args.all else ' (cross-source)'}")
+            print("=" * 80)
+            for cluster in clusters[:args.top]:
+                canonical = cluster['canonical']
+                print(f"\n  {canonical['name']} [{canonical['id']}] ({', '.join(cluster['sources'])})")
+                for member in cluster['duplicates']:
+                    print(f"    - {member['name']} [{member['id']}] {member['source']}/{member['category']} via {member['matched_key']}")
+            if args.output:
+                os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+                with open(args.output, 'w', encoding='utf-8') as f:
+                    json.dump(clusters, f, ensure_ascii=False, indent=2)
+                print(f"\n💾 Report saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,20 @@
 import os
 import requests
 import json
+import argparse
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime
 
 from pathlib import Path
 
+from http_pool import DEFAULT_TIMEOUT, HostLimiter, make_session
+from http_cache import CachingSession, add_cache_arguments, caching_session
+from spirit_store import CategoryStore
+from dedup_index import DedupIndex, add_dedup_arguments
+
 # .env 및 .env.local 파일 로드
 env_path = Path(__file__).parent.parent / '.env'
 env_local_path = Path(__file__).parent.parent / '.env.local'
@@ -52,9 +60,24 @@ SPIRIT_CATEGORY_MAP = {
     '일반증류주': ['일반증류주', '일반 증류주']
 }
 
-def fetch_spirits_by_category(canonical_name: str, search_aliases: List[str]) -> List[Dict[str, Any]]:
+# 증분 동기화 상태 (카테고리/검색어별 total_count, 마지막 페이지 해시)
+DEFAULT_STATE_PATH = os.path.join('data', 'food_safety_sync_state.json')
+
+# 한 번에 요청하는 행 수 (API 최대값)
+PAGE_SIZE = 1000
+
+# 제외 키워드 (수출용/원액/주정은 수집 대상 아님)
+EXCLUSION_KEYWORDS = ["수출", "원액", "주정"]
+
+
+def fetch_spirits_by_category(canonical_name: str, search_aliases: List[str],
+                              session: Optional[requests.Session] = None,
+                              executor: Optional[ThreadPoolExecutor] = None,
+                              limiter: Optional[HostLimiter] = None) -> Optional[List[Dict[str, Any]]]:
     """
     하나의 표준 카테고리에 대해 여러 검색어 변형으로 데이터를 수집하고 합칩니다.
+    executor가 주어지면 검색어별 수집과 페이지 요청을 동시에 실행합니다 (결과 순서는 검색어 순서 유지).
+    한 검색어라도 일부 페이지를 끝내 받지 못하면 None (불완전한 카테고리를 완료된 것처럼 저장하지 않음)
     """
     category_data = []
     seen_external_ids = set() # 중복 제거용 (품목보고번호 기준)
@@ -62,8 +85,20 @@ def fetch_spirits_by_category(canonical_name: str, search_aliases: List[str]) ->
 
     print(f"\n📂 [{canonical_name}] 표준 카테고리 수집 시작 (검색어: {', '.join(search_aliases)})")
 
-    for alias in search_aliases:
-        alias_data = fetch_spirits_by_type(alias)
+    if executor and len(search_aliases) > 1:
+        # 검색어별 첫 페이지를 동시에 시작 (페이지 fan-out은 공유 executor에서 처리)
+        with ThreadPoolExecutor(max_workers=len(search_aliases)) as alias_pool:
+            alias_results = list(alias_pool.map(
+                lambda alias: fetch_spirits_by_type(alias, session, executor, limiter), search_aliases))
+    else:
+        alias_results = [fetch_spirits_by_type(alias, session, executor, limiter) for alias in search_aliases]
+
+    failed_aliases = [alias for alias, alias_data in zip(search_aliases, alias_results) if alias_data is None]
+    if failed_aliases:
+        print(f"❌ [{canonical_name}] 수집 실패 ({', '.join(failed_aliases)}) - 이번 실행에서는 저장하지 않습니다.")
+        return None
+
+    for alias_data in alias_results:
         for item in alias_data:
             # 카테고리명 정규화
             item['category'] = canonical_name
@@ -82,118 +117,394 @@ def fetch_spirits_by_category(canonical_name: str, search_aliases: List[str]) ->
                 seen_names.add(name_clean)
     
     return category_data
-    
-    return category_data
 
-def fetch_spirits_by_type(spirit_type: str) -> List[Dict[str, Any]]:
+
+def map_row(row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """API 행을 Spirit 인터페이스 구조로 매핑 (제외 대상이면 None)"""
+    name_raw = row.get('PRDLST_NM', '')
+    if not name_raw:
+        return None
+
+    # 제외 키워드 필터링 (강화됨)
+    if any(keyword in name_raw for keyword in EXCLUSION_KEYWORDS):
+        print(f"  🚫 제외됨 (키워드 감지): {name_raw}")
+        return None
+
+    return {
+        "id": f"fsk-{row.get('PRDLST_REPORT_NO', 'unknown')}", # 품목보고번호를 ID로 활용
+        "name": name_raw,
+        "name_en": None,
+        "distillery": row.get('BSSH_NM'),
+        "bottler": None,
+        "abv": 0, # API에서 도수 정보가 불확실하므로 기본값 0 (추후 파싱 필요)
+        "volume": None,
+        "category": row.get('PRDLST_DCNM'),
+        "subcategory": None,
+        "country": "대한민국",
+        "region": None,
+        "imageUrl": None,
+        "thumbnailUrl": None,
+        "source": "food_safety_korea",
+        "externalId": row.get('PRDLST_REPORT_NO'),
+        "isPublished": False,
+        "isReviewed": False,
+        "reviewedBy": None,
+        "reviewedAt": None,
+        "createdAt": datetime.now().isoformat(),
+        "updatedAt": datetime.now().isoformat(),
+        
+        # New Schema: Tags at root
+        "nose_tags": [],
+        "palate_tags": [],
+        "finish_tags": [],
+        "tasting_note": "",
+
+        "metadata": {
+            "description_ko": None,
+            "description_en": None,
+            "pairing_guide_ko": None,
+            "pairing_guide_en": None,
+            "expiry": row.get('POG_DAYCNT'),
+            "raw_category": row.get('PRDLST_DCNM')
+        }
+    }
+
+
+def cacheable(response) -> bool:
+    """HTTP 캐시 저장 여부: 200 본문의 RESULT.CODE가 정상(INFO-000) 또는 데이터 없음(INFO-200)일 때만 저장"""
+    try:
+        service_result = response.json().get(SERVICE_ID) or {}
+    except (ValueError, AttributeError):
+        return False
+    return service_result.get('RESULT', {}).get('CODE') in ('INFO-000', 'INFO-200')
+
+
+def fetch_page(spirit_type: str, start_idx: int, end_idx: int,
+               session: Optional[requests.Session] = None,
+               limiter: Optional[HostLimiter] = None,
+               refresh: bool = False) -> Tuple[Optional[List[Dict[str, Any]]], Optional[int]]:
+    """
+    start_idx ~ end_idx 구간 1페이지 요청. refresh=True면 HTTP 캐시를 읽지 않고 새로 요청합니다.
+    반환: (rows, total_count). 데이터 없음(INFO-200)은 ([], 0), 에러는 (None, None)
+    """
+    # API URL 구성 (SERVICE_ID 지원)
+    url = f"{BASE_URL}/{API_KEY}/{SERVICE_ID}/json/{start_idx}/{end_idx}/PRDLST_DCNM={spirit_type}"
+    http = session or requests
+    kwargs = {'refresh': True} if refresh and isinstance(http, CachingSession) else {}
+    try:
+        if limiter:
+            with limiter.slot(url):
+                response = http.get(url, timeout=DEFAULT_TIMEOUT, **kwargs)
+        else:
+            response = http.get(url, timeout=DEFAULT_TIMEOUT, **kwargs)
+        
+        if response.status_code != 200:
+            print(f"❌ HTTP 에러 ({response.status_code}): {spirit_type} {start_idx}~{end_idx}")
+            return None, None
+
+        data = response.json()
+    except Exception as e:
+        print(f"❌ [{spirit_type}] {start_idx}~{end_idx} 요청 중 예외 발생: {str(e)}")
+        return None, None
+
+    service_result = data.get(SERVICE_ID)
+    if not service_result or service_result.get('RESULT', {}).get('CODE') != 'INFO-000':
+        code = service_result.get('RESULT', {}).get('CODE') if service_result else "Unknown"
+        if code == 'INFO-200': # 해당 데이터 없음 (마지막 페이지 초과)
+            return [], 0
+        print(f"❌ API 에러 ({code}): {service_result.get('RESULT', {}).get('MSG') if service_result else ''}")
+        return None, None
+
+    try:
+        total_count = int(service_result.get('total_count'))
+    except (TypeError, ValueError):
+        total_count = None
+    return service_result.get('row', []), total_count
+
+
+def fetch_spirits_by_type(spirit_type: str, session: Optional[requests.Session] = None,
+                          executor: Optional[ThreadPoolExecutor] = None,
+                          limiter: Optional[HostLimiter] = None) -> Optional[List[Dict[str, Any]]]:
     """
     특정 주종에 대한 데이터를 식품안전나라 API에서 가져옵니다.
+    첫 페이지의 total_count로 남은 구간을 계산해, executor가 있으면 나머지 페이지를 동시에 요청합니다.
+    동시 요청에서 실패한 구간은 순차로 한 번 더 요청하고, 그래도 실패하면 None을 반환합니다.
     """
     if not API_KEY:
         print("❌ 에러: FOOD_SAFETY_KOREA_API_KEY가 .env 파일에 설정되어 있지 않습니다.")
         return []
 
+    print(f"\n🔍 [{spirit_type}] 데이터 수집 시작...")
+
+    pages: List[List[Dict[str, Any]]] = []
+    rows, total_count = fetch_page(spirit_type, 1, PAGE_SIZE, session, limiter)
+    if rows is None:
+        return None
+    if rows:
+        pages.append(rows)
+        print(f"  - 1 ~ {PAGE_SIZE} 구간 수집 완료 ({len(rows)}건, 전체 {total_count if total_count is not None else '?'}건)")
+
+    if rows and len(rows) >= PAGE_SIZE:
+        if total_count is not None and executor:
+            # 전체 건수를 알면 남은 구간을 한 번에 fan-out (결과는 구간 순서대로 합침)
+            windows = [(start, start + PAGE_SIZE - 1) for start in range(PAGE_SIZE + 1, total_count + 1, PAGE_SIZE)]
+            futures = [executor.submit(fetch_page, spirit_type, start, end, session, limiter) for start, end in windows]
+            failed_windows = 0
+            for (start_idx, end_idx), future in zip(windows, futures):
+                page_rows, _ = future.result()
+                if page_rows is None:
+                    # 세션 재시도 후에도 실패한 구간은 순차로 한 번 더
+                    print(f"  🔁 {start_idx} ~ {end_idx} 구간 재요청")
+                    page_rows, _ = fetch_page(spirit_type, start_idx, end_idx, session, limiter)
+                if page_rows is None:
+                    failed_windows += 1
+                    continue
+                if page_rows:
+                    pages.append(page_rows)
+                    print(f"  - {start_idx} ~ {end_idx} 구간 수집 완료 ({len(page_rows)}건)")
+            if failed_windows:
+                print(f"❌ [{spirit_type}] {failed_windows}/{len(windows)}개 구간 수집 실패")
+                return None
+        else:
+            # 전체 건수를 모르면 빈 페이지가 나올 때까지 순차 요청
+            start_idx = PAGE_SIZE + 1
+            while True:
+                end_idx = start_idx + PAGE_SIZE - 1
+                page_rows, _ = fetch_page(spirit_type, start_idx, end_idx, session, limiter)
+                if page_rows is None:
+                    print(f"❌ [{spirit_type}] {start_idx} ~ {end_idx} 구간 수집 실패")
+                    return None
+                if not page_rows:
+                    break
+                pages.append(page_rows)
+                print(f"  - {start_idx} ~ {end_idx} 구간 수집 완료 ({len(page_rows)}건)")
+                if len(page_rows) < PAGE_SIZE:
+                    break
+                start_idx += PAGE_SIZE
+
     all_data = []
-    start_idx = 1
-    end_idx = 1000
-    has_more = True
+    for page_rows in pages:
+        for row in page_rows:
+            mapped_item = map_row(row)
+            if mapped_item:
+                all_data.append(mapped_item)
 
-    print(f"\n🔍 [{spirit_type}] 데이터 수집 시작...")
+    print(f"✅ [{spirit_type}] 총 {len(all_data):,}건 수집 완료")
+    return all_data
 
-    while has_more:
-        try:
-            # API URL 구성 (SERVICE_ID 지원)
-            url = f"{BASE_URL}/{API_KEY}/{SERVICE_ID}/json/{start_idx}/{end_idx}/PRDLST_DCNM={spirit_type}"
-            response = requests.get(url)
-            
-            if response.status_code != 200:
-                print(f"❌ HTTP 에러 ({response.status_code}): {spirit_type}")
-                break
+def save_category(canonical_name: str, fetched_data: List[Dict[str, Any]], data_dir: str, compact: bool = True,
+                  dedup: Optional[DedupIndex] = None):
+    """
+    기존 데이터와 비교해 신규 항목만 저장소 로그에 추가 (compact이면 JSON 파일까지 갱신).
+    dedup 인덱스가 있으면 다른 카테고리/소스에 이미 있는 제품(이름·ID 일치)도 제외합니다.
+    """
+    store = CategoryStore(os.path.join(data_dir, f"spirits_{canonical_name}.json"))
+    file_path = store.json_path
+    
+    # 1. 기존 데이터 인덱스 (기준 JSON + 미반영 로그)
+    existing_ids, _, existing_count = set(), set(), 0
+    try:
+        existing_ids, _, existing_count = store.load_index()
+        if existing_count:
+            print(f"📖 기존 데이터 로드 완료: '{file_path}' ({existing_count}건)")
+    except Exception as e:
+        print(f"⚠️ 기존 파일 로드 중 오류 발생 (새 파일로 취급): {e}")
+
+    # 2. 중복 제외 및 신규 아이템 추출
+    new_items = []
+    cross_duplicates = 0
+    for item in fetched_data:
+        if item.get('externalId') not in existing_ids:
+            # 동일 배치 내 중복 방지
+            if item.get('externalId'):
+                existing_ids.add(item.get('externalId'))
+            if dedup is not None and dedup.check_and_add(item):
+                cross_duplicates += 1
+                continue
+            new_items.append(item)
+    if cross_duplicates:
+        print(f"🔁 [{canonical_name}] 다른 카테고리/소스와 중복된 {cross_duplicates}건 제외")
+    
+    # 3. 신규 항목 append (기존 파일은 다시 쓰지 않음)
+    if new_items:
+        store.append(new_items)
+        print(f"✅ '{store.log_path}' +{len(new_items)}건 신규 추가 (총 {existing_count + len(new_items)}건)")
+        if not existing_count: # 완전 새 파일인 경우 샘플 출력
+            print(f"📝 데이터 샘플:")
+            print(json.dumps(new_items[0], indent=2, ensure_ascii=False))
+    else:
+        print(f"ℹ️ '{file_path}': 새로 추가할 데이터가 없습니다. (기존 {existing_count}건 유지)")
+    
+    if compact and store.pending():
+        total = store.compact()
+        print(f"🗜️ '{file_path}' 갱신 완료 (총 {total}건)")
+    return new_items
 
-            data = response.json()
-            service_result = data.get(SERVICE_ID)
 
-            if not service_result or service_result.get('RESULT', {}).get('CODE') != 'INFO-000':
-                code = service_result.get('RESULT', {}).get('CODE') if service_result else "Unknown"
-                if code == 'INFO-200': # 해당 데이터 없음 (마지막 페이지 초과)
-                    has_more = False
-                else:
-                    print(f"❌ API 에러 ({code}): {service_result.get('RESULT', {}).get('MSG')}")
-                break
+# ==================== Incremental Sync ====================
 
-            rows = service_result.get('row', [])
-            if not rows:
-                has_more = False
-                break
+def page_hash(rows: List[Dict[str, Any]]) -> str:
+    """페이지 내용 지문 (품목보고번호 목록 기준)"""
+    ids = sorted(str(row.get('PRDLST_REPORT_NO')) for row in rows)
+    return hashlib.sha1('|'.join(ids).encode('utf-8')).hexdigest()
 
-            # Spirit 인터페이스 구조에 맞게 매핑
-            for row in rows:
-                name_raw = row.get('PRDLST_NM', '')
-                if not name_raw:
-                    continue
 
-                # 제외 키워드 필터링 (강화됨)
-                exclusion_keywords = ["수출", "원액", "주정"]
-                if any(keyword in name_raw for keyword in exclusion_keywords):
-                    print(f"  🚫 제외됨 (키워드 감지): {name_raw}")
-                    continue
+def load_sync_state(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ 동기화 상태 파일 로드 실패 (전체 수집으로 진행): {e}")
+        return {}
 
-                mapped_item = {
-                    "id": f"fsk-{row.get('PRDLST_REPORT_NO', 'unknown')}", # 품목보고번호를 ID로 활용
-                    "name": name_raw,
-                    "name_en": None,
-                    "distillery": row.get('BSSH_NM'),
-                    "bottler": None,
-                    "abv": 0, # API에서 도수 정보가 불확실하므로 기본값 0 (추후 파싱 필요)
-                    "volume": None,
-                    "category": row.get('PRDLST_DCNM'),
-                    "subcategory": None,
-                    "country": "대한민국",
-                    "region": None,
-                    "imageUrl": None,
-                    "thumbnailUrl": None,
-                    "source": "food_safety_korea",
-                    "externalId": row.get('PRDLST_REPORT_NO'),
-                    "isPublished": False,
-                    "isReviewed": False,
-                    "reviewedBy": None,
-                    "reviewedAt": None,
-                    "createdAt": datetime.now().isoformat(),
-                    "updatedAt": datetime.now().isoformat(),
-                    
-                    # New Schema: Tags at root
-                    "nose_tags": [],
-                    "palate_tags": [],
-                    "finish_tags": [],
-                    "tasting_note": "",
-
-                    "metadata": {
-                        "description_ko": None,
-                        "description_en": None,
-                        "pairing_guide_ko": None,
-                        "pairing_guide_en": None,
-                        "expiry": row.get('POG_DAYCNT'),
-                        "raw_category": row.get('PRDLST_DCNM')
-                    }
-                }
-                all_data.append(mapped_item)
 
-            print(f"  - {start_idx} ~ {end_idx} 구간 수집 완료 ({len(rows)}건)")
+def save_sync_state(path: str, state: Dict[str, Any]):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def sync_rows_by_type(spirit_type: str, known_ids: Set[str], alias_state: Dict[str, Any],
+                      session: Optional[requests.Session] = None,
+                      executor: Optional[ThreadPoolExecutor] = None,
+                      limiter: Optional[HostLimiter] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    증분 수집: 신규 행만 반환 (에러 시 None, alias_state는 성공 시에만 갱신).
 
-            if len(rows) < 1000:
-                has_more = False
-            else:
-                start_idx += 1000
-                end_idx += 1000
+    증분 판단은 현재 서버 상태가 기준이므로 이 경로의 모든 요청은 HTTP 캐시를 읽지 않습니다 (refresh=True).
 
-        except Exception as e:
-            print(f"❌ [{spirit_type}] 처리 중 예외 발생: {str(e)}")
+    1. 1건 요청으로 total_count 확인
+    2. 이전 total_count 이후 구간(늘어난 꼬리 페이지)은 동시에 요청
+    3. 그 앞쪽은 뒤에서부터 한 페이지씩 거슬러 올라가며, 모든 행이 이미 알려진 페이지를 만나면 중단
+       (건수가 그대로이고 마지막 페이지 해시도 같으면 마지막 페이지 1회 요청으로 끝)
+    """
+    _, total_count = fetch_page(spirit_type, 1, 1, session, limiter, refresh=True)
+    if total_count is None:
+        return None
+    if total_count == 0:
+        alias_state.update(total_count=0, last_page_hash=None, synced_at=datetime.now().isoformat())
+        return []
+
+    old_total = alias_state.get('total_count') or 0
+    last_start = ((total_count - 1) // PAGE_SIZE) * PAGE_SIZE + 1
+    starts = list(range(last_start, 0, -PAGE_SIZE))
+    tail = [start for start in starts if start > old_total]
+    head = [start for start in starts if start <= old_total]
+
+    new_rows: List[Dict[str, Any]] = []
+    last_hash = None
+
+    def collect(start_idx: int, rows: List[Dict[str, Any]]) -> int:
+        fresh = [row for row in rows if row.get('PRDLST_REPORT_NO') not in known_ids]
+        new_rows.extend(fresh)
+        print(f"  - {start_idx} ~ {start_idx + PAGE_SIZE - 1} 구간 확인 ({len(rows)}건 중 신규 {len(fresh)}건)")
+        return len(fresh)
+
+    # 늘어난 꼬리 구간: 전부 새 데이터이므로 동시에 요청
+    if executor and len(tail) > 1:
+        futures = [(start, executor.submit(fetch_page, spirit_type, start, start + PAGE_SIZE - 1,
+                                           session, limiter, refresh=True))
+                   for start in tail]
+        tail_pages = [(start, future.result()[0]) for start, future in futures]
+    else:
+        tail_pages = [(start, fetch_page(spirit_type, start, start + PAGE_SIZE - 1, session, limiter, refresh=True)[0])
+                      for start in tail]
+    for start, rows in tail_pages:
+        if rows is None:
+            return None
+        if start == last_start:
+            last_hash = page_hash(rows)
+        collect(start, rows)
+
+    # 기존 구간: 뒤에서부터 알려진 페이지를 만날 때까지만
+    for start in head:
+        rows, _ = fetch_page(spirit_type, start, start + PAGE_SIZE - 1, session, limiter, refresh=True)
+        if rows is None:
+            return None
+        if start == last_start:
+            last_hash = page_hash(rows)
+            if total_count == old_total and last_hash == alias_state.get('last_page_hash'):
+                print(f"  - 변경 없음 (전체 {total_count}건, 마지막 페이지 동일)")
+                break
+        if collect(start, rows) == 0:
             break
 
-    print(f"✅ [{spirit_type}] 총 {len(all_data):,}건 수집 완료")
-    return all_data
+    alias_state.update(total_count=total_count, last_page_hash=last_hash, synced_at=datetime.now().isoformat())
+    return new_rows
+
+
+def sync_category(canonical_name: str, search_aliases: List[str], data_dir: str, category_state: Dict[str, Any],
+                  session: Optional[requests.Session] = None,
+                  executor: Optional[ThreadPoolExecutor] = None,
+                  limiter: Optional[HostLimiter] = None,
+                  dedup: Optional[DedupIndex] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    카테고리 증분 동기화: 저장소에 없는 신규 항목만 매핑해 반환합니다.
+    제외 키워드/이름 중복/다른 카테고리·소스 중복(dedup)으로 저장하지 않은 품목보고번호는
+    category_state['skipped_ids']에 기억해 다음 실행에서 '알려진 행'으로 취급합니다.
+    """
+    store = CategoryStore(os.path.join(data_dir, f"spirits_{canonical_name}.json"))
+    known_ids, seen_names, existing_count = store.load_index()
+    skipped_ids = set(category_state.get('skipped_ids', []))
+    known_ids |= skipped_ids
+
+    print(f"\n🔄 [{canonical_name}] 증분 동기화 (기존 {existing_count}건, 검색어: {', '.join(search_aliases)})")
+
+    new_items = []
+    cross_duplicates = 0
+    aliases_state = category_state.setdefault('aliases', {})
+    for alias in search_aliases:
+        alias_state = dict(aliases_state.get(alias, {}))
+        rows = sync_rows_by_type(alias, known_ids, alias_state, session, executor, limiter)
+        if rows is None:
+            print(f"⚠️ [{alias}] 동기화 실패 - 다음 실행에서 다시 확인합니다.")
+            continue
+
+        for row in rows:
+            external_id = row.get('PRDLST_REPORT_NO')
+            item = map_row(row)
+            if item is None or item['name'].strip() in seen_names or external_id in known_ids:
+                if external_id:
+                    skipped_ids.add(external_id)
+                    known_ids.add(external_id)
+                continue
+            # 카테고리명 정규화
+            item['category'] = canonical_name
+            item['metadata']['raw_category'] = canonical_name
+            if dedup is not None and dedup.check_and_add(item):
+                cross_duplicates += 1
+                if external_id:
+                    skipped_ids.add(external_id)
+                    known_ids.add(external_id)
+                continue
+            new_items.append(item)
+            seen_names.add(item['name'].strip())
+            if external_id:
+                known_ids.add(external_id)
+        aliases_state[alias] = alias_state
+
+    if cross_duplicates:
+        print(f"🔁 [{canonical_name}] 다른 카테고리/소스와 중복된 {cross_duplicates}건 제외")
+    category_state['skipped_ids'] = sorted(skipped_ids)
+    return new_items
+
 
 def main():
+    parser = argparse.ArgumentParser(description='식품안전나라 주류 데이터 수집')
+    parser.add_argument('--workers', type=int, default=8, help='동시 페이지 요청 스레드 수, 1 = 순차 수집 (default: 8)')
+    parser.add_argument('--per-host', type=int, default=4, help='호스트당 최대 동시 요청 수 (default: 4)')
+    parser.add_argument('--categories', help='수집할 표준 카테고리 (쉼표 구분, 기본값: 전체)')
+    parser.add_argument('--incremental', action='store_true', help='변경된 꼬리 페이지만 확인하여 신규 항목만 추가')
+    parser.add_argument('--state', default=DEFAULT_STATE_PATH, help=f'증분 동기화 상태 파일 (default: {DEFAULT_STATE_PATH})')
+    parser.add_argument('--compact', action='store_true', help='증분 모드에서도 신규 로그를 JSON 파일에 합쳐 저장 (전체 수집은 항상 합침)')
+    add_cache_arguments(parser)
+    add_dedup_arguments(parser)
+    args = parser.parse_args()
+
     total_count = 0
     start_time = datetime.now()
     
@@ -203,58 +514,87 @@ def main():
         os.makedirs(data_dir)
         print(f"📂 '{data_dir}' 폴더가 생성되었습니다.")
 
+    categories = SPIRIT_CATEGORY_MAP
+    if args.categories:
+        wanted = [name.strip() for name in args.categories.split(',') if name.strip()]
+        categories = {name: SPIRIT_CATEGORY_MAP[name] for name in wanted if name in SPIRIT_CATEGORY_MAP}
+
+    parallel = args.workers > 1
     print("🚀 식품안전나라 주류 데이터 수집 스크립트 가동 (정규화 모드)")
     print(f"시작 시간: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"수집 방식: {f'병렬 (페이지 {args.workers}스레드, 호스트당 {args.per_host}건)' if parallel else '순차'}"
+          f"{' / 증분 동기화' if args.incremental else ''}")
 
-    for canonical_name, aliases in SPIRIT_CATEGORY_MAP.items():
-        file_path = os.path.join(data_dir, f"spirits_{canonical_name}.json")
-        
-        # 1. 기존 데이터 로드
-        existing_data = []
-        existing_ids = set()
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    existing_data = json.load(f)
-                    # 기존 아이템들의 externalId 수집
-                    existing_ids = {item.get('externalId') for item in existing_data if item.get('externalId')}
-                print(f"📖 기존 데이터 로드 완료: '{file_path}' ({len(existing_data)}건)")
-            except Exception as e:
-                print(f"⚠️ 기존 파일 로드 중 오류 발생 (새 파일로 취급): {e}")
-
-        # 2. API에서 최신 데이터 수집
-        fetched_data = fetch_spirits_by_category(canonical_name, aliases)
-        
-        # 3. 중복 제외 및 신규 아이템 추출
-        new_items = []
-        for item in fetched_data:
-            if item.get('externalId') not in existing_ids:
-                new_items.append(item)
-                # 동일 배치 내 중복 방지
-                if item.get('externalId'):
-                    existing_ids.add(item.get('externalId'))
-
-        total_count += len(fetched_data)
-        
-        # 4. 결과 저장 (기존 데이터 + 신규 데이터)
-        if new_items:
-            combined_data = existing_data + new_items
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(combined_data, f, indent=2, ensure_ascii=False)
-            
-            print(f"✅ '{file_path}' 업데이트 완료: +{len(new_items)}건 신규 추가 (총 {len(combined_data)}건)")
-            if not existing_data: # 완전 새 파일인 경우 샘플 출력
-                print(f"📝 데이터 샘플:")
-                print(json.dumps(combined_data[0], indent=2, ensure_ascii=False))
-        else:
-            print(f"ℹ️ '{file_path}': 새로 추가할 데이터가 없습니다. (기존 {len(existing_data)}건 유지)")
+    if args.cache != 'off':
+        print(f"HTTP 캐시: {args.cache} ({args.cache_path}, TTL {args.cache_ttl_hours:g}시간)")
 
+    session = caching_session(make_session(pool_size=max(args.workers, args.per_host)), args, cacheable=cacheable)
+    limiter = HostLimiter(args.per_host)
+    dedup = None if args.no_dedup else DedupIndex(args.dedup_index)
+    failed_categories: List[str] = []
+
+    if args.incremental:
+        state = load_sync_state(args.state)
+        page_pool = ThreadPoolExecutor(max_workers=args.workers) if parallel else None
+        try:
+            for canonical_name, aliases in categories.items():
+                category_state = state.setdefault(canonical_name, {})
+                # 교차 소스 중복은 sync_category에서 걸러 skipped_ids에 남김 (다음 실행의 조기 종료 기준)
+                new_items = sync_category(canonical_name, aliases, data_dir, category_state, session, page_pool,
+                                          limiter, dedup=dedup)
+                saved = save_category(canonical_name, new_items, data_dir, compact=args.compact)
+                total_count += len(saved)
+                # 카테고리마다 상태 저장 (중단되어도 완료된 카테고리는 다시 확인하지 않음)
+                save_sync_state(args.state, state)
+        finally:
+            if page_pool:
+                page_pool.shutdown()
+    elif parallel:
+        # 카테고리는 동시에 시작하고, 페이지 요청은 공유 page_pool + 호스트 제한으로 실행
+        with ThreadPoolExecutor(max_workers=args.workers) as page_pool, \
+                ThreadPoolExecutor(max_workers=len(categories) or 1) as category_pool:
+            futures = {
+                category_pool.submit(fetch_spirits_by_category, name, aliases, session, page_pool, limiter): name
+                for name, aliases in categories.items()
+            }
+            # 완료된 카테고리부터 저장 (파일 쓰기는 메인 스레드에서만)
+            for future in as_completed(futures):
+                fetched_data = future.result()
+                if fetched_data is None:
+                    failed_categories.append(futures[future])
+                    continue
+                total_count += len(fetched_data)
+                save_category(futures[future], fetched_data, data_dir, dedup=dedup)
+    else:
+        for canonical_name, aliases in categories.items():
+            # API에서 최신 데이터 수집
+            fetched_data = fetch_spirits_by_category(canonical_name, aliases, session, None, limiter)
+            if fetched_data is None:
+                failed_categories.append(canonical_name)
+                continue
+            total_count += len(fetched_data)
+            save_category(canonical_name, fetched_data, data_dir, dedup=dedup)
+
+    cache_stats = session.summary()
+    session.close()
+    dedup_stats = None
+    if dedup is not None:
+        dedup_stats = dedup.summary()
+        dedup.close()
     end_time = datetime.now()
     duration = end_time - start_time
     print(f"\n✨ 모든 작업 완료!")
-    print(f"총 수집 건수 (중복 제거): {total_count:,}건")
-    print(f"총 저장된 카테고리 파일 수: {len(SPIRIT_CATEGORY_MAP)}개")
+    print(f"{'신규 추가 건수' if args.incremental else '총 수집 건수 (중복 제거)'}: {total_count:,}건")
+    print(f"총 저장된 카테고리 파일 수: {len(categories) - len(failed_categories)}개")
+    if failed_categories:
+        print(f"⚠️ 수집 실패로 저장하지 않은 카테고리: {', '.join(failed_categories)} (다시 실행하세요)")
     print(f"소요 시간: {duration}")
+    if args.cache != 'off':
+        print(f"HTTP 캐시: 요청 {cache_stats['requests']}건 중 재생 {cache_stats['replayed']}건 / 실제 요청 {cache_stats['fetched']}건 "
+              f"(저장 {cache_stats['entries']}건, {cache_stats['bytes'] / 1024 / 1024:.1f} MB, 에러 응답 미저장 {cache_stats['uncacheable']}건)")
+    if dedup_stats:
+        print(f"중복 인덱스: 확인 {dedup_stats['checked']:,}건 중 소스 간 중복 {dedup_stats['duplicates']:,}건 제외 "
+              f"(키 {dedup_stats['keys']:,}개, {args.dedup_index})")
 
 if __name__ == "__main__":
     main()
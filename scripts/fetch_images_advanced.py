@@ -1,8 +1,6 @@
 import requests
-from bs4 import BeautifulSoup
 import sys
 import os
-import json
 import random
 import time
 import argparse
@@ -10,6 +8,11 @@ from pathlib import Path
 from datetime import datetime
 from urllib.parse import urlencode
 
+from image_extractor import extract_image_url, iter_candidates
+from image_probe import choose_image, is_transient_failure, make_probe_session
+from image_search_cache import add_search_cache_arguments, open_search_cache
+from spirit_store import dataset_files, load_records, write_records
+
 # Force UTF-8 for Windows
 sys.stdout.reconfigure(encoding='utf-8')
 sys.stderr.reconfigure(encoding='utf-8')
@@ -45,66 +48,56 @@ def build_advanced_search_url(name_en, distillery):
     
     return f"{base_url}?{urlencode(params)}"
 
-import re
-
-def fetch_image_url(name_en, distillery):
-    """HTML 내의 JSON 블록 및 URL 패턴을 분석하여 실제 이미지 URL 추출"""
+def _search_html(name_en, distillery):
+    """고급 검색 결과 페이지 HTML (요청 오류는 그대로 raise)"""
     url = build_advanced_search_url(name_en, distillery)
     headers = {"User-Agent": random.choice(USER_AGENTS)}
     
-    try:
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        html = response.text
-        
-        # 1. 원본 소스 및 상세 정보 추출 시도
-        # Google JSON 구조: ["URL", height, width] 패턴 탐색
-        patterns = re.findall(r'\[\"(https?://[^\"\s]+\.(?:jpg|jpeg|png|webp))\",(\d+),(\d+)\]', html)
-        
-        found_url = None
-        for img_url, h, w in patterns:
-            h, w = int(h), int(w)
-            
-            # 필터 1: 가로가 세로보다 긴(Landscape) 이미지는 술병 사진으로 부적합하므로 제외
-            if w > h:
-                continue
-                
-            # 필터 2: 특정 도메인 제외 및 길이 검사
-            if 'gstatic.com' not in img_url and 'google' not in img_url:
-                if len(img_url) > 20: 
-                    found_url = img_url
-                    break
-                    
-        # 2. 정적 img 태그 파싱 (Fallback 1) - 비율을 알 수 없으므로 최소한의 필터링만 수행
-        if not found_url:
-            soup = BeautifulSoup(html, 'html.parser')
-            images = soup.find_all('img')
-            for img in images:
-                src = img.get('src') or img.get('data-src') or img.get('data-deferred-src')
-                # 여기서는 비율 획득이 어려우므로 기존 로직 유지
-                if src and src.startswith('http') and 'gstatic.com' not in src and 'google' not in src:
-                    found_url = src
-                    break
-                    
-        # 3. gstatic 썸네일이라도 매칭 (Fallback 2)
-        if not found_url:
-            # 썸네일 중에서도 비율 정보를 찾을 수 있는 경우 필터링 시도
-            for img_url, h, w in patterns:
-                if 'encrypted-tbn' in img_url and int(w) <= int(h):
-                    found_url = img_url
-                    break
-            
-        return found_url
-        
-    except Exception as e:
-        print(f"⚠️ 검색 중 오류 ({name_en}): {e}")
-        return None
+    response = requests.get(url, headers=headers, timeout=15)
+    response.raise_for_status()
+    return response.text
+
+def find_image_url(name_en, distillery):
+    """
+    검색 결과 HTML의 JSON 블록 및 img 태그를 분석하여 실제 이미지 URL 추출 (요청 오류는 raise).
+    None 반환은 '검색은 성공했으나 쓸 만한 이미지가 없음'이므로 negative 캐시 대상입니다.
+    """
+    # 미리 컴파일한 패턴/스트리밍 파서로 첫 적합 후보에서 중단 (image_extractor.py)
+    return extract_image_url(_search_html(name_en, distillery))
+
+def find_image_candidates(name_en, distillery, limit=5):
+    """find_image_url과 같은 검색에서 우선순위 상위 limit개 후보 URL (검증 단계용)"""
+    candidates = []
+    for candidate in iter_candidates(_search_html(name_en, distillery)):
+        if candidate.url not in candidates:
+            candidates.append(candidate.url)
+        if len(candidates) >= limit:
+            break
+    return candidates
+
+def validate_candidates(probe_session, candidates, concurrency):
+    """
+    후보를 Range GET으로 동시에 확인하고 (가장 적합한 이미지 URL 또는 None, 결과를 캐시해도 되는지) 반환.
+    쓸 만한 후보가 없는데 일부가 일시적으로 실패(타임아웃/연결 오류/5xx)했다면 캐시하지 않습니다.
+    """
+    best, results = choose_image(probe_session, candidates, concurrency)
+    dead = sum(1 for result in results if not result['ok'])
+    if best:
+        size = f"{best['width']}x{best['height']}" if best['width'] else 'size unknown'
+        print(f"  🔎 Probed {len(results)} candidates ({dead} dead) → {size}, {best['content_type']}")
+        return best['url'], True
+    transient = sum(1 for result in results if is_transient_failure(result))
+    print(f"  🔎 Probed {len(results)} candidates ({dead} dead{f', {transient} transient' if transient else ''}) → none usable")
+    return None, not transient
 
 def main():
     parser = argparse.ArgumentParser(description='Fetch images for enriched spirits data')
-    parser.add_argument('--input', help='Input JSON file path')
-    parser.add_argument('--output', help='Output JSON file path')
+    parser.add_argument('--input', help='Input dataset path (.json / .jsonl / .jsonl.zst / .sqlite)')
+    parser.add_argument('--output', help='Output dataset path (format by extension)')
+    parser.add_argument('--no-validate', action='store_true', help='Skip probing candidate URLs (accept the first match)')
+    parser.add_argument('--max-candidates', type=int, default=5, help='Candidates to probe per item (default: 5)')
+    parser.add_argument('--probe-concurrency', type=int, default=8, help='Concurrent probe requests (default: 8)')
+    add_search_cache_arguments(parser)
     args = parser.parse_args()
 
     # Load Data
@@ -115,30 +108,29 @@ def main():
         if not input_path.exists():
             print(f"❌ Input file not found: {input_path}")
             return
-        with open(input_path, 'r', encoding='utf-8') as f_in:
-            data = json.load(f_in)
-            if isinstance(data, list):
-                all_enriched.extend(data)
-            else:
-                print("❌ Input JSON must be a list of objects")
-                return
+        try:
+            all_enriched.extend(load_records(str(input_path)))
+        except ValueError:
+            print("❌ Input JSON must be a list of objects")
+            return
         output_path = Path(args.output) if args.output else DEFAULT_OUTPUT_FILE
     else:
         # Backward Compatibility: Scan directory
         print(f"📂 Scanning default directory: {DEFAULT_INPUT_DIR}")
-        batch_files = list(DEFAULT_INPUT_DIR.glob('whisky_enriched_batch_*.json'))
+        batch_files = dataset_files(str(DEFAULT_INPUT_DIR), 'whisky_enriched_batch_*')
         if not batch_files:
             print("❌ No batch files found.")
             return
         for f_path in batch_files:
-            with open(f_path, 'r', encoding='utf-8') as f_in:
-                all_enriched.extend(json.load(f_in))
+            all_enriched.extend(load_records(f_path))
         output_path = DEFAULT_OUTPUT_FILE
 
     print(f"🔍 Loaded {len(all_enriched)} items. Starting Image Search...")
 
     processed_count = 0
     total_items = len(all_enriched)
+    search_cache = open_search_cache(args)
+    probe_session = None if args.no_validate else make_probe_session(args.probe_concurrency)
 
     for i, item in enumerate(all_enriched):
         # Already has valid image?
@@ -148,9 +140,26 @@ def main():
         name_en = item.get('metadata', {}).get('name_en', item['name'])
         distillery = item.get('distillery', '')
         
-        print(f"📸 [{i+1}/{total_items}] Fetching: {name_en}...")
-        
-        img_url = fetch_image_url(name_en, distillery)
+        # 캐시 우선 (URL 또는 retry-after 전의 negative 결과면 네트워크 생략)
+        cached, img_url = search_cache.lookup(name_en, distillery) if search_cache else (False, None)
+        searched = not cached
+        if cached:
+            print(f"💾 [{i+1}/{total_items}] Cached {'hit' if img_url else 'miss (retry later)'}: {name_en}")
+        else:
+            print(f"📸 [{i+1}/{total_items}] Fetching: {name_en}...")
+            try:
+                cacheable = True
+                if probe_session:
+                    candidates = find_image_candidates(name_en, distillery, args.max_candidates)
+                    img_url, cacheable = validate_candidates(probe_session, candidates, args.probe_concurrency)
+                else:
+                    img_url = find_image_url(name_en, distillery)
+                if search_cache and cacheable:
+                    search_cache.store(name_en, distillery, img_url, 'advanced')
+            except Exception as e:
+                # 요청 오류는 캐시하지 않음 (다음 실행에서 재시도)
+                print(f"⚠️ 검색 중 오류 ({name_en}): {e}")
+                img_url = None
         
         if img_url:
             item['imageUrl'] = img_url
@@ -161,25 +170,24 @@ def main():
         else:
             item['imageUrl'] = None
             item['status'] = 'IMAGE_FAILED'
-            # Log failure
-            with open(FAIL_LOG, 'a', encoding='utf-8') as f_fail:
-                f_fail.write(f"{item['id']} | {name_en} | {datetime.now().isoformat()}\n")
-            print(f"❌ Failed (Logged): {name_en}")
+            if searched:
+                # Log failure
+                with open(FAIL_LOG, 'a', encoding='utf-8') as f_fail:
+                    f_fail.write(f"{item['id']} | {name_en} | {datetime.now().isoformat()}\n")
+                print(f"❌ Failed (Logged): {name_en}")
 
         processed_count += 1
         
-        # Delay
+        # Delay (실제로 검색한 경우만)
         delay = random.uniform(3, 6) # Slightly faster for batch processing as batches are small
-        if i < total_items - 1:
+        if searched and i < total_items - 1:
             time.sleep(delay)
             
         # Intermediate Save (only if not single batch file, or just save always)
         # For batch mode, we just save at the end usually, but safe to save here.
 
     # Save Result
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, 'w', encoding='utf-8') as f_out:
-        json.dump(all_enriched, f_out, indent=2, ensure_ascii=False)
+    write_records(str(output_path), all_enriched)
         
     print(f"✨ Validation Ready: {output_path}")
 
@@ -191,6 +199,13 @@ def main():
     print(f"  • Images Found       : {sum(1 for i in all_enriched if i.get('imageUrl')):,}")
     print(f"  • Failed/No Image    : {sum(1 for i in all_enriched if not i.get('imageUrl')):,}")
     print(f"  • Output File        : {output_path}")
+    if probe_session:
+        probe_session.close()
+    if search_cache:
+        cache_stats = search_cache.summary()
+        search_cache.close()
+        print(f"  • Search Cache       : {cache_stats['hits']} hits / {cache_stats['negative_hits']} negative / "
+              f"{cache_stats['misses']} searched")
     print("=" * 50 + "\n")
 
 if __name__ == "__main__":
@@ -1,11 +1,17 @@
 import os
-import requests
 import json
-import time
+import math
 import random
-from datetime import datetime, timedelta
+import asyncio
+import argparse
+from datetime import date, datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+
+from http_pool import DEFAULT_TIMEOUT, make_session
+from http_cache import add_cache_arguments, caching_session
+from spirit_store import FORMATS, SQLiteStore, detect_format, append_records, iter_records, write_records
+from dedup_index import DedupIndex, add_dedup_arguments
 
 # 수입식품정보마루 (MFDS) API 설정
 API_URL = "https://impfood.mfds.go.kr/CFCCC01F01/getList"
@@ -31,163 +37,451 @@ IMPORTED_FOOD_CATEGORY_CODES = {
     '리큐르': 'C0314240000000000000',
 }
 
-def fetch_category_data(category_name: str, category_code: str):
+PAGE_LIMIT = 100
+DEFAULT_CONCURRENCY = 4
+
+
+def build_payload(category_code: str, start_date: str, end_date: str, page: int,
+                  limit: int = PAGE_LIMIT, total_count: int = 0) -> Dict[str, Any]:
+    """목록 조회 요청 payload (2페이지부터는 API 스펙에 따라 totalCnt를 함께 보냄)"""
+    payload = {
+        "page": page,
+        "limit": limit,
+        "dclPrductSeCd": "4",
+        "rpsntItmCd": category_code,
+        "srchStrtDt": start_date,
+        "srchEndDt": end_date,
+        "sortColumn": "",
+        "sortOrder": ""
+    }
+    if total_count > 0:
+        payload["totalCnt"] = total_count
+    return payload
+
+
+def map_row(row: Dict[str, Any], category_name: str) -> Optional[Dict[str, Any]]:
+    """API 응답 행 → 저장 스키마 (영문명이 없으면 None)"""
+    name_ko = row.get('prductNmko') or row.get('prductKoreanNm') or row.get('prductNm')
+    name_en = row.get('prductNmEn') or row.get('prductNm') or ''
+    if not name_en or name_en.strip() == '':
+        return None
+
+    distillery = row.get('makerNm') or row.get('ovsmnfstNm')
+    report_no = row.get('dclNo') or row.get('rcno') or 'unknown'
+    country = row.get('mnfNtnnm') or row.get('makerNationNm') or row.get('xportNtnnm')
+    date_created = row.get('procsDtm') or row.get('pcsDt')
+    importer = row.get('bsnOfcName') or row.get('bsshNm')
+
+    return {
+        "id": f"mfds-{report_no}",
+        "name": name_ko,
+        "name_en": name_en,
+        "distillery": distillery,
+        "bottler": None,
+        "abv": 0,
+        "volume": None,
+        "category": category_name,
+        "country": country,
+        "source": "imported_food_maru",
+        "externalId": report_no,
+        "isPublished": False,
+        "isReviewed": False,
+        "reviewedBy": None,
+        "reviewedAt": None,
+        "createdAt": date_created,
+        "updatedAt": datetime.now().isoformat(),
+
+        # New Schema: Tags at root
+        "nose_tags": [],
+        "palate_tags": [],
+        "finish_tags": [],
+        "tasting_note": "",
+
+        "metadata": {
+            "description_ko": None,
+            "description_en": None,
+            "pairing_guide_ko": None,
+            "pairing_guide_en": None,
+            "raw_category": row.get('itmNm') or row.get('rpsntItmNm'),
+            "importer": importer
+        }
+    }
+
+
+async def post_page(session, payload: Dict[str, Any], semaphore: asyncio.Semaphore,
+                    delay: Tuple[float, float]) -> Dict[str, Any]:
+    """
+    한 페이지 요청. 동기 Session 호출은 asyncio.to_thread로 실행하고,
+    semaphore로 전체 카테고리 합산 동시 요청 수를 제한합니다.
+    실제 요청 후에는 슬롯을 잡은 채 jitter 대기하여 서버 부하를 분산합니다 (캐시 재생이면 생략).
+    """
+    async with semaphore:
+        response = await asyncio.to_thread(session.post, API_URL, data=payload, headers=HEADERS,
+                                           timeout=DEFAULT_TIMEOUT)
+        if not getattr(response, 'from_cache', False) and delay[1] > 0:
+            await asyncio.sleep(random.uniform(*delay))
+    if response.status_code != 200:
+        raise RuntimeError(f"HTTP 에러 ({response.status_code})")
+    return response.json()
+
+
+async def fetch_category_async(category_name: str, category_code: str, session, semaphore: asyncio.Semaphore,
+                               part_path: str, start_date: str, end_date: str,
+                               delay: Tuple[float, float] = (2.0, 4.0), dedup: Optional[DedupIndex] = None,
+                               max_total: Optional[int] = None, label: Optional[str] = None) -> Dict[str, int]:
     """
     특정 주종 코드에 대해 MFDS 데이터를 수집합니다.
+    1페이지에서 totalCnt를 읽은 뒤 나머지 페이지를 동시에 요청하고, 도착한 페이지부터 part_path에 씁니다.
+    max_total을 넘는 totalCnt면 나머지 페이지를 받지 않고 oversized로 표시해 반환합니다 (백필 창 축소용).
     """
-    print(f"\n🚢 [{category_name}] 데이터 수집 시작 (코드: {category_code})")
-    
-    results = []
+    label = label or category_name
+    stats = {'total': 0, 'pages': 0, 'failed_pages': 0, 'saved': 0, 'skipped': 0, 'cross_duplicates': 0,
+             'oversized': False}
     seen_names = set()
-    skipped_count = 0
-    
-    page = 1
-    limit = 100
-    has_more = True
-    total_count = -1 # 초기값
-    
-    # 최근 1개월 데이터 수집 (신규 출시 제품만 대상)
-    today_dt = datetime.now()
-    start_date = (today_dt - timedelta(days=30)).strftime("%Y-%m-%d")
-    today = today_dt.strftime("%Y-%m-%d")
-    
-    print(f"📅 수집 범위: {start_date} ~ {today}")
-    
-    while has_more:
+
+    def consume(page: int, rows: List[Dict[str, Any]]):
+        items = []
+        for row in rows:
+            item = map_row(row, category_name)
+            if item is None:
+                continue
+            clean_name_en = item['name_en'].strip().lower()
+            if clean_name_en in seen_names:
+                stats['skipped'] += 1
+                continue
+            seen_names.add(clean_name_en)
+            # 식품안전나라/Firestore/다른 수입 카테고리에 이미 있는 제품 제외 (같은 id 재수집은 유지)
+            if dedup is not None and dedup.check_and_add(item):
+                stats['cross_duplicates'] += 1
+                continue
+            items.append(item)
+        if items:
+            stats['saved'] += append_records(part_path, items)
+        stats['pages'] += 1
+        print(f"  - [{label}] {page} 페이지 완료 ({stats['saved']}/{stats['total']} 저장 | 중복 제외: {stats['skipped']})")
+
+    try:
+        first = await post_page(session, build_payload(category_code, start_date, end_date, 1), semaphore, delay)
+    except Exception as e:
+        print(f"❌ [{label}] 처리 중 예외 발생: {str(e)}")
+        stats['failed_pages'] += 1
+        return stats
+
+    # 첫 페이지 응답에서 totalCnt 확정 → 나머지 페이지 수 계산
+    stats['total'] = int(first.get('totalCnt') or 0)
+    if stats['total'] == 0:
+        print(f"⚠️ [{label}] 데이터가 없습니다.")
+        return stats
+    if max_total is not None and stats['total'] > max_total:
+        stats['oversized'] = True
+        return stats
+    consume(1, first.get('list', []))
+
+    page_count = math.ceil(stats['total'] / PAGE_LIMIT)
+
+    async def fetch(page: int):
+        payload = build_payload(category_code, start_date, end_date, page, total_count=stats['total'])
         try:
-            # 페이징 파라미터 구성 (URL에 totalCnt 포함)
-            payload = {
-                "page": page,
-                "limit": limit,
-                "dclPrductSeCd": "4",
-                "rpsntItmCd": category_code,
-                "srchStrtDt": start_date,
-                "srchEndDt": today,
-                "sortColumn": "",
-                "sortOrder": ""
+            return page, await post_page(session, payload, semaphore, delay), None
+        except Exception as e:
+            return page, None, e
+
+    tasks = [asyncio.create_task(fetch(page)) for page in range(2, page_count + 1)]
+    for next_done in asyncio.as_completed(tasks):
+        page, data, error = await next_done
+        if error is not None:
+            stats['failed_pages'] += 1
+            print(f"❌ [{label}] {page} 페이지 실패: {error}")
+            continue
+        consume(page, data.get('list', []))
+    return stats
+
+
+async def fetch_all_categories(categories: Dict[str, str], session, data_dir: Path, start_date: str, end_date: str,
+                               concurrency: int, delay: Tuple[float, float], dedup: Optional[DedupIndex] = None
+                               ) -> Dict[str, Tuple[str, Dict[str, int]]]:
+    """모든 카테고리를 동시에 수집. {카테고리: (part 파일 경로, 통계)}"""
+    semaphore = asyncio.Semaphore(concurrency)
+    parts = {}
+    for category_name in categories:
+        part_path = data_dir / f".imported_{category_name.replace(' ', '_')}.part.jsonl"
+        if part_path.exists():
+            part_path.unlink()
+        parts[category_name] = str(part_path)
+
+    print(f"\n🚢 {len(categories)}개 카테고리 동시 수집 (동시 요청 {concurrency}건)")
+    results = await asyncio.gather(*[
+        fetch_category_async(name, code, session, semaphore, parts[name], start_date, end_date, delay, dedup)
+        for name, code in categories.items()
+    ])
+    return {name: (parts[name], stats) for name, stats in zip(categories, results)}
+
+
+# ==================== Historical Backfill ====================
+
+DEFAULT_BACKFILL_STATE = 'data/imported_backfill_state.json'
+DEFAULT_BACKFILL_OUTPUT = 'data/raw_imported/imported_backfill.sqlite'
+WINDOW_DAYS = {'day': 1, 'week': 7}
+DEFAULT_MAX_WINDOW_TOTAL = 2000
+
+
+def date_windows(start: date, end: date, days: int) -> List[Tuple[date, date]]:
+    """[start, end] 기간을 days일 단위 창(양 끝 포함)으로 분할"""
+    windows = []
+    current = start
+    while current <= end:
+        window_end = min(current + timedelta(days=days - 1), end)
+        windows.append((current, window_end))
+        current = window_end + timedelta(days=1)
+    return windows
+
+
+def split_window(start: date, end: date, parts: int = 2) -> List[Tuple[date, date]]:
+    """창을 parts개(최소 하루 단위)로 나눔 (하루짜리 창은 더 나눌 수 없음)"""
+    days = (end - start).days + 1
+    parts = max(1, min(parts, days))
+    return date_windows(start, end, math.ceil(days / parts))
+
+
+def window_key(start: date, end: date) -> str:
+    return f"{start.isoformat()}~{end.isoformat()}"
+
+
+def load_backfill_state(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"⚠️ 백필 상태 파일을 읽을 수 없어 처음부터 시작합니다: {e}")
+        return {}
+
+
+def save_backfill_state(path: str, state: Dict[str, Any]):
+    """상태 파일 원자적 저장 (중단 시점과 무관하게 항상 완전한 JSON 유지)"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+async def backfill(categories: Dict[str, str], session, output_path: str, windows: List[Tuple[date, date]],
+                   state: Dict[str, Any], state_path: str, concurrency: int, delay: Tuple[float, float],
+                   max_total: int = DEFAULT_MAX_WINDOW_TOTAL, dedup: Optional[DedupIndex] = None) -> Dict[str, int]:
+    """
+    카테고리 × 날짜 창 단위 백필.
+    - 완료(done)된 창은 건너뛰고, 창이 끝날 때마다 상태를 저장하므로 중단 후 재실행하면 이어서 수집
+    - totalCnt가 max_total을 넘는 창은 절반으로 나눠 다시 큐에 넣음 (split 상태로 기록)
+    - 출력은 SQLite 저장소에 id 기준 upsert → 겹치는 창/재수집 항목은 저장소에서 중복 제거
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    queue: asyncio.Queue = asyncio.Queue()
+    totals = {'windows': 0, 'skipped_windows': 0, 'splits': 0, 'failed_windows': 0, 'saved': 0}
+
+    for category_name in categories:
+        for start, end in windows:
+            queue.put_nowait((category_name, start, end))
+
+    async def process(category_name: str, start: date, end: date):
+        category_state = state.setdefault(category_name, {})
+        key = window_key(start, end)
+        entry = category_state.get(key, {})
+
+        if entry.get('status') == 'done':
+            totals['skipped_windows'] += 1
+            return
+        if entry.get('status') == 'split':
+            for child in entry['windows']:
+                child_start, child_end = child.split('~')
+                queue.put_nowait((category_name, date.fromisoformat(child_start), date.fromisoformat(child_end)))
+            return
+
+        # 하루짜리 창은 더 나눌 수 없으므로 크기와 무관하게 전체 페이지 수집
+        splittable = start < end
+        stats = await fetch_category_async(
+            category_name, categories[category_name], session, semaphore, output_path,
+            start.isoformat(), end.isoformat(), delay, dedup,
+            max_total=max_total if splittable else None, label=f"{category_name} {key}"
+        )
+        if stats['oversized']:
+            totals['splits'] += 1
+            # totalCnt 비율만큼 한 번에 축소 (추정이 빗나가면 하위 창에서 다시 축소)
+            children = split_window(start, end, math.ceil(stats['total'] / max_total))
+            print(f"✂️ [{category_name} {key}] totalCnt {stats['total']:,} > {max_total:,} → "
+                  f"{', '.join(window_key(*child) for child in children)}")
+            category_state[key] = {'status': 'split', 'total': stats['total'],
+                                   'windows': [window_key(*child) for child in children]}
+            for child in children:
+                queue.put_nowait((category_name, *child))
+        else:
+            totals['windows'] += 1
+            totals['saved'] += stats['saved']
+            failed = stats['failed_pages'] > 0
+            if failed:
+                totals['failed_windows'] += 1
+            category_state[key] = {
+                'status': 'partial' if failed else 'done',
+                'total': stats['total'],
+                'saved': stats['saved'],
+                'failed_pages': stats['failed_pages'],
+                'fetched_at': datetime.now().isoformat(),
             }
-            
-            # 2페이지부터는 API 스펙에 따라 totalCnt를 명시적으로 요청에 포함할 수 있음
-            if total_count > 0:
-                payload["totalCnt"] = total_count
-
-            response = requests.post(API_URL, data=payload, headers=HEADERS)
-            
-            if response.status_code != 200:
-                print(f"❌ HTTP 에러 ({response.status_code}): {category_name}")
-                break
-
-            data = response.json()
-            rows = data.get('list', [])
-            
-            # 첫 페이지 응답에서 totalCnt 확정
-            if total_count == -1:
-                total_count = int(data.get('totalCnt') or 0)
-                if total_count == 0:
-                    print("⚠️ 데이터가 없습니다.")
-                    break
-
-            # 데이터 매핑
-            for row in rows:
-                name_ko = row.get('prductNmko') or row.get('prductKoreanNm') or row.get('prductNm')
-                name_en = row.get('prductNmEn') or row.get('prductNm') or ''
-                
-                # 중복 및 유효성 검사
-                if not name_en or name_en.strip() == '':
-                    continue
-
-                clean_name_en = name_en.strip().lower()
-                if clean_name_en in seen_names:
-                    skipped_count += 1
-                    continue
-                
-                seen_names.add(clean_name_en)
-
-                distillery = row.get('makerNm') or row.get('ovsmnfstNm')
-                report_no = row.get('dclNo') or row.get('rcno') or 'unknown'
-                country = row.get('mnfNtnnm') or row.get('makerNationNm') or row.get('xportNtnnm')
-                date_created = row.get('procsDtm') or row.get('pcsDt')
-                importer = row.get('bsnOfcName') or row.get('bsshNm')
-                
-                results.append({
-                    "id": f"mfds-{report_no}",
-                    "name": name_ko,
-                    "name_en": name_en,
-                    "distillery": distillery,
-                    "bottler": None,
-                    "abv": 0,
-                    "volume": None,
-                    "category": category_name,
-                    "country": country,
-                    "source": "imported_food_maru",
-                    "externalId": report_no,
-                    "isPublished": False,
-                    "isReviewed": False,
-                    "reviewedBy": None,
-                    "reviewedAt": None,
-                    "createdAt": date_created,
-                    "updatedAt": datetime.now().isoformat(),
-
-                    # New Schema: Tags at root
-                    "nose_tags": [],
-                    "palate_tags": [],
-                    "finish_tags": [],
-                    "tasting_note": "",
-
-                    "metadata": {
-                        "description_ko": None,
-                        "description_en": None,
-                        "pairing_guide_ko": None,
-                        "pairing_guide_en": None,
-                        "raw_category": row.get('itmNm') or row.get('rpsntItmNm'),
-                        "importer": importer
-                    }
-                })
-            
-            print(f"  - {page} 페이지 완료 ({len(results)}/{total_count} 수집됨 | 중복 제외: {skipped_count})")
-
-            # 종료 조건: 모든 데이터를 가져왔거나 더 이상 데이터가 없는 경우
-            if len(results) >= total_count or not rows or len(rows) < limit:
-                has_more = False
-            else:
-                page += 1
-                time.sleep(random.uniform(2, 4))
+        save_backfill_state(state_path, state)
 
-        except Exception as e:
-            print(f"❌ [{category_name}] 처리 중 예외 발생: {str(e)}")
-            break
+    async def worker():
+        while True:
+            window = await queue.get()
+            try:
+                await process(*window)
+            except Exception as e:
+                totals['failed_windows'] += 1
+                print(f"❌ [{window[0]} {window_key(*window[1:])}] 창 처리 실패: {e}")
+            finally:
+                queue.task_done()
+
+    # 분할된 창은 큐에 다시 들어가므로, 큐가 완전히 비워질 때까지(join) 워커 유지
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    await queue.join()
+    for task in workers:
+        task.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+    return totals
+
+
+def run_backfill(args, session, dedup: Optional[DedupIndex] = None):
+    """--backfill-from 모드 실행 및 요약 출력"""
+    start = datetime.strptime(args.backfill_from, "%Y-%m-%d").date()
+    end_text = args.backfill_to or args.end_date
+    end = datetime.strptime(end_text, "%Y-%m-%d").date() if end_text else date.today()
+    windows = date_windows(start, end, WINDOW_DAYS[args.window])
+    state = load_backfill_state(args.backfill_state)
+    start_time = datetime.now()
+
+    print("🚀 수입식품정보마루 과거 데이터 백필")
+    print(f"📅 백필 범위: {start} ~ {end} ({args.window} 창 {len(windows):,}개 × {len(IMPORTED_FOOD_CATEGORY_CODES)}개 카테고리)")
+    print(f"   상태 파일: {args.backfill_state} / 저장소: {args.backfill_output}")
+    if args.cache != 'off':
+        print(f"HTTP 캐시: {args.cache} ({args.cache_path}, TTL {args.cache_ttl_hours:g}시간)")
+
+    totals = asyncio.run(backfill(
+        IMPORTED_FOOD_CATEGORY_CODES, session, args.backfill_output, windows, state, args.backfill_state,
+        max(1, args.concurrency), (args.min_delay, args.max_delay), args.max_window_total, dedup
+    ))
+    with SQLiteStore(args.backfill_output) as store:
+        stored = store.count()
+
+    print("\n" + "="*50)
+    print(" 📊 [SUMMARY] Import Food Backfill")
+    print("-" * 50)
+    print(f"  • Windows Fetched     : {totals['windows']:,} (resumed/skipped {totals['skipped_windows']:,}, split {totals['splits']:,})")
+    print(f"  • Items Upserted      : {totals['saved']:,}")
+    print(f"  • Items In Store      : {stored:,} ({args.backfill_output})")
+    print(f"  • Time Elapsed        : {datetime.now() - start_time}")
+    if totals['failed_windows']:
+        print(f"  • Partial Windows     : {totals['failed_windows']} (다시 실행하면 재시도)")
+    if args.cache != 'off':
+        cache_stats = session.summary()
+        print(f"  • HTTP Cache          : {cache_stats['replayed']} replayed / {cache_stats['fetched']} fetched ({args.cache})")
+    print("=" * 50 + "\n")
 
-    return results
 
 def main():
+    parser = argparse.ArgumentParser(description='수입식품정보마루 주류 데이터 수집')
+    parser.add_argument('--end-date', help='수집 범위 종료일 YYYY-MM-DD (default: 오늘, 캐시 재생 시 고정)')
+    parser.add_argument('--days', type=int, default=30, help='종료일 기준 수집 기간(일) (default: 30)')
+    parser.add_argument('--format', choices=FORMATS, default='json',
+                        help='저장 형식: json (기존 배열) | jsonl | jsonl.zst | sqlite (default: json)')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'전체 카테고리 합산 동시 페이지 요청 수 (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--min-delay', type=float, default=2.0, help='요청 후 최소 대기(초) (default: 2)')
+    parser.add_argument('--max-delay', type=float, default=4.0, help='요청 후 최대 대기(초) (default: 4)')
+    backfill_group = parser.add_argument_group('backfill', '과거 기간을 날짜 창 단위로 나눠 수집 (재실행 시 이어서 진행)')
+    backfill_group.add_argument('--backfill-from', help='백필 시작일 YYYY-MM-DD (지정하면 백필 모드)')
+    backfill_group.add_argument('--backfill-to', help='백필 종료일 YYYY-MM-DD (default: --end-date 또는 오늘)')
+    backfill_group.add_argument('--window', choices=list(WINDOW_DAYS), default='week', help='초기 창 크기 (default: week)')
+    backfill_group.add_argument('--max-window-total', type=int, default=DEFAULT_MAX_WINDOW_TOTAL,
+                                help=f'창의 totalCnt가 이보다 크면 창을 절반으로 축소 (default: {DEFAULT_MAX_WINDOW_TOTAL})')
+    backfill_group.add_argument('--backfill-state', default=DEFAULT_BACKFILL_STATE,
+                                help=f'창별 진행 상태 파일 (default: {DEFAULT_BACKFILL_STATE})')
+    backfill_group.add_argument('--backfill-output', default=DEFAULT_BACKFILL_OUTPUT,
+                                help=f'백필 결과 저장소 (.sqlite 권장, id 기준 중복 제거) (default: {DEFAULT_BACKFILL_OUTPUT})')
+    add_cache_arguments(parser)
+    add_dedup_arguments(parser)
+    args = parser.parse_args()
+    if args.backfill_from and detect_format(args.backfill_output) != 'sqlite':
+        parser.error('--backfill-output must be a .sqlite store (overlapping windows are deduped by id upsert)')
+
+    # 최근 N일 데이터 수집 (신규 출시 제품만 대상)
+    end_dt = datetime.strptime(args.end_date, "%Y-%m-%d") if args.end_date else datetime.now()
+    start_date = (end_dt - timedelta(days=args.days)).strftime("%Y-%m-%d")
+    end_date = end_dt.strftime("%Y-%m-%d")
+
+    session = caching_session(make_session(pool_size=max(4, args.concurrency)), args)
+    dedup = None if args.no_dedup else DedupIndex(args.dedup_index)
+    if args.backfill_from:
+        run_backfill(args, session, dedup)
+        session.close()
+        if dedup is not None:
+            dedup.close()
+        return
+
     start_time = datetime.now()
     data_dir = Path('data/raw_imported')
     data_dir.mkdir(parents=True, exist_ok=True)
     
     total_total_count = 0
-    print("🚀 수입식품정보마루 데이터 수집 (안정화된 페이지네이션 버전)")
+    print("🚀 수입식품정보마루 데이터 수집 (totalCnt 기반 비동기 페이지네이션)")
+    print(f"📅 수집 범위: {start_date} ~ {end_date}")
+    if args.cache != 'off':
+        print(f"HTTP 캐시: {args.cache} ({args.cache_path}, TTL {args.cache_ttl_hours:g}시간)")
+
+    results = asyncio.run(fetch_all_categories(
+        IMPORTED_FOOD_CATEGORY_CODES, session, data_dir, start_date, end_date,
+        max(1, args.concurrency), (args.min_delay, args.max_delay), dedup
+    ))
 
-    for category_name, category_code in IMPORTED_FOOD_CATEGORY_CODES.items():
-        category_data = fetch_category_data(category_name, category_code)
-        
-        if category_data:
+    failed_pages = 0
+    cross_duplicates = 0
+    failed_categories: List[str] = []
+    for category_name, (part_path, stats) in results.items():
+        failed_pages += stats['failed_pages']
+        cross_duplicates += stats['cross_duplicates']
+        if stats['failed_pages']:
+            # 중간 페이지가 빠진 결과로 기존 완전한 파일을 덮어쓰지 않음 (받은 부분은 part 파일로 남김)
+            failed_categories.append(category_name)
+            print(f"❌ [{category_name}] 페이지 {stats['failed_pages']}개 수집 실패 - 저장하지 않음 (수집분: {part_path})")
+            continue
+        if stats['saved']:
+            # part(JSONL)를 스트리밍으로 최종 형식에 원자적 저장 (전체 목록을 메모리에 올리지 않음)
             safe_name = category_name.replace(" ", "_")
-            file_path = data_dir / f"imported_{safe_name}.json"
-            
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(category_data, f, indent=2, ensure_ascii=False)
-            
-            total_total_count += len(category_data)
-            print(f"💾 '{file_path}' 저장 완료 ({len(category_data):,}건)")
+            file_path = data_dir / f"imported_{safe_name}.{args.format}"
+            count = write_records(str(file_path), iter_records(part_path))
+            total_total_count += count
+            print(f"💾 '{file_path}' 저장 완료 ({count:,}건)")
+        if os.path.exists(part_path):
+            os.remove(part_path)
 
+    cache_stats = session.summary()
+    session.close()
+    if dedup is not None:
+        dedup.close()
     duration = datetime.now() - start_time
     print("\n" + "="*50)
     print(" 📊 [SUMMARY] Import Food Data Fetch")
     print("-" * 50)
     print(f"  • Total Items Fetched : {total_total_count:,}")
-    print(f"  • Categories Saved    : {len(IMPORTED_FOOD_CATEGORY_CODES)}")
+    print(f"  • Categories Saved    : {len(IMPORTED_FOOD_CATEGORY_CODES) - len(failed_categories)}")
     print(f"  • Time Elapsed        : {duration}")
     print(f"  • Output Directory    : {data_dir}")
+    if failed_pages:
+        print(f"  • Failed Pages        : {failed_pages}")
+        print(f"  • Failed Categories   : {', '.join(failed_categories)} (기존 파일 유지, 다시 실행하세요)")
+    if args.cache != 'off':
+        print(f"  • HTTP Cache          : {cache_stats['replayed']} replayed / {cache_stats['fetched']} fetched ({args.cache})")
+    if dedup is not None:
+        print(f"  • Cross-source Dups   : {cross_duplicates:,} skipped")
     print("=" * 50 + "\n")
 
 if __name__ == "__main__":
@@ -1,38 +1,61 @@
 import os
 import json
 import time
+import argparse
 from pathlib import Path
-from typing import List, Dict, Any
-from google import genai
-from google.genai import types
+from typing import List, Dict, Any, Optional, Tuple
 from dotenv import load_dotenv
 
+from jsonl_journal import JsonlJournal
+from llm_backend import LLMBackend, create_backend
+from pipeline_utils import AdaptiveConcurrency, LatencyStats, TokenBucket, chunked_by_tokens, estimate_tokens, ordered_map
+from spirit_store import write_records
+
 # Load environment variables
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-if not GEMINI_API_KEY:
-    print("❌ .env 파일에 GEMINI_API_KEY가 설정되어 있지 않습니다.")
-    exit(1)
-
-# Initialize Gemini Client
-client = genai.Client(api_key=GEMINI_API_KEY)
 MODEL_ID = "gemini-2.0-flash"
 
+# LLM backend (lazy, LLM_BACKEND=gemini|stub|http://... selects the implementation)
+_llm: Optional[LLMBackend] = None
+
+def get_llm() -> LLMBackend:
+    global _llm
+    if _llm is None:
+        _llm = create_backend(model=MODEL_ID)
+    return _llm
+
+def set_llm(backend: LLMBackend):
+    global _llm
+    _llm = backend
+
 # File Paths
 DATA_FILE = Path('lib/db/ingested-data.json')
-BACKUP_FILE = Path('lib/db/ingested-data.backup.json')
 
-def enrich_reviews_batch(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+# Batch sizing (토큰 예산 기준)
+# 응답 1건(tasting_note 1~2문장 + description 2~3문장, 한국어)은 대략 200~250 토큰
+OUTPUT_TOKENS_PER_ITEM = 250
+DEFAULT_BATCH_TOKENS = 5000   # 배치당 입력+출력 예산 (gemini-2.0-flash 출력 한도 8192 아래로 여유)
+DEFAULT_MAX_BATCH_SIZE = 20
+ENRICHED_FIELDS = ('tasting_note', 'description')
+
+def journal_path_for(data_file: Path) -> Path:
+    """보완 결과 delta 저널 (데이터 파일 옆 <stem>.enrich.jsonl)"""
+    return data_file.with_name(data_file.stem + '.enrich.jsonl')
+
+def minimal_item(item: Dict[str, Any]) -> Dict[str, Any]:
     # Extract only ID and Name for the prompt to minimize tokens
-    minimal_batch = []
-    for item in batch:
-        minimal_batch.append({
-            "id": item['id'],
-            "name": item['name']
-        })
+    return {"id": item['id'], "name": item['name']}
+
+def item_token_cost(item: Dict[str, Any]) -> int:
+    """프롬프트에 들어가는 항목 JSON + 예상 응답 토큰"""
+    return estimate_tokens(json.dumps(minimal_item(item), ensure_ascii=False)) + OUTPUT_TOKENS_PER_ITEM
 
-    prompt = f"""
+def build_prompt(batch: List[Dict[str, Any]]) -> str:
+    minimal_batch = [minimal_item(item) for item in batch]
+
+    return f"""
     당신은 주류 전문 리뷰어이자 소믈리에입니다.
     아래 주류 목록({len(minimal_batch)}개)에 대해, 각 제품의 '최신/대표 리뷰'를 분석하여 핵심적인 테이스팅 노트와 매력적인 소개글을 작성해주세요.
 
@@ -55,65 +78,133 @@ def enrich_reviews_batch(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     ]
     """
 
+# 항목 목록이 빠진 프롬프트 템플릿 자체의 토큰 (배치 예산에서 먼저 차감)
+PROMPT_OVERHEAD_TOKENS = estimate_tokens(build_prompt([]))
+
+def request_enrichment(batch: List[Dict[str, Any]], limiter: Optional[TokenBucket] = None,
+                       controller: Optional[AdaptiveConcurrency] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    배치 하나를 Gemini에 요청하고 id → 결과 매핑을 반환 (실패 시 빈 dict).
+    워커 스레드에서 실행되므로 batch 항목은 읽기만 하고, 병합은 apply_enrichment에서 합니다.
+    """
+    prompt = build_prompt(batch)
+
+    def attempt_call() -> str:
+        if limiter:
+            limiter.acquire()
+        return get_llm().generate(prompt)
+
+    controller = controller or AdaptiveConcurrency()
     for attempt in range(3):
+        if attempt:
+            time.sleep(controller._backoff(attempt))
         try:
-            response = client.models.generate_content(
-                model=MODEL_ID,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    response_mime_type="application/json"
-                )
-            )
-            
-            content = response.text.strip()
-            # Remove potential markdown code blocks if present (though response_mime_type usually handles it)
-            if content.startswith("```json"):
-                content = content[7:]
-            if content.endswith("```"):
-                content = content[:-3]
-            content = content.strip()
+            # 429/5xx 재시도와 Retry-After 대기는 controller가 처리 (재시도도 limiter를 거침)
+            content = controller.call(attempt_call).strip()
+        except Exception as e:
+            # 재시도 불가 오류이거나 controller 재시도를 모두 소진 → 같은 프롬프트를 다시 보내지 않음
+            print(f"❌ API 호출 실패 ({str(e)[:200]}). 이번 배치는 건너뜁니다.")
+            return {}
+
+        # Remove potential markdown code blocks if present (though response_mime_type usually handles it)
+        if content.startswith("```json"):
+            content = content[7:]
+        if content.endswith("```"):
+            content = content[:-3]
+        content = content.strip()
 
+        try:
             enriched_results = json.loads(content)
+        except json.JSONDecodeError as e:
+            print(f"⚠️ 응답 JSON 파싱 실패 ({e}). 재시도... ({attempt + 1}/3)")
+            continue
+        if not isinstance(enriched_results, list):
+            print(f"⚠️ 응답이 JSON 배열이 아닙니다. 재시도... ({attempt + 1}/3)")
+            continue
+
+        return {res['id']: res for res in enriched_results if isinstance(res, dict) and res.get('id')}
+
+    print("❌ 3회 재시도 실패. 이번 배치는 건너뜁니다.")
+    return {}
+
+def apply_enrichment(batch: List[Dict[str, Any]], mapping: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Map results back to the original items (메인 스레드에서만 호출).
+    실제로 채운 필드만 {'id', 'tasting_note'?, 'description'?} 형태로 반환 (저널 레코드)
+    """
+    changes = []
+    for item in batch:
+        res = mapping.get(item['id'])
+        if res:
+            if 'metadata' not in item:
+                item['metadata'] = {}
             
-            # Map results back to the original items
-            mapping = {res['id']: res for res in enriched_results}
-            
-            updated_count = 0
-            for item in batch:
-                res = mapping.get(item['id'])
-                if res:
-                    if 'metadata' not in item:
-                        item['metadata'] = {}
-                    
-                    # Update metadata with new info if valid
-                    if res.get('tasting_note') and not item['metadata'].get('tasting_note'):
-                        item['metadata']['tasting_note'] = res['tasting_note']
-                    
-                    if res.get('description') and not item['metadata'].get('description'):
-                        item['metadata']['description'] = res['description']
-                    
-                    updated_count += 1
+            # Update metadata with new info if valid (이미 있는 값은 덮어쓰지 않음)
+            change = {}
+            for field in ENRICHED_FIELDS:
+                if res.get(field) and not item['metadata'].get(field):
+                    item['metadata'][field] = res[field]
+                    change[field] = res[field]
             
-            return batch, updated_count
+            if change:
+                changes.append({'id': item['id'], **change})
+    return changes
 
-        except Exception as e:
-            wait_time = (attempt + 1) * 5
-            print(f"⚠️ API 호출 실패 ({e}). {wait_time}초 후 재시도...")
-            time.sleep(wait_time)
-            
-    print("❌ 3회 재시도 실패. 이번 배치는 건너뜁니다.")
-    return batch, 0
+def replay_journal(journal_path: Path, all_spirits: List[Dict[str, Any]]) -> int:
+    """이전 실행이 compact 전에 중단됐으면 저널의 보완 결과를 다시 적용 (적용된 항목 수 반환)"""
+    mapping = {}
+    for entry in JsonlJournal.read(str(journal_path)):
+        if entry.get('id'):
+            mapping.setdefault(entry['id'], {}).update(entry)
+    if not mapping:
+        return 0
+    return len(apply_enrichment(all_spirits, mapping))
+
+def enrich_reviews_batch(batch: List[Dict[str, Any]], controller: Optional[AdaptiveConcurrency] = None,
+                         limiter: Optional[TokenBucket] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """배치 하나를 요청하고 바로 병합 (단일 스레드용)"""
+    return batch, len(apply_enrichment(batch, request_enrichment(batch, limiter, controller)))
+
+def compact(data_file: Path, journal_path: Path, all_spirits: List[Dict[str, Any]]):
+    """
+    보완 결과가 반영된 전체 데이터를 임시 파일 → os.replace로 저장한 뒤 저널 삭제.
+    write_records가 임시 파일과 디렉터리를 fsync한 뒤에 반환하므로, 저널은 새 내용이 디스크에 있을 때만 지워집니다.
+    """
+    write_records(str(data_file), all_spirits)
+    if journal_path.exists():
+        journal_path.unlink()
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Enrich tasting notes/descriptions with Gemini')
+    parser.add_argument('--data-file', default=str(DATA_FILE), help=f'Target JSON file (default: {DATA_FILE})')
+    parser.add_argument('--concurrency', type=int, default=1, help='Initial in-flight Gemini batches (default: 1)')
+    parser.add_argument('--max-concurrency', type=int, default=8, help='Ceiling for adaptive (AIMD) concurrency (default: 8)')
+    parser.add_argument('--rps', type=float, default=1.0, help='Max Gemini requests per second, 0 = unlimited (default: 1.0)')
+    parser.add_argument('--batch-tokens', type=int, default=DEFAULT_BATCH_TOKENS,
+                        help=f'Estimated prompt+response token budget per batch (default: {DEFAULT_BATCH_TOKENS})')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help=f'Max spirits per batch (default: {DEFAULT_MAX_BATCH_SIZE})')
+    parser.add_argument('--max-retries', type=int, default=5, help='Retries per Gemini call on 429/5xx (default: 5)')
+    parser.add_argument('--journal', help='Enrichment delta journal (default: <data-file stem>.enrich.jsonl next to it)')
+    args = parser.parse_args(argv)
 
-def main():
-    if not DATA_FILE.exists():
-        print(f"❌ 데이터 파일을 찾을 수 없습니다: {DATA_FILE}")
+    data_file = Path(args.data_file)
+    backup_file = data_file.with_name(data_file.stem + '.backup.json')
+    journal_path = Path(args.journal) if args.journal else journal_path_for(data_file)
+
+    if _llm is None and os.getenv('LLM_BACKEND', 'gemini') == 'gemini' and not GEMINI_API_KEY:
+        print("❌ .env 파일에 GEMINI_API_KEY가 설정되어 있지 않습니다.")
+        return
+
+    if not data_file.exists():
+        print(f"❌ 데이터 파일을 찾을 수 없습니다: {data_file}")
         return
 
-    print(f"🚀 Gemini 리뷰 데이터 보완 시작 (Target: {DATA_FILE})")
+    print(f"🚀 Gemini 리뷰 데이터 보완 시작 (Target: {data_file})")
     
     # Load Data
     try:
-        with open(DATA_FILE, 'r', encoding='utf-8') as f:
+        with open(data_file, 'r', encoding='utf-8') as f:
             all_spirits = json.load(f)
     except Exception as e:
         print(f"❌ 데이터 로드 실패: {e}")
@@ -123,6 +214,11 @@ def main():
         print("❌ 데이터 형식이 올바르지 않습니다 (Array expected).")
         return
 
+    # 이전 실행의 저널 재생 (compact 전에 중단된 경우) - 이미 보완된 id는 아래 필터에서 빠짐
+    replayed = replay_journal(journal_path, all_spirits)
+    if replayed:
+        print(f"♻️  저널에서 {replayed}개 항목의 보완 결과를 복원했습니다 ({journal_path})")
+
     # Filter items that need enrichment (missing tasting_note or description)
     # We prioritize items that are already ingested/valid
     targets = []
@@ -134,52 +230,68 @@ def main():
     print(f"📊 총 {len(all_spirits)}개 항목 중 보완이 필요한 항목: {len(targets)}개")
 
     if not targets:
+        if replayed:
+            compact(data_file, journal_path, all_spirits)
         print("✨ 모든 항목이 이미 보완되었습니다.")
         return
 
     # Backup functionality
-    if not BACKUP_FILE.exists():
-        with open(BACKUP_FILE, 'w', encoding='utf-8') as f:
+    if not backup_file.exists():
+        with open(backup_file, 'w', encoding='utf-8') as f:
             json.dump(all_spirits, f, indent=2, ensure_ascii=False)
         print("💾 원본 데이터 백업 완료.")
 
-    BATCH_SIZE = 10
+    # 배치는 토큰 예산(프롬프트 템플릿 제외)과 최대 개수 기준으로 묶음
+    item_budget = max(1, args.batch_tokens - PROMPT_OVERHEAD_TOKENS)
+    batches = list(chunked_by_tokens(targets, item_token_cost, item_budget, args.batch_size))
+    print(f"📦 {len(batches)}개 배치 (평균 {len(targets) / len(batches):.1f}개, 예산 {args.batch_tokens} 토큰)")
+
+    # 여러 배치를 동시에 요청 (실제 동시 실행 수는 controller가 AIMD로 조절, 초당 요청 수는 limiter가 제한)
+    limiter = TokenBucket(rate=args.rps) if args.rps > 0 else None
+    controller = AdaptiveConcurrency(initial=args.concurrency, max_limit=max(args.concurrency, args.max_concurrency),
+                                     max_retries=args.max_retries)
+    latency = LatencyStats()
     total_processed = 0
     total_updated = 0
+    # 진행 결과는 delta 저널에 append (대용량 JSON 전체 재작성은 마지막 compact 한 번만)
+    journal = JsonlJournal(str(journal_path))
 
-    try:
-        # Process in batches
-        for i in range(0, len(targets), BATCH_SIZE):
-            batch = targets[i : i + BATCH_SIZE]
-            print(f"📦 처리 중... ({i+1}/{len(targets)})")
+    def enrich_worker(batch: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        started = time.monotonic()
+        mapping = request_enrichment(batch, limiter, controller)
+        latency.record(time.monotonic() - started)
+        return mapping
 
-            _, updated = enrich_reviews_batch(batch)
-            total_updated += updated
+    try:
+        # 결과 병합과 저널 기록은 입력 순서대로 메인 스레드에서만 수행 (all_spirits를 여러 스레드가 건드리지 않음)
+        for batch, mapping in ordered_map(enrich_worker, batches, concurrency=controller.max_limit):
+            changes = apply_enrichment(batch, mapping)
+            for change in changes:
+                journal.append(change)
+            total_updated += len(changes)
             total_processed += len(batch)
-            
-            # Save progress periodically (files can be large, so maybe every 5 batches or just at end? 
-            # Given it's a single JSON file database, rewriting it constantly is risky/slow. 
-            # We will save every 50 items or at the end.)
-            if total_processed % 50 == 0:
-                print("💾 중간 저장 중...")
-                with open(DATA_FILE, 'w', encoding='utf-8') as f:
-                    json.dump(all_spirits, f, indent=2, ensure_ascii=False)
-            
-            time.sleep(1) # Gentle rate limiting
+            print(f"📦 처리 중... ({total_processed}/{len(targets)}, 동시 실행 {controller.limit})")
 
     except KeyboardInterrupt:
         print("\n🛑 사용자에 의해 중단되었습니다.")
     except Exception as e:
         print(f"\n❌ 예상치 못한 오류 발생: {e}")
     finally:
-        # Final Save
-        print("💾 최종 데이터 저장 중...")
-        with open(DATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump(all_spirits, f, indent=2, ensure_ascii=False)
+        # Final Save: 저널 내용을 기준 파일에 합쳐 원자적으로 교체 (실패하면 저널이 남아 다음 실행에서 재생)
+        journal.close()
+        if total_updated or replayed:
+            print("💾 최종 데이터 저장 중...")
+            compact(data_file, journal_path, all_spirits)
         
         print(f"\n✨ 작업 완료!")
         print(f"- 처리된 항목: {total_processed}")
         print(f"- 업데이트된 내용: {total_updated}건")
+        conc = controller.summary()
+        print(f"- API 제한(429): {conc['throttled']}회 (대기 {conc['paused_sec']}초), 서버 오류: {conc['server_errors']}회, 재시도: {conc['retries']}회")
+        print(f"- 동시 실행: 최종 {conc['limit']} / 최대 {conc['peak_limit']}, 배치 지연 p50 {latency.summary()['p50_ms']}ms")
+
+    return {'processed': total_processed, 'updated': total_updated, 'batches': len(batches),
+            'concurrency': controller.summary(), 'latency': latency.summary()}
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Firestore I/O Helpers
+=====================
+스크립트용 Firestore 읽기/쓰기 도구.
+
+- stream_documents: order_by(__name__) + start_after 커서로 페이지 단위 스트리밍 (필드 마스크 지원)
+- FirestoreWriteBuffer: update()를 모아 WriteBatch(최대 500건) 단위로 커밋하는 write-behind 버퍼.
+  크기 또는 시간 기준으로 flush하고, 실패한 청크는 백오프 재시도 후 절반씩 나누어 원인 문서를 격리합니다.
+  on_commit 콜백은 커밋이 실제로 성공한 문서 id 목록으로 호출됩니다 (체크포인트 기록용).
+
+FIRESTORE_EMULATOR_HOST가 설정되어 있으면 클라이언트 라이브러리가 에뮬레이터로 연결되므로
+동일한 코드로 에뮬레이터 테스트가 가능합니다.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+MAX_BATCH_SIZE = 500  # Firestore WriteBatch 한도
+DEFAULT_PAGE_SIZE = 300
+
+
+def stream_documents(query, page_size: int = DEFAULT_PAGE_SIZE, fields: Optional[List[str]] = None,
+                     limit: Optional[int] = None, order_by: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    query 결과를 페이지 단위로 가져와 문서 dict(id 포함)를 하나씩 yield 합니다.
+    한 번에 한 페이지만 메모리에 올리므로 컬렉션 크기와 무관하게 메모리 사용량이 일정합니다.
+    fields를 주면 select() 필드 마스크로 필요한 필드만 전송받습니다.
+    범위(inequality) 필터가 있는 쿼리는 해당 필드를 order_by 앞쪽에 지정해야 합니다 (__name__은 항상 마지막).
+    """
+    base = query.select(fields) if fields else query
+    for field in (order_by or []):
+        if field != '__name__':
+            base = base.order_by(field)
+    base = base.order_by('__name__')
+
+    last_doc = None
+    yielded = 0
+    while True:
+        size = page_size if limit is None else min(page_size, limit - yielded)
+        if size <= 0:
+            return
+
+        page = base.limit(size)
+        if last_doc is not None:
+            page = page.start_after(last_doc)
+
+        docs = list(page.stream())
+        for doc in docs:
+            data = doc.to_dict() or {}
+            data['id'] = doc.id
+            yield data
+
+        yielded += len(docs)
+        if len(docs) < size:
+            return
+        last_doc = docs[-1]
+
+
+def _is_transient(error: Exception) -> bool:
+    """재시도로 해결될 수 있는 오류인지 판단"""
+    try:
+        from google.api_core import exceptions as gexc
+    except ImportError:
+        return True
+    transient = (
+        gexc.ServiceUnavailable,
+        gexc.DeadlineExceeded,
+        gexc.TooManyRequests,
+        gexc.ResourceExhausted,
+        gexc.InternalServerError,
+        gexc.Aborted,
+    )
+    return isinstance(error, transient)
+
+
+class FirestoreWriteBuffer:
+    """문서 update를 모아서 배치 커밋하는 버퍼 (스레드 안전)"""
+
+    def __init__(self, db, collection: str, batch_size: int = MAX_BATCH_SIZE,
+                 flush_interval: float = 2.0, max_retries: int = 4, backoff_base: float = 0.5,
+                 on_commit: Optional[Callable[[List[str]], None]] = None):
+        self.db = db
+        self.collection = collection
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.on_commit = on_commit
+        self.stats = {'queued': 0, 'committed': 0, 'failed': 0, 'retried': 0, 'batches': 0}
+        self.failed_ids: List[str] = []
+
+        self._pending: List[Tuple[str, Dict[str, Any]]] = []
+        self._oldest: Optional[float] = None
+        self._lock = threading.Lock()
+        self._commit_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._timer = threading.Thread(target=self._flush_loop, daemon=True)
+        self._timer.start()
+
+    def update(self, doc_id: str, data: Dict[str, Any]):
+        """update 작업을 버퍼에 추가 (batch_size에 도달하면 즉시 커밋)"""
+        with self._lock:
+            self._pending.append((doc_id, data))
+            self.stats['queued'] += 1
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            ready = len(self._pending) >= self.batch_size
+        if ready:
+            self.flush()
+
+    def flush(self):
+        """현재 버퍼를 batch_size 단위로 커밋"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._oldest = None
+        for start in range(0, len(pending), self.batch_size):
+            self._commit_chunk(pending[start:start + self.batch_size])
+
+    def _flush_loop(self):
+        """flush_interval이 지난 대기 작업을 주기적으로 커밋"""
+        while not self._closed.wait(min(self.flush_interval, 0.5)):
+            with self._lock:
+                due = self._oldest is not None and time.monotonic() - self._oldest >= self.flush_interval
+            if due:
+                self.flush()
+
+    def _commit_chunk(self, chunk: List[Tuple[str, Dict[str, Any]]]):
+        if not chunk:
+            return
+        with self._commit_lock:
+            self._commit_with_retry(chunk)
+
+    def _commit_with_retry(self, chunk: List[Tuple[str, Dict[str, Any]]]):
+        collection = self.db.collection(self.collection)
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                batch = self.db.batch()
+                for doc_id, data in chunk:
+                    batch.update(collection.document(doc_id), data)
+                batch.commit()
+                self.stats['committed'] += len(chunk)
+                self.stats['batches'] += 1
+                if self.on_commit:
+                    self.on_commit([doc_id for doc_id, _ in chunk])
+                return
+            except Exception as e:
+                last_error = e
+                if not _is_transient(e) or attempt == self.max_retries:
+                    break
+                self.stats['retried'] += len(chunk)
+                wait = self.backoff_base * (2 ** attempt)
+                print(f"  ⚠️  Batch commit failed ({str(e)[:100]}), retrying {len(chunk)} writes in {wait:.1f}s")
+                time.sleep(wait)
+
+        # 배치는 원자적이므로, 특정 문서 때문에 실패한 경우 절반씩 나누어 원인 문서를 격리
+        if len(chunk) > 1 and not _is_transient(last_error):
+            mid = len(chunk) // 2
+            self._commit_with_retry(chunk[:mid])
+            self._commit_with_retry(chunk[mid:])
+            return
+
+        self.stats['failed'] += len(chunk)
+        self.failed_ids.extend(doc_id for doc_id, _ in chunk)
+        print(f"  ❌ Update Error for {len(chunk)} document(s) ({chunk[0][0]}...): {last_error}")
+
+    def close(self):
+        """남은 작업을 모두 커밋하고 타이머 종료"""
+        self._closed.set()
+        self._timer.join(timeout=5)
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def summary(self) -> Dict[str, Any]:
+        return dict(self.stats, failed_ids=list(self.failed_ids))
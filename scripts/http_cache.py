@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP Response Cache
+===================
+공공 API 수집 스크립트(fetch_food_safety.py, fetch_imported_food.py)용 디스크 응답 캐시.
+SQLiteCache(TTL + 최대 크기 LRU) 위에서 (method, URL, payload) 단위로 200 응답 본문을 저장합니다.
+API가 200 본문 안에 에러를 담아 보내는 경우를 위해 cacheable(response) 판정 함수를 넘길 수 있습니다.
+
+모드:
+- off:     캐시 사용 안 함 (기본값)
+- use:     유효한 캐시가 있으면 재사용, 없으면 요청 후 저장
+- refresh: 항상 요청하고 결과로 캐시 갱신
+- offline: 네트워크 없이 캐시만 재생 (TTL 무시, 없으면 OfflineCacheMiss)
+
+매핑 로직(mapped_item 생성, 제외 키워드, 중복 제거)을 API 호출 없이 로컬 디스크 속도로 반복 실행할 때 사용합니다.
+"""
+
+import json
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from sqlite_cache import SQLiteCache, make_key
+
+CACHE_MODES = ('off', 'use', 'refresh', 'offline')
+DEFAULT_HTTP_CACHE_PATH = 'data/cache/http_cache.sqlite'
+DEFAULT_TTL_HOURS = 24.0
+
+
+class OfflineCacheMiss(Exception):
+    """offline 모드에서 캐시에 없는 요청"""
+
+
+class CachedResponse:
+    """캐시에서 재생한 응답 (requests.Response에서 스크립트가 쓰는 부분만 제공)"""
+
+    from_cache = True
+
+    def __init__(self, status_code: int, text: str, headers: Optional[Dict[str, str]] = None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+
+class CachingSession:
+    """
+    requests.Session 래퍼. get()/post()가 캐시를 먼저 확인하고, cacheable(response)를 통과한 200 응답만 저장합니다.
+    요청별로 refresh=True를 주면 (offline 모드가 아닌 한) 캐시를 읽지 않고 새로 요청합니다.
+    스레드 간 공유 가능 (SQLiteCache와 Session 모두 스레드 안전하게 사용).
+    """
+
+    def __init__(self, session, mode: str = 'use', path: str = DEFAULT_HTTP_CACHE_PATH,
+                 ttl_hours: float = DEFAULT_TTL_HOURS, max_mb: int = 512,
+                 cacheable: Optional[Callable[[Any], bool]] = None):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode: {mode}")
+        self.session = session
+        self.mode = mode
+        self.ttl = ttl_hours * 3600 if ttl_hours else None
+        self.cacheable = cacheable
+        self.cache = SQLiteCache(path, max_bytes=max_mb * 1024 * 1024) if mode != 'off' else None
+        self.stats = {'requests': 0, 'replayed': 0, 'fetched': 0, 'stored': 0, 'uncacheable': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def get(self, url: str, params: Optional[Dict] = None, **kwargs):
+        return self.request('GET', url, params=params, **kwargs)
+
+    def post(self, url: str, data: Optional[Dict] = None, **kwargs):
+        return self.request('POST', url, data=data, **kwargs)
+
+    def request(self, method: str, url: str, params: Optional[Dict] = None, data: Optional[Dict] = None,
+                refresh: bool = False, **kwargs):
+        self._count('requests')
+        if not self.cache:
+            self._count('fetched')
+            return self.session.request(method, url, params=params, data=data, **kwargs)
+
+        key = make_key(method.upper(), url, params, data)
+        if self.mode == 'offline' or (self.mode == 'use' and not refresh):
+            cached = self.cache.get(key, allow_expired=self.mode == 'offline')
+            if cached is not None:
+                self._count('replayed')
+                return CachedResponse(cached['status'], cached['text'], cached.get('headers'))
+            if self.mode == 'offline':
+                raise OfflineCacheMiss(f"{method.upper()} {url.split('?')[0]} is not in the HTTP cache")
+
+        response = self.session.request(method, url, params=params, data=data, **kwargs)
+        self._count('fetched')
+        if response.status_code == 200 and self.cacheable and not self.cacheable(response):
+            self._count('uncacheable')
+        elif response.status_code == 200:
+            content_type = response.headers.get('Content-Type', '')
+            self.cache.put(key, {'status': 200, 'text': response.text, 'headers': {'Content-Type': content_type}},
+                           ttl=self.ttl)
+            self._count('stored')
+        return response
+
+    def close(self):
+        if self.cache:
+            self.cache.close()
+        self.session.close()
+
+    def summary(self) -> Dict[str, Any]:
+        stats = dict(self.stats, mode=self.mode)
+        if self.cache:
+            cache_stats = self.cache.summary()
+            stats.update(entries=cache_stats['entries'], bytes=cache_stats['bytes'], evictions=cache_stats['evictions'])
+        return stats
+
+
+def add_cache_arguments(parser, default_ttl_hours: float = DEFAULT_TTL_HOURS):
+    """수집 스크립트 공통 캐시 옵션"""
+    parser.add_argument('--cache', choices=CACHE_MODES, default='off',
+                        help='HTTP response cache: off | use | refresh | offline (replay only) (default: off)')
+    parser.add_argument('--cache-path', default=DEFAULT_HTTP_CACHE_PATH,
+                        help=f'HTTP cache database path (default: {DEFAULT_HTTP_CACHE_PATH})')
+    parser.add_argument('--cache-ttl-hours', type=float, default=default_ttl_hours,
+                        help=f'Cached response lifetime in hours (default: {default_ttl_hours:g})')
+    parser.add_argument('--cache-max-mb', type=int, default=512, help='HTTP cache size limit in MB (default: 512)')
+
+
+def caching_session(session, args, cacheable: Optional[Callable[[Any], bool]] = None) -> CachingSession:
+    return CachingSession(session, mode=args.cache, path=args.cache_path,
+                          ttl_hours=args.cache_ttl_hours, max_mb=args.cache_max_mb, cacheable=cacheable)
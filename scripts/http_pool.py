@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP Connection Pool
+====================
+공공 API 수집 스크립트(fetch_food_safety.py 등)가 공유하는 HTTP 도구.
+
+- make_session: 커넥션 풀 크기와 429/5xx 자동 재시도(지수 백오프, Retry-After 준수)를 설정한 requests.Session
+- HostLimiter: 호스트별 동시 요청 수 제한 (스레드가 많아도 한 서버에 몰리지 않도록)
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_TIMEOUT = 30  # seconds
+
+
+def make_session(pool_size: int = 16, retries: int = 3, backoff_factor: float = 1.0) -> requests.Session:
+    """스레드 간 공유 가능한 pooled Session 생성 (keep-alive로 TCP/TLS 핸드셰이크 재사용)"""
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=None,  # 공공 API는 POST 조회도 멱등
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class HostLimiter:
+    """호스트별 세마포어로 동시 요청 수를 제한"""
+
+    def __init__(self, per_host: int = 4):
+        self.per_host = max(1, per_host)
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self._semaphores[host]
+
+    @contextmanager
+    def slot(self, url: str) -> Iterator[None]:
+        semaphore = self._semaphore(url)
+        with semaphore:
+            yield
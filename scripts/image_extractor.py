@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Image Extractor
+===============
+구글 이미지 검색 결과 HTML에서 술병 이미지 후보 URL을 뽑는 모듈 (fetch_images_advanced.py).
+
+- 미리 컴파일한 패턴을 finditer로 훑으며, 필터(세로 비율, 도메인 제외)를 통과한 첫 후보에서 바로 멈춤
+- img 태그 fallback은 전체 soup 대신 스트리밍 파서(lxml HTMLPullParser, 없으면 표준 html.parser)로
+  필요한 만큼만 읽음
+- 후보 우선순위는 기존 fetch_image_url과 동일: JSON 원본 → 정적 img 태그 → encrypted-tbn 썸네일
+
+Usage:
+    python scripts/image_extractor.py bench data/html_fixtures/*.html [--repeat 20]
+"""
+
+import argparse
+import glob
+import re
+import statistics
+import time
+import tracemalloc
+from html.parser import HTMLParser
+from typing import Iterator, List, NamedTuple, Optional
+
+DENIED_SUBSTRINGS = ('gstatic.com', 'google')
+# Google JSON 구조: ["URL", height, width]
+# 제외 도메인은 정규식 엔진 안에서 걸러 Python 쪽 반복 횟수를 줄임
+ALLOWED_JSON_IMAGE_RE = re.compile(
+    r'\["(https?://(?![^"\s]*(?:gstatic\.com|google))[^"\s]+\.(?:jpg|jpeg|png|webp))",(\d+),(\d+)\]')
+THUMBNAIL_JSON_IMAGE_RE = re.compile(
+    r'\["(https?://[^"\s]*encrypted-tbn[^"\s]*\.(?:jpg|jpeg|png|webp))",(\d+),(\d+)\]')
+IMG_SRC_ATTRIBUTES = ('src', 'data-src', 'data-deferred-src')
+FEED_CHUNK = 64 * 1024
+
+
+class Candidate(NamedTuple):
+    url: str
+    width: Optional[int]
+    height: Optional[int]
+    kind: str  # 'json' | 'img' | 'thumbnail'
+
+
+def is_denied(url: str) -> bool:
+    return any(marker in url for marker in DENIED_SUBSTRINGS)
+
+
+class _StopParsing(Exception):
+    pass
+
+
+class _ImgSrcParser(HTMLParser):
+    """표준 라이브러리 스트리밍 파서 (lxml이 없을 때). 첫 적합 src에서 중단"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.found: Optional[str] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag != 'img':
+            return
+        attributes = dict(attrs)
+        src = next((attributes[name] for name in IMG_SRC_ATTRIBUTES if attributes.get(name)), None)
+        if src and src.startswith('http') and not is_denied(src):
+            self.found = src
+            raise _StopParsing()
+
+
+def _first_img_src_lxml(html: str, etree) -> Optional[str]:
+    parser = etree.HTMLPullParser(events=('start',), tag='img')
+    for offset in range(0, len(html), FEED_CHUNK):
+        parser.feed(html[offset:offset + FEED_CHUNK])
+        for _, element in parser.read_events():
+            src = next((element.get(name) for name in IMG_SRC_ATTRIBUTES if element.get(name)), None)
+            if src and src.startswith('http') and not is_denied(src):
+                return src
+    return None
+
+
+def first_img_src(html: str) -> Optional[str]:
+    """정적 img 태그에서 첫 적합 src (비율 정보가 없으므로 도메인 필터만 적용)"""
+    try:
+        from lxml import etree
+    except ImportError:
+        etree = None
+    if etree is not None:
+        return _first_img_src_lxml(html, etree)
+
+    parser = _ImgSrcParser()
+    try:
+        for offset in range(0, len(html), FEED_CHUNK):
+            parser.feed(html[offset:offset + FEED_CHUNK])
+        parser.close()
+    except _StopParsing:
+        pass
+    return parser.found
+
+
+def iter_candidates(html: str) -> Iterator[Candidate]:
+    """우선순위 순으로 후보를 지연 생성 (필요한 만큼만 꺼내면 그 이후는 파싱하지 않음)"""
+    for match in ALLOWED_JSON_IMAGE_RE.finditer(html):
+        url = match.group(1)
+        height, width = int(match.group(2)), int(match.group(3))
+        # 필터 1: 가로가 세로보다 긴(Landscape) 이미지는 술병 사진으로 부적합하므로 제외
+        # 필터 2: 길이 검사 (도메인 제외는 패턴에서 처리)
+        if width <= height and len(url) > 20:
+            yield Candidate(url, width, height, 'json')
+
+    src = first_img_src(html)
+    if src:
+        yield Candidate(src, None, None, 'img')
+
+    # gstatic 썸네일이라도 매칭 (세로 비율인 것만)
+    for match in THUMBNAIL_JSON_IMAGE_RE.finditer(html):
+        height, width = int(match.group(2)), int(match.group(3))
+        if width <= height:
+            yield Candidate(match.group(1), width, height, 'thumbnail')
+
+
+def extract_image_url(html: str) -> Optional[str]:
+    """첫 번째 후보 URL (없으면 None)"""
+    return next((candidate.url for candidate in iter_candidates(html)), None)
+
+
+def extract_legacy(html: str) -> Optional[str]:
+    """기존 fetch_image_url 추출 로직 (re.findall 전체 스캔 + BeautifulSoup) - 벤치마크 비교용"""
+    from bs4 import BeautifulSoup
+
+    patterns = re.findall(r'\[\"(https?://[^\"\s]+\.(?:jpg|jpeg|png|webp))\",(\d+),(\d+)\]', html)
+    for img_url, h, w in patterns:
+        if int(w) > int(h):
+            continue
+        if 'gstatic.com' not in img_url and 'google' not in img_url and len(img_url) > 20:
+            return img_url
+    soup = BeautifulSoup(html, 'html.parser')
+    for img in soup.find_all('img'):
+        src = img.get('src') or img.get('data-src') or img.get('data-deferred-src')
+        if src and src.startswith('http') and 'gstatic.com' not in src and 'google' not in src:
+            return src
+    for img_url, h, w in patterns:
+        if 'encrypted-tbn' in img_url and int(w) <= int(h):
+            return img_url
+    return None
+
+
+def _measure(func, html: str, repeat: int):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(html)
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    func(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, statistics.median(timings), peak
+
+
+def bench(paths: List[str], repeat: int = 20):
+    try:
+        import bs4  # noqa: F401
+        extractors = [('legacy', extract_legacy), ('streaming', extract_image_url)]
+    except ImportError:
+        print("⚠️ beautifulsoup4가 없어 기존 방식 비교는 생략합니다.")
+        extractors = [('streaming', extract_image_url)]
+
+    print(f"{'fixture':<32} {'KB':>7} " + ' '.join(f"{name + ' ms':>13} {name + ' MB':>13}" for name, _ in extractors)
+          + "  same")
+    for path in paths:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            html = f.read()
+        row = [f"{path[-32:]:<32} {len(html) / 1024:>7.0f}"]
+        results = []
+        for _, func in extractors:
+            result, median, peak = _measure(func, html, repeat)
+            results.append(result)
+            row.append(f"{median * 1000:>13.2f} {peak / 1024 / 1024:>13.2f}")
+        print(' '.join(row) + f"  {'✅' if len(set(results)) == 1 else '❌'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Image candidate extractor')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_bench = sub.add_parser('bench', help='Per-page parse time and peak memory over saved HTML fixtures')
+    p_bench.add_argument('paths', nargs='+', help='HTML files or globs (debug_search.py dumps)')
+    p_bench.add_argument('--repeat', type=int, default=20)
+    p_extract = sub.add_parser('extract', help='Print candidates found in an HTML file')
+    p_extract.add_argument('path')
+    args = parser.parse_args()
+
+    if args.command == 'bench':
+        paths = [p for pattern in args.paths for p in (sorted(glob.glob(pattern)) or [pattern])]
+        bench(paths, args.repeat)
+    elif args.command == 'extract':
+        with open(args.path, 'r', encoding='utf-8', errors='replace') as f:
+            for candidate in iter_candidates(f.read()):
+                print(f"{candidate.kind:<9} {candidate.width or '-':>5}x{candidate.height or '-':<5} {candidate.url}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Image Probe
+===========
+이미지 후보 URL 검증 단계 (fetch_images_advanced.py, link_whisky_images.py).
+
+- URL마다 Range GET 한 번(기본 앞 32KB)만 보내 상태, Content-Type, 전체 크기를 확인
+- 받은 앞부분 바이트의 헤더에서 실제 해상도를 읽음 (JPEG / PNG / GIF / WebP)
+- 여러 후보를 keep-alive 풀 위에서 동시에 확인하고 가장 적합한 URL을 고름
+- 일시적 실패(is_transient_failure)와 영구적 거절(4xx, 비이미지, 너무 작음)을 구분
+
+Usage:
+    python scripts/image_probe.py https://example.com/a.jpg https://example.com/b.png
+"""
+
+import argparse
+import asyncio
+import struct
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from http_pool import HostLimiter, make_session
+
+DEFAULT_RANGE_BYTES = 32 * 1024
+DEFAULT_PROBE_TIMEOUT = 10
+DEFAULT_CONCURRENCY = 8
+MIN_SIDE = 300                     # 짧은 변 최소 픽셀
+MAX_BYTES = 15 * 1024 * 1024       # 원본이 이보다 크면 제외
+PROBE_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
+    "Accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
+}
+
+# JPEG SOFn 마커 (DHT=C4, JPG=C8, DAC=CC 제외)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def parse_image_size(data: bytes) -> Optional[Tuple[str, int, int]]:
+    """이미지 앞부분 바이트에서 (format, width, height) 추출. 알 수 없으면 None"""
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and len(data) >= 24:
+        width, height = struct.unpack('>II', data[16:24])
+        return 'png', width, height
+
+    if data[:6] in (b'GIF87a', b'GIF89a') and len(data) >= 10:
+        width, height = struct.unpack('<HH', data[6:10])
+        return 'gif', width, height
+
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP' and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b'VP8 ':
+            width, height = struct.unpack('<HH', data[26:30])
+            return 'webp', width & 0x3FFF, height & 0x3FFF
+        if chunk == b'VP8L':
+            bits = int.from_bytes(data[21:25], 'little')
+            return 'webp', (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b'VP8X':
+            width = int.from_bytes(data[24:27], 'little') + 1
+            height = int.from_bytes(data[27:30], 'little') + 1
+            return 'webp', width, height
+        return None
+
+    if data[:2] == b'\xff\xd8':
+        # 세그먼트를 건너뛰며 SOF 마커를 찾음 (EXIF가 길면 Range 밖에 있을 수 있음)
+        offset = 2
+        while offset + 9 <= len(data):
+            if data[offset] != 0xFF:
+                offset += 1
+                continue
+            marker = data[offset + 1]
+            if marker == 0xFF:
+                offset += 1
+                continue
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+                offset += 2
+                continue
+            if marker in _JPEG_SOF_MARKERS:
+                height, width = struct.unpack('>HH', data[offset + 5:offset + 9])
+                return 'jpeg', width, height
+            segment_length = struct.unpack('>H', data[offset + 2:offset + 4])[0]
+            offset += 2 + segment_length
+        return None
+
+    return None
+
+
+def _total_size(headers, partial: bool) -> Optional[int]:
+    """원본 전체 크기 (206이면 Content-Range의 total, 200이면 Content-Length)"""
+    if partial:
+        total = headers.get('Content-Range', '').rsplit('/', 1)[-1]
+        return int(total) if total.isdigit() else None
+    length = headers.get('Content-Length', '')
+    return int(length) if length.isdigit() else None
+
+
+def probe_url(session, url: str, range_bytes: int = DEFAULT_RANGE_BYTES,
+              timeout: float = DEFAULT_PROBE_TIMEOUT) -> Dict[str, Any]:
+    """
+    Range GET 한 번으로 URL 검증. 서버가 Range를 무시(200)해도 range_bytes까지만 읽고 연결을 닫습니다.
+    반환: url, ok, status, content_type, bytes, format, width, height, error, elapsed_ms
+    """
+    result: Dict[str, Any] = {'url': url, 'ok': False, 'status': None, 'content_type': None, 'bytes': None,
+                              'format': None, 'width': None, 'height': None, 'error': None}
+    started = time.monotonic()
+    try:
+        headers = dict(PROBE_HEADERS, Range=f"bytes=0-{range_bytes - 1}")
+        with session.get(url, headers=headers, timeout=timeout, stream=True, allow_redirects=True) as response:
+            result['status'] = response.status_code
+            result['content_type'] = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+            if response.status_code not in (200, 206):
+                result['error'] = f"HTTP {response.status_code}"
+                return result
+            result['bytes'] = _total_size(response.headers, partial=response.status_code == 206)
+
+            head = bytearray()
+            for chunk in response.iter_content(chunk_size=8192):
+                head.extend(chunk)
+                if len(head) >= range_bytes:
+                    break
+        parsed = parse_image_size(bytes(head[:range_bytes]))
+        if parsed:
+            result['format'], result['width'], result['height'] = parsed
+        result['ok'] = True
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {str(e)[:120]}"
+    finally:
+        result['elapsed_ms'] = round((time.monotonic() - started) * 1000, 1)
+    return result
+
+
+def rejection_reason(result: Dict[str, Any], min_side: int = MIN_SIDE, max_bytes: int = MAX_BYTES) -> Optional[str]:
+    """검수 대상으로 부적합한 이유 (적합하면 None)"""
+    if not result['ok']:
+        return result['error'] or 'unreachable'
+    if not (result['content_type'] or '').startswith('image/') and not result['format']:
+        return f"not an image ({result['content_type'] or 'unknown'})"
+    if result['bytes'] and result['bytes'] > max_bytes:
+        return f"too large ({result['bytes'] / 1024 / 1024:.1f} MB)"
+    if result['width'] and result['height'] and min(result['width'], result['height']) < min_side:
+        return f"too small ({result['width']}x{result['height']})"
+    return None
+
+
+def is_transient_failure(result: Dict[str, Any]) -> bool:
+    """
+    다시 시도하면 달라질 수 있는 실패인지 (예외/타임아웃, 408/429, 5xx).
+    이런 후보가 섞인 결과 없음은 negative 캐시에 저장하지 않습니다.
+    """
+    if result['ok']:
+        return False
+    status = result['status']
+    return not (status and 400 <= status < 500 and status not in (408, 429))
+
+
+def candidate_score(result: Dict[str, Any]) -> Tuple:
+    """해상도를 읽은 세로형 이미지 우선, 그다음 짧은 변이 큰 순 (동률이면 원래 후보 순서)"""
+    width, height = result['width'], result['height']
+    known = bool(width and height)
+    portrait = known and width <= height
+    return (portrait, known, min(width, height) if known else 0)
+
+
+async def probe_many(session, urls: List[str], concurrency: int = DEFAULT_CONCURRENCY,
+                     limiter: Optional[HostLimiter] = None, range_bytes: int = DEFAULT_RANGE_BYTES) -> List[Dict[str, Any]]:
+    """여러 URL을 동시에 검증 (동기 Session 호출은 asyncio.to_thread, 입력 순서대로 반환)"""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    limiter = limiter or HostLimiter(2)
+
+    def probe_in_slot(url: str) -> Dict[str, Any]:
+        with limiter.slot(url):
+            return probe_url(session, url, range_bytes)
+
+    async def probe(url: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await asyncio.to_thread(probe_in_slot, url)
+
+    return await asyncio.gather(*[probe(url) for url in urls])
+
+
+def pick_best(results: List[Dict[str, Any]], min_side: int = MIN_SIDE) -> Optional[Dict[str, Any]]:
+    """적합한 후보 중 가장 좋은 것 (없으면 None)"""
+    accepted = [result for result in results if rejection_reason(result, min_side) is None]
+    if not accepted:
+        return None
+    return max(enumerate(accepted), key=lambda pair: (candidate_score(pair[1]), -pair[0]))[1]
+
+
+def choose_image(session, urls: List[str], concurrency: int = DEFAULT_CONCURRENCY,
+                 min_side: int = MIN_SIDE) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """동기 코드용: 후보 URL들을 검증하고 (최적 후보, 전체 결과) 반환"""
+    if not urls:
+        return None, []
+    results = asyncio.run(probe_many(session, urls, concurrency))
+    return pick_best(results, min_side), results
+
+
+def make_probe_session(pool_size: int = DEFAULT_CONCURRENCY):
+    """검증용 keep-alive 세션 (재시도는 1회만 - 죽은 링크를 빨리 걸러냄)"""
+    return make_session(pool_size=pool_size, retries=1, backoff_factor=0.5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Probe image URLs (Range GET, header dimensions)')
+    parser.add_argument('urls', nargs='+')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument('--min-side', type=int, default=MIN_SIDE)
+    args = parser.parse_args()
+
+    session = make_probe_session(args.concurrency)
+    best, results = choose_image(session, args.urls, args.concurrency, args.min_side)
+    for result in results:
+        reason = rejection_reason(result, args.min_side)
+        size = f"{result['width']}x{result['height']}" if result['width'] else '-'
+        print(f"{'✅' if reason is None else '❌'} {size:>11} {result['content_type'] or '-':<12} "
+              f"{result['elapsed_ms']:>7.1f} ms  {result['url'][:80]}{'' if reason is None else f'  ({reason})'}")
+    print(f"\n🏆 Best: {best['url'] if best else 'none'}")
+    session.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Image Search Cache
+==================
+이미지 검색 결과 공유 캐시 (fetch_images_advanced.py, link_whisky_images.py).
+
+- 키: 정규화한 (name_en, distillery) 쿼리
+- 찾은 URL은 긴 TTL, 결과 없음(negative)은 짧은 TTL(retry-after)로 저장
+- 네트워크 오류/차단으로 검색 자체가 실패한 경우는 저장하지 않음 (다음 실행에서 재시도)
+- encrypted-tbn 썸네일을 받지 않는 호출자(link_whisky_images.py)는 lookup(allow_thumbnail=False)로
+  썸네일 URL 결과를 미스로 취급 (fetch_images_advanced.py의 썸네일 fallback 결과가 새어 들어가지 않음)
+
+같은 보완 배치를 다시 돌리면 새 항목과 만료된 항목만 실제로 검색합니다.
+"""
+
+import re
+import unicodedata
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from sqlite_cache import SQLiteCache, make_key
+
+DEFAULT_SEARCH_CACHE_PATH = 'data/cache/image_search.sqlite'
+DEFAULT_POSITIVE_TTL_DAYS = 90.0
+DEFAULT_NEGATIVE_TTL_HOURS = 72.0
+
+_SPACE_RE = re.compile(r'\s+')
+
+
+def normalize_query(text: Optional[str]) -> str:
+    """NFKC + 소문자 + 공백 정리 (대소문자/전각/공백 차이만 있는 쿼리는 같은 키)"""
+    if not text:
+        return ''
+    return _SPACE_RE.sub(' ', unicodedata.normalize('NFKC', str(text)).lower()).strip()
+
+
+def is_thumbnail_url(url: Optional[str]) -> bool:
+    """구글 encrypted-tbn 썸네일 URL 여부"""
+    return bool(url) and 'encrypted-tbn' in url
+
+
+class ImageSearchCache:
+    """(name_en, distillery) → 이미지 URL 또는 negative 결과"""
+
+    def __init__(self, path: str = DEFAULT_SEARCH_CACHE_PATH, positive_ttl_days: float = DEFAULT_POSITIVE_TTL_DAYS,
+                 negative_ttl_hours: float = DEFAULT_NEGATIVE_TTL_HOURS, max_mb: int = 64):
+        self.cache = SQLiteCache(path, max_bytes=max_mb * 1024 * 1024)
+        self.positive_ttl = positive_ttl_days * 86400 if positive_ttl_days else None
+        self.negative_ttl = negative_ttl_hours * 3600
+        self.stats = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'stored': 0}
+
+    @staticmethod
+    def key(name_en: Optional[str], distillery: Optional[str]) -> str:
+        return make_key('image_search', normalize_query(name_en), normalize_query(distillery))
+
+    def lookup(self, name_en: Optional[str], distillery: Optional[str],
+               allow_thumbnail: bool = True) -> Tuple[bool, Optional[str]]:
+        """
+        (캐시 적중 여부, URL). 적중했는데 URL이 None이면 negative 결과 (retry-after 전까지 건너뜀).
+        allow_thumbnail=False면 썸네일 URL 결과는 미스로 취급합니다.
+        """
+        entry = self.cache.get(self.key(name_en, distillery))
+        if entry is None or (not allow_thumbnail and is_thumbnail_url(entry.get('url'))):
+            self.stats['misses'] += 1
+            return False, None
+        if entry.get('url'):
+            self.stats['hits'] += 1
+        else:
+            self.stats['negative_hits'] += 1
+        return True, entry.get('url')
+
+    def store(self, name_en: Optional[str], distillery: Optional[str], url: Optional[str], source: str):
+        """검색이 정상 완료된 결과만 저장 (url=None이면 negative TTL)"""
+        entry = {'url': url, 'source': source, 'searched_at': datetime.now().isoformat()}
+        self.cache.put(self.key(name_en, distillery), entry, ttl=self.positive_ttl if url else self.negative_ttl)
+        self.stats['stored'] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        return dict(self.stats, entries=self.cache.summary()['entries'])
+
+    def close(self):
+        self.cache.close()
+
+
+def add_search_cache_arguments(parser):
+    """이미지 수집 스크립트 공통 검색 캐시 옵션"""
+    parser.add_argument('--search-cache', default=DEFAULT_SEARCH_CACHE_PATH,
+                        help=f'Image search result cache path (default: {DEFAULT_SEARCH_CACHE_PATH})')
+    parser.add_argument('--negative-ttl-hours', type=float, default=DEFAULT_NEGATIVE_TTL_HOURS,
+                        help=f'Retry-after for searches that found nothing (default: {DEFAULT_NEGATIVE_TTL_HOURS:g})')
+    parser.add_argument('--no-search-cache', action='store_true', help='Always search, ignore the cache')
+
+
+def open_search_cache(args) -> Optional[ImageSearchCache]:
+    if args.no_search_cache:
+        return None
+    return ImageSearchCache(args.search_cache, negative_ttl_hours=args.negative_ttl_hours)
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Image Thumbnails
+================
+검수용 이미지(imageUrl)를 한 번만 내려받아 로컬 WebP 썸네일과 perceptual hash(pHash)를 만드는 단계.
+
+- 원본은 URL 해시 이름으로 data/images/originals/에 저장 (이미 받은 URL은 다시 받지 않음)
+- 리사이즈/WebP 인코딩/pHash 계산은 ProcessPoolExecutor에서 병렬 실행 (Pillow)
+- pHash 해밍 거리가 가까운 서로 다른 제품은 같은 스톡 사진 의심으로 표시
+- 결과는 manifest(JSON, 기본 data/images/manifest.json)로 저장 → 업로드 단계가 thumbnail 파일을 올리고 thumbnailUrl을 교체
+
+Usage:
+    python scripts/image_thumbnails.py [--input data/enriched/ready_for_confirm.json] [--size 400] [--workers 4]
+"""
+
+import argparse
+import hashlib
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from http_pool import make_session
+from image_probe import MAX_BYTES, PROBE_HEADERS
+from pipeline_utils import ordered_map
+from spirit_store import dataset_files, load_records, write_records
+
+DEFAULT_INPUT = 'data/enriched/ready_for_confirm.json'
+DEFAULT_OUTPUT_DIR = 'data/images'
+DEFAULT_SIZE = 400
+DEFAULT_QUALITY = 80
+DEFAULT_PHASH_DISTANCE = 4
+CONTENT_TYPE_EXTENSIONS = {'image/jpeg': '.jpg', 'image/png': '.png', 'image/webp': '.webp', 'image/gif': '.gif',
+                           'image/avif': '.avif'}
+
+_HASH_SIZE = 32       # DCT 입력 크기
+_LOW_FREQ = 8         # 해시에 쓰는 저주파 영역 (8x8 = 64비트)
+_DCT_COS = [[math.cos((2 * x + 1) * u * math.pi / (2 * _HASH_SIZE)) for x in range(_HASH_SIZE)]
+            for u in range(_LOW_FREQ)]
+
+
+def _pil():
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        raise RuntimeError("썸네일 생성에는 Pillow 패키지가 필요합니다: pip install Pillow")
+    return Image, ImageOps
+
+
+def phash(image) -> str:
+    """
+    pHash (64비트 hex): 32x32 흑백 축소 → 2D DCT → 좌상단 8x8 저주파 계수를 중앙값으로 이진화.
+    필요한 8개 주파수만 계산하는 분리형 DCT라 numpy 없이도 가볍습니다.
+    """
+    Image, _ = _pil()
+    small = image.convert('L').resize((_HASH_SIZE, _HASH_SIZE), Image.LANCZOS)
+    pixels = small.tobytes()
+    rows = [pixels[y * _HASH_SIZE:(y + 1) * _HASH_SIZE] for y in range(_HASH_SIZE)]
+    # 행 방향 DCT (u < 8) → 열 방향 DCT (v < 8)
+    row_dct = [[sum(c * p for c, p in zip(_DCT_COS[u], row)) for u in range(_LOW_FREQ)] for row in rows]
+    coefficients = [sum(_DCT_COS[v][y] * row_dct[y][u] for y in range(_HASH_SIZE))
+                    for v in range(_LOW_FREQ) for u in range(_LOW_FREQ)]
+    # DC 성분(0,0)은 전체 밝기라 중앙값 계산에서 제외
+    median = sorted(coefficients[1:])[len(coefficients[1:]) // 2]
+    bits = 0
+    for coefficient in coefficients:
+        bits = (bits << 1) | (coefficient > median)
+    return f"{bits:016x}"
+
+
+def hamming(a: str, b: str) -> int:
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+
+def make_thumbnail(job: Tuple[str, str, int, int]) -> Dict[str, Any]:
+    """(원본 경로, 썸네일 경로, 최대 변 길이, 품질) → 결과 dict. 프로세스 풀에서 실행"""
+    source, target, size, quality = job
+    try:
+        Image, ImageOps = _pil()
+        with Image.open(source) as image:
+            image = ImageOps.exif_transpose(image)
+            width, height = image.size
+            image_hash = phash(image)
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if image.has_transparency_data else 'RGB')
+            image.thumbnail((size, size), Image.LANCZOS)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            image.save(target, 'WEBP', quality=quality, method=6)
+            thumb_width, thumb_height = image.size
+        return {'ok': True, 'width': width, 'height': height, 'phash': image_hash,
+                'thumbnail_width': thumb_width, 'thumbnail_height': thumb_height,
+                'thumbnail_bytes': os.path.getsize(target)}
+    except Exception as e:
+        return {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+
+
+def original_path(originals_dir: str, url: str) -> str:
+    """URL 해시 기반 원본 경로 (확장자 없이, 다운로드 시 Content-Type으로 결정)"""
+    return os.path.join(originals_dir, hashlib.sha1(url.encode('utf-8')).hexdigest()[:20])
+
+
+def find_original(base: str) -> Optional[str]:
+    for extension in CONTENT_TYPE_EXTENSIONS.values():
+        if os.path.exists(base + extension):
+            return base + extension
+    return None
+
+
+def download_original(session, url: str, base: str, timeout: float = 30) -> Tuple[Optional[str], Optional[str], bool]:
+    """원본 1회 다운로드 → (경로, 오류, 새로 받았는지). 이미 받은 파일이 있으면 재사용"""
+    existing = find_original(base)
+    if existing:
+        return existing, None, False
+    try:
+        with session.get(url, headers=PROBE_HEADERS, timeout=timeout, stream=True) as response:
+            if response.status_code != 200:
+                return None, f"HTTP {response.status_code}", True
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+            extension = CONTENT_TYPE_EXTENSIONS.get(content_type)
+            if not extension:
+                return None, f"not an image ({content_type or 'unknown'})", True
+            path = base + extension
+            tmp_path = path + '.part'
+            received = 0
+            with open(tmp_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    received += len(chunk)
+                    if received > MAX_BYTES:
+                        raise ValueError(f"larger than {MAX_BYTES // 1024 // 1024} MB")
+                    f.write(chunk)
+            os.replace(tmp_path, path)
+            return path, None, True
+    except Exception as e:
+        for extension in CONTENT_TYPE_EXTENSIONS.values():
+            if os.path.exists(base + extension + '.part'):
+                os.remove(base + extension + '.part')
+        return None, f"{type(e).__name__}: {e}", True
+
+
+def find_phash_collisions(entries: List[Dict[str, Any]], max_distance: int = DEFAULT_PHASH_DISTANCE) -> Dict[str, List[str]]:
+    """
+    pHash 해밍 거리 max_distance 이하인 서로 다른 제품 쌍 → {id: [충돌 id...]}.
+    64비트를 (max_distance + 1)개 구간으로 나누면 거리 ≤ max_distance인 쌍은 최소 한 구간이 완전히 같으므로
+    (비둘기집 원리) 구간별 버킷 안에서만 비교합니다.
+    """
+    bands = max_distance + 1
+    bounds = [round(64 * i / bands) for i in range(bands + 1)]
+    buckets: Dict[Tuple[int, int], List[int]] = {}
+    for index, entry in enumerate(entries):
+        bits = int(entry['phash'], 16)
+        for band in range(bands):
+            width = bounds[band + 1] - bounds[band]
+            key = (band, (bits >> bounds[band]) & ((1 << width) - 1))
+            buckets.setdefault(key, []).append(index)
+
+    collisions: Dict[str, set] = {}
+    for members in buckets.values():
+        for i, left in enumerate(members):
+            for right in members[i + 1:]:
+                a, b = entries[left], entries[right]
+                if a['id'] == b['id'] or hamming(a['phash'], b['phash']) > max_distance:
+                    continue
+                collisions.setdefault(a['id'], set()).add(b['id'])
+                collisions.setdefault(b['id'], set()).add(a['id'])
+    return {item_id: sorted(others) for item_id, others in collisions.items()}
+
+
+def load_items(paths: List[str]) -> List[Dict[str, Any]]:
+    items = []
+    for path in paths:
+        items.extend(load_records(path))
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Download accepted images once, build WebP thumbnails and pHash')
+    parser.add_argument('--input', nargs='*', help=f'Dataset paths (default: {DEFAULT_INPUT} or enriched batches)')
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR, help=f'Image directory (default: {DEFAULT_OUTPUT_DIR})')
+    parser.add_argument('--manifest', help='Manifest path (default: <output-dir>/manifest.json)')
+    parser.add_argument('--size', type=int, default=DEFAULT_SIZE, help=f'Thumbnail longest side in px (default: {DEFAULT_SIZE})')
+    parser.add_argument('--quality', type=int, default=DEFAULT_QUALITY, help=f'WebP quality (default: {DEFAULT_QUALITY})')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='Thumbnail processes (default: CPU count)')
+    parser.add_argument('--download-workers', type=int, default=8, help='Concurrent downloads (default: 8)')
+    parser.add_argument('--phash-distance', type=int, default=DEFAULT_PHASH_DISTANCE,
+                        help=f'Max pHash Hamming distance to flag as the same photo (default: {DEFAULT_PHASH_DISTANCE})')
+    args = parser.parse_args()
+    _pil()
+
+    paths = args.input or ([DEFAULT_INPUT] if os.path.exists(DEFAULT_INPUT)
+                           else dataset_files('data/enriched', 'whisky_enriched_batch_*'))
+    if not paths:
+        print("❌ No input datasets found.")
+        return
+    items = [item for item in load_items(paths)
+             if item.get('id') and item.get('imageUrl') and str(item['imageUrl']).startswith('http')]
+    print(f"🖼️ {len(items):,} items with imageUrl from {len(paths)} file(s)")
+
+    originals_dir = os.path.join(args.output_dir, 'originals')
+    thumbnails_dir = os.path.join(args.output_dir, 'thumbnails')
+    manifest_path = args.manifest or os.path.join(args.output_dir, 'manifest.json')
+    os.makedirs(originals_dir, exist_ok=True)
+    start_time = datetime.now()
+
+    # 1. 원본 다운로드 (URL 단위 1회, 이미 받은 파일은 재사용)
+    urls = list(dict.fromkeys(item['imageUrl'] for item in items))
+    session = make_session(pool_size=args.download_workers, retries=2)
+    downloads: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+    fetched = 0
+    for url, (path, error, is_new) in ordered_map(
+            lambda u: download_original(session, u, original_path(originals_dir, u)), urls, args.download_workers):
+        downloads[url] = (path, error)
+        fetched += int(is_new and path is not None)
+    session.close()
+    print(f"⬇️ Originals: {fetched} downloaded, {sum(1 for p, _ in downloads.values() if p) - fetched} reused, "
+          f"{sum(1 for p, _ in downloads.values() if not p)} failed")
+
+    # 2. 썸네일 + pHash (원본 파일 단위로 한 번만, 프로세스 풀). 이전 manifest에 있고 파일이 남아 있으면 재사용
+    previous = {}
+    if os.path.exists(manifest_path):
+        for entry in load_records(manifest_path):
+            if entry.get('phash') and entry.get('thumbnail') and os.path.exists(entry['thumbnail']):
+                previous[entry['thumbnail']] = entry
+    jobs, processed = {}, {}
+    for path, _ in downloads.values():
+        if path and path not in jobs:
+            name = os.path.splitext(os.path.basename(path))[0]
+            jobs[path] = (path, os.path.join(thumbnails_dir, f"{name}_{args.size}.webp"), args.size, args.quality)
+            old = previous.get(jobs[path][1])
+            if old:
+                processed[path] = dict({key: old[key] for key in ('width', 'height', 'phash', 'thumbnail_width',
+                                                                  'thumbnail_height', 'thumbnail_bytes')}, ok=True)
+    pending = [job for path, job in jobs.items() if path not in processed]
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        processed.update(zip((job[0] for job in pending), pool.map(make_thumbnail, pending, chunksize=8)))
+    print(f"🗜️ Thumbnails: {len(pending)} generated, {len(jobs) - len(pending)} reused")
+
+    # 3. manifest 구성 + pHash 충돌(같은 사진을 쓰는 다른 제품) 표시
+    entries = []
+    for item in items:
+        url = item['imageUrl']
+        path, error = downloads[url]
+        entry = {'id': item['id'], 'name': item.get('name'), 'imageUrl': url, 'original': path}
+        result = processed.get(path) if path else None
+        if result and result['ok']:
+            entry.update({
+                'thumbnail': jobs[path][1],
+                'width': result['width'], 'height': result['height'],
+                'thumbnail_width': result['thumbnail_width'], 'thumbnail_height': result['thumbnail_height'],
+                'original_bytes': os.path.getsize(path), 'thumbnail_bytes': result['thumbnail_bytes'],
+                'phash': result['phash'],
+            })
+        else:
+            entry['error'] = error or (result or {}).get('error', 'unknown')
+        entries.append(entry)
+
+    hashed = [entry for entry in entries if entry.get('phash')]
+    collisions = find_phash_collisions(hashed, args.phash_distance)
+    for entry in entries:
+        entry['phash_collisions'] = collisions.get(entry['id'], [])
+    write_records(manifest_path, entries)
+
+    original_bytes = sum(entry.get('original_bytes', 0) for entry in hashed)
+    thumbnail_bytes = sum(entry.get('thumbnail_bytes', 0) for entry in hashed)
+    print("\n" + "=" * 50)
+    print(" 📊 [SUMMARY] Thumbnails")
+    print("-" * 50)
+    print(f"  • Thumbnails          : {len(hashed):,} / {len(entries):,} items ({len(jobs):,} unique images)")
+    if hashed:
+        print(f"  • Size                : {original_bytes / 1024 / 1024:.1f} MB → {thumbnail_bytes / 1024 / 1024:.1f} MB "
+              f"({args.size}px WebP q{args.quality})")
+    print(f"  • pHash Collisions    : {len(collisions):,} items share a photo with another product "
+          f"(distance ≤ {args.phash_distance})")
+    print(f"  • Time Elapsed        : {datetime.now() - start_time}")
+    print(f"  • Manifest            : {manifest_path}")
+    print("=" * 50 + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSONL Journal
+=============
+장시간 실행되는 스크립트용 append-only 체크포인트 저널.
+
+- 레코드 1건 = JSON 1줄, 매 append마다 OS 버퍼로 flush
+- fsync는 N건 또는 T초마다 묶어서 수행 (동시 처리 시 병목 방지)
+- 크래시로 마지막 줄이 잘려도 read()는 온전한 줄만 돌려줌
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator
+
+
+class JsonlJournal:
+    """스레드 안전 append-only JSONL 저널"""
+
+    def __init__(self, path: str, truncate: bool = False, fsync_every: int = 50, fsync_interval: float = 2.0):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.fsync_every = max(1, fsync_every)
+        self.fsync_interval = fsync_interval
+        self._file = open(path, 'w' if truncate else 'a', encoding='utf-8')
+        if not truncate and self._file.tell() > 0 and not self._ends_with_newline(path):
+            # 크래시로 잘린 마지막 줄 뒤에 새 레코드가 이어 붙지 않도록 줄을 끊음
+            self._file.write('\n')
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+
+    @staticmethod
+    def _ends_with_newline(path: str) -> bool:
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            self._sync()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def read(path: str) -> Iterator[Dict[str, Any]]:
+        """저널의 레코드를 순서대로 읽기 (파일이 없으면 빈 결과, 깨진 줄은 건너뜀)"""
+        if not os.path.exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
@@ -1,15 +1,22 @@
 import asyncio
-import json
+import argparse
 import random
+import time
 from pathlib import Path
 from datetime import datetime
 from playwright.async_api import async_playwright
 
+from image_probe import is_transient_failure, make_probe_session, probe_many, rejection_reason
+from image_search_cache import add_search_cache_arguments, open_search_cache
+from pipeline_utils import LatencyStats
+from spirit_store import dataset_files, load_records, write_records
+
 # 설정
 ENRICHED_DIR = Path('data/enriched')
 FINAL_OUTPUT = Path('data/enriched/whisky_final.json')
 FAIL_LOG = Path('scripts/image_fail_log.txt')
 CHECKPOINT_INTERVAL = 10
+DEFAULT_WORKERS = 3
 
 # User-Agent 리스트 (차단 방지용)
 USER_AGENTS = [
@@ -19,110 +26,301 @@ USER_AGENTS = [
 ]
 
 async def search_image(page, name_en, distillery):
-    """지시사항에 따른 최적화된 쿼리로 이미지 검색"""
-    query = f"{name_en} {distillery} bottle official photo white background"
-    search_url = f"https://www.google.com/search?q={query}&tbm=isch&tbs=isz:m"
-    
+    """지시사항에 따른 최적화된 쿼리로 이미지 검색 (오류 시 None)"""
     try:
-        await page.goto(search_url)
-        # 검색 결과 대기
-        await page.wait_for_selector('div[data-ri="0"]', timeout=5000)
-        
-        # 첫 번째 이미지 결과 클릭하여 미리보기 창 열기
-        await page.click('div[data-ri="0"]')
-        
-        # 미리보기 창에서 실제 이미지 소스 추출 시도 (여러 선택자 대응)
-        selectors = [
-            'img.sFlh5c.pT0Scc.i30OT', # 최신 구글 이미지 레이아웃
-            'img.n3VNCb',             # 클래식 레이아웃
-            'div.r43M7e img'          # 기타 변형
-        ]
-        
-        image_url = None
-        for selector in selectors:
-            try:
-                img_element = await page.wait_for_selector(selector, timeout=3000)
-                src = await img_element.get_attribute('src')
-                # base64가 아닌 실제 URL인지 확인
-                if src and src.startswith('http') and not src.startswith('https://encrypted-tbn'):
-                    image_url = src
-                    break
-            except:
-                continue
-                
-        return image_url
+        return await find_image(page, name_en, distillery)
     except Exception as e:
         print(f"⚠️ 검색 중 오류 ({name_en}): {e}")
         return None
 
+async def find_image(page, name_en, distillery):
+    """
+    search_image와 같지만 페이지 이동/결과 대기 실패는 그대로 raise 합니다.
+    None 반환은 결과는 떴지만 원본 URL을 얻지 못한 경우 (negative 캐시 대상).
+    """
+    query = f"{name_en} {distillery} bottle official photo white background"
+    search_url = f"https://www.google.com/search?q={query}&tbm=isch&tbs=isz:m"
+    
+    await page.goto(search_url)
+    # 검색 결과 대기
+    await page.wait_for_selector('div[data-ri="0"]', timeout=5000)
+    
+    # 첫 번째 이미지 결과 클릭하여 미리보기 창 열기
+    await page.click('div[data-ri="0"]')
+    
+    # 미리보기 창에서 실제 이미지 소스 추출 시도 (여러 선택자 대응)
+    selectors = [
+        'img.sFlh5c.pT0Scc.i30OT', # 최신 구글 이미지 레이아웃
+        'img.n3VNCb',             # 클래식 레이아웃
+        'div.r43M7e img'          # 기타 변형
+    ]
+    
+    image_url = None
+    for selector in selectors:
+        try:
+            img_element = await page.wait_for_selector(selector, timeout=3000)
+            src = await img_element.get_attribute('src')
+            # base64가 아닌 실제 URL인지 확인
+            if src and src.startswith('http') and not src.startswith('https://encrypted-tbn'):
+                image_url = src
+                break
+        except:
+            continue
+            
+    return image_url
+
+# 페이지 로드 시 차단할 리소스 (검색 결과 DOM과 img src 속성만 필요)
+BLOCKED_RESOURCE_TYPES = {'image', 'font', 'stylesheet', 'media'}
+
+
+def item_priority(item):
+    """작은 값 먼저: 공개 → 검수 완료 → 영문명 보유 순 (같은 우선순위는 원래 순서 유지)"""
+    has_name_en = bool((item.get('metadata') or {}).get('name_en'))
+    return (not item.get('isPublished'), not item.get('isReviewed'), not has_name_en)
+
+
+async def block_assets(route):
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+class ImageWorker:
+    """재사용 브라우저 컨텍스트/페이지 1개를 가진 워커 (워커별 지연과 통계)"""
+
+    def __init__(self, worker_id, browser, delay=(3.0, 7.0), block=True, search_cache=None, probe_session=None):
+        self.worker_id = worker_id
+        self.search_cache = search_cache
+        self.probe_session = probe_session
+        self.browser = browser
+        self.delay = delay
+        self.block = block
+        self.context = None
+        self.page = None
+        self.latency = LatencyStats()
+        self.succeeded = 0
+        self.failed = 0
+        self.cached = 0
+
+    async def open(self):
+        # User-Agent는 워커(컨텍스트)마다 무작위로 고정
+        self.context = await self.browser.new_context(user_agent=random.choice(USER_AGENTS))
+        if self.block:
+            await self.context.route('**/*', block_assets)
+        self.page = await self.context.new_page()
+
+    async def close(self):
+        if self.context:
+            context, self.context, self.page = self.context, None, None
+            try:
+                await context.close()
+            except Exception as e:
+                print(f"⚠️ [w{self.worker_id}] 컨텍스트 종료 실패: {e}")
+
+    async def run(self, queue, on_done):
+        """
+        큐가 빌 때까지 처리. 컨텍스트를 열거나 다시 열지 못하면 잡은 항목을 큐에 되돌려 놓고
+        예외로 종료합니다 (남은 항목은 다른 워커가 처리, 모두 종료되면 main이 대기를 멈춤).
+        """
+        try:
+            await self.open()
+            while True:
+                entry = await queue.get()
+                _, index, item = entry
+                # 이전 항목에서 페이지가 죽었으면 컨텍스트를 새로 만듦
+                if self.page is None or self.page.is_closed():
+                    try:
+                        await self.close()
+                        await self.open()
+                    except Exception:
+                        queue.put_nowait(entry)
+                        queue.task_done()
+                        raise
+                searched = True
+                try:
+                    searched = await self.process(index, item)
+                except Exception as e:
+                    self.failed += 1
+                    print(f"⚠️ [w{self.worker_id}] 처리 중 오류 ({item.get('id')}): {e}")
+                finally:
+                    queue.task_done()
+                await on_done()
+                # 지시사항: 워커별 랜덤 지연 (3~7초), 캐시로 처리한 항목은 생략
+                if searched and not queue.empty():
+                    await asyncio.sleep(random.uniform(*self.delay))
+        except Exception as e:
+            print(f"❌ [w{self.worker_id}] 브라우저 컨텍스트를 열지 못해 워커를 종료합니다: {e}")
+            raise
+        finally:
+            await self.close()
+
+    async def process(self, index, item):
+        """항목 하나 처리. 실제로 검색했으면 True (캐시로 끝났으면 False)"""
+        name_en = item.get('metadata', {}).get('name_en', item['name'])
+        distillery = item['distillery']
+
+        # 캐시 우선 (URL 또는 retry-after 전의 negative 결과면 브라우저 생략)
+        if self.search_cache:
+            # find_image는 썸네일을 받지 않으므로 다른 스크립트가 저장한 썸네일 결과도 쓰지 않음
+            cached, img_url = self.search_cache.lookup(name_en, distillery, allow_thumbnail=False)
+            if cached:
+                self.cached += 1
+                if img_url:
+                    self._apply(item, img_url)
+                print(f"💾 [w{self.worker_id} #{index + 1}] 캐시 {'적중' if img_url else '실패 기록 (재시도 대기)'}: {name_en}")
+                return False
+
+        print(f"📸 [w{self.worker_id} #{index + 1}] 수집 시도: {name_en}...")
+
+        started = time.monotonic()
+        try:
+            img_url = await find_image(self.page, name_en, distillery)
+            cacheable = True
+            if img_url and self.probe_session:
+                # 죽은 링크/비이미지/너무 작은 이미지는 검수 대상에서 제외 (Range GET 한 번)
+                probe = (await probe_many(self.probe_session, [img_url], 1))[0]
+                reason = rejection_reason(probe)
+                if reason:
+                    print(f"🚫 [w{self.worker_id}] 이미지 검증 실패 ({reason}): {img_url[:60]}")
+                    img_url = None
+                    # 타임아웃/연결 오류/5xx는 negative로 저장하지 않음 (다음 실행에서 재시도)
+                    cacheable = not is_transient_failure(probe)
+            if self.search_cache and cacheable:
+                self.search_cache.store(name_en, distillery, img_url, 'playwright')
+        except Exception as e:
+            # 이동/대기 실패(차단 등)는 캐시하지 않음
+            print(f"⚠️ 검색 중 오류 ({name_en}): {e}")
+            img_url = None
+        self.latency.record(time.monotonic() - started)
+
+        if img_url:
+            self.succeeded += 1
+            self._apply(item, img_url)
+            print(f"✅ 성공: {img_url[:60]}...")
+        else:
+            self.failed += 1
+            # 실패 기록
+            with open(FAIL_LOG, 'a', encoding='utf-8') as f_fail:
+                f_fail.write(f"{item['id']} | {name_en} | {datetime.now().isoformat()}\n")
+            print(f"❌ 실패 (로그 기록됨): {name_en}")
+        return True
+
+    @staticmethod
+    def _apply(item, img_url):
+        item['imageUrl'] = img_url
+        item['thumbnailUrl'] = img_url # 동일하게 설정
+        item['updatedAt'] = datetime.now().isoformat()
+
+    def summary(self):
+        stats = self.latency.summary()
+        done = self.succeeded + self.failed
+        return {
+            'worker': self.worker_id,
+            'items': done,
+            'cached': self.cached,
+            'succeeded': self.succeeded,
+            'success_rate': round(self.succeeded / done, 3) if done else 0.0,
+            'p50_ms': stats['p50_ms'],
+            'p95_ms': stats['p95_ms'],
+        }
+
+
+def print_worker_report(workers):
+    print("\n" + "=" * 60)
+    print(" 📊 워커별 이미지 수집 결과")
+    print("-" * 60)
+    print(f"  {'worker':>6} {'items':>6} {'ok':>5} {'rate':>6} {'p50(s)':>8} {'p95(s)':>8} {'cached':>7}")
+    for worker in workers:
+        s = worker.summary()
+        print(f"  {s['worker']:>6} {s['items']:>6} {s['succeeded']:>5} {s['success_rate']:>6.0%} "
+              f"{s['p50_ms'] / 1000:>8.1f} {s['p95_ms'] / 1000:>8.1f} {s['cached']:>7}")
+    total = sum(w.succeeded + w.failed for w in workers)
+    succeeded = sum(w.succeeded for w in workers)
+    if total:
+        print(f"  {'all':>6} {total:>6} {succeeded:>5} {succeeded / total:>6.0%}")
+    print("=" * 60)
+
+
 async def main():
+    parser = argparse.ArgumentParser(description='위스키 이미지 URL 수집 (브라우저 페이지 풀)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'동시에 사용할 브라우저 컨텍스트 수 (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--min-delay', type=float, default=3.0, help='워커별 항목 간 최소 대기(초) (default: 3)')
+    parser.add_argument('--max-delay', type=float, default=7.0, help='워커별 항목 간 최대 대기(초) (default: 7)')
+    parser.add_argument('--no-block', action='store_true', help='이미지/폰트/CSS 요청 차단 끄기')
+    parser.add_argument('--no-validate', action='store_true', help='찾은 이미지 URL 검증(Range GET) 생략')
+    add_search_cache_arguments(parser)
+    args = parser.parse_args()
+
     # 1. 모든 보완 데이터 로드
     all_enriched = []
-    batch_files = list(ENRICHED_DIR.glob('whisky_enriched_batch_*.json'))
+    batch_files = dataset_files(str(ENRICHED_DIR), 'whisky_enriched_batch_*')
     
     if not batch_files:
         print("❌ 보완 데이터 배치 파일을 찾을 수 없습니다.")
         return
 
     for f_path in batch_files:
-        with open(f_path, 'r', encoding='utf-8') as f_in:
-            all_enriched.extend(json.load(f_in))
+        all_enriched.extend(load_records(f_path))
+
+    # 이미 이미지 URL이 있으면 스킵, 나머지는 우선순위 큐에 적재
+    queue = asyncio.PriorityQueue()
+    for i, item in enumerate(all_enriched):
+        if item.get('imageUrl') and item['imageUrl'].startswith('http'):
+            continue
+        queue.put_nowait((item_priority(item), i, item))
+    pending = queue.qsize()
             
-    print(f"🔍 총 {len(all_enriched)}건의 데이터를 로드했습니다. 이미지 수집을 시작합니다.")
+    print(f"🔍 총 {len(all_enriched)}건의 데이터를 로드했습니다. 이미지 수집을 시작합니다. "
+          f"(대상 {pending}건, 워커 {args.workers}개)")
+    if not pending:
+        return
+
+    processed_count = 0
+
+    async def on_done():
+        nonlocal processed_count
+        processed_count += 1
+        # 지시사항: 10건마다 체크포인트 저장
+        if processed_count % CHECKPOINT_INTERVAL == 0:
+            write_records(str(FINAL_OUTPUT), all_enriched)
+            print(f"💾 중간 저장 완료: {FINAL_OUTPUT} ({processed_count}/{pending})")
 
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
-        
-        processed_count = 0
-        total_items = len(all_enriched)
-
-        for i, item in enumerate(all_enriched):
-            # 이미 이미지 URL이 있으면 스킵
-            if item.get('imageUrl') and item['imageUrl'].startswith('http'):
-                continue
-                
-            # 브라우저 컨텍스트 생성 (User-Agent 무작위 교체)
-            context = await browser.new_context(user_agent=random.choice(USER_AGENTS))
-            page = await context.new_page()
-
-            name_en = item.get('metadata', {}).get('name_en', item['name'])
-            distillery = item['distillery']
-            
-            print(f"📸 [{i+1}/{total_items}] 수집 시도: {name_en}...")
-            
-            img_url = await search_image(page, name_en, distillery)
-            
-            if img_url:
-                item['imageUrl'] = img_url
-                item['thumbnailUrl'] = img_url # 동일하게 설정
-                item['updatedAt'] = datetime.now().isoformat()
-                print(f"✅ 성공: {img_url[:60]}...")
-            else:
-                # 실패 기록
-                with open(FAIL_LOG, 'a', encoding='utf-8') as f_fail:
-                    f_fail.write(f"{item['id']} | {name_en} | {datetime.now().isoformat()}\n")
-                print(f"❌ 실패 (로그 기록됨): {name_en}")
-
-            processed_count += 1
-            await context.close()
-
-            # 지시사항: 랜덤 지연 (3~7초)
-            delay = random.uniform(3, 7)
-            if i < total_items - 1:
-                await asyncio.sleep(delay)
-            
-            # 지시사항: 10건마다 체크포인트 저장
-            if processed_count % CHECKPOINT_INTERVAL == 0:
-                with open(FINAL_OUTPUT, 'w', encoding='utf-8') as f_out:
-                    json.dump(all_enriched, f_out, indent=2, ensure_ascii=False)
-                print(f"💾 중간 저장 완료: {FINAL_OUTPUT}")
-
-        # 최종 저장
-        with open(FINAL_OUTPUT, 'w', encoding='utf-8') as f_out:
-            json.dump(all_enriched, f_out, indent=2, ensure_ascii=False)
-            
-        await browser.close()
-        print(f"✨ 모든 작업 완료! 최종 결과 저장: {FINAL_OUTPUT}")
+        search_cache = open_search_cache(args)
+        probe_session = None if args.no_validate else make_probe_session(args.workers)
+        workers = [ImageWorker(n + 1, browser, (args.min_delay, args.max_delay), block=not args.no_block,
+                               search_cache=search_cache, probe_session=probe_session)
+                   for n in range(max(1, min(args.workers, pending)))]
+        tasks = [asyncio.create_task(worker.run(queue, on_done)) for worker in workers]
+        # 큐 완료와 워커 종료를 함께 대기 (워커가 모두 죽으면 queue.join()만으로는 끝나지 않음)
+        join_task = asyncio.create_task(queue.join())
+        alive = set(tasks)
+        try:
+            while alive:
+                done, _ = await asyncio.wait({join_task, *alive}, return_when=asyncio.FIRST_COMPLETED)
+                if join_task in done:
+                    break
+                alive -= done
+            if not join_task.done():
+                print(f"❌ 모든 워커가 종료되어 {queue.qsize()}건을 처리하지 못했습니다.")
+        finally:
+            join_task.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(join_task, *tasks, return_exceptions=True)
+            # 최종 저장 (중단되어도 처리된 항목까지 저장)
+            write_records(str(FINAL_OUTPUT), all_enriched)
+            await browser.close()
+            if search_cache:
+                search_cache.close()
+            if probe_session:
+                probe_session.close()
+
+    print_worker_report(workers)
+    print(f"✨ 모든 작업 완료! 최종 결과 저장: {FINAL_OUTPUT}")
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM Backend
+===========
+Gemini 스크립트(audit_database.py, fetch_reviews_gemini.py)가 공유하는 LLM 호출 인터페이스.
+
+- GeminiBackend: 실제 Gemini API (google-genai SDK)
+- StubBackend:   오프라인 벤치마크용 결정적 스텁 (지연, 에러율, 429 쿼터 동작 설정 가능)
+- HttpBackend:   로컬 스텁 HTTP 서버 클라이언트 (StubServer와 짝)
+
+백엔드 선택은 LLM_BACKEND 환경 변수로 합니다:
+    gemini (기본값) | stub | http://127.0.0.1:8089
+
+Usage (스텁 서버 단독 실행):
+    python scripts/llm_backend.py --port 8089 --latency-ms 400 --error-rate 0.02 --quota-rps 5
+"""
+
+import abc
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+from pipeline_utils import LatencyStats
+
+DEFAULT_MODEL_ID = 'gemini-2.0-flash'
+
+_RETRY_DELAY_RE = re.compile(r"retryDelay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s")
+_ID_RE = re.compile(r'"id"\s*:\s*"([^"]+)"')
+
+
+class BackendError(Exception):
+    """재시도 가능한 백엔드 오류 (5xx, 429)"""
+
+    def __init__(self, message: str, status: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class RateLimitError(BackendError):
+    """429 / RESOURCE_EXHAUSTED"""
+
+    def __init__(self, message: str = '429 RESOURCE_EXHAUSTED', retry_after: Optional[float] = None):
+        super().__init__(message, status=429, retry_after=retry_after)
+
+
+class LLMBackend(abc.ABC):
+    """generate()는 응답 텍스트(JSON 문자열)를 반환합니다. 하위 클래스는 _generate()를 구현합니다."""
+
+    name = 'base'
+
+    def __init__(self):
+        self.stats = {'calls': 0, 'ok': 0, 'throttled': 0, 'errors': 0}
+        self._stats_lock = threading.Lock()
+        self.latency = LatencyStats()
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def generate(self, prompt: str, system_instruction: Optional[str] = None,
+                 temperature: Optional[float] = None, json_output: bool = True) -> str:
+        self._count('calls')
+        started = time.monotonic()
+        try:
+            text = self._generate(prompt, system_instruction, temperature, json_output)
+        except RateLimitError:
+            self._count('throttled')
+            raise
+        except Exception:
+            self._count('errors')
+            raise
+        finally:
+            self.latency.record(time.monotonic() - started)
+        self._count('ok')
+        return text
+
+    @abc.abstractmethod
+    def _generate(self, prompt, system_instruction, temperature, json_output) -> str:
+        """실제 호출 (재시도 가능한 실패는 BackendError/RateLimitError로 raise)"""
+
+
+class GeminiBackend(LLMBackend):
+    """google-genai SDK 기반 실제 Gemini 호출"""
+
+    name = 'gemini'
+
+    def __init__(self, api_key: Optional[str] = None, model: str = DEFAULT_MODEL_ID):
+        super().__init__()
+        from google import genai
+        from google.genai import types
+        self._types = types
+        self.model = model
+        self.client = genai.Client(api_key=api_key or os.getenv('GEMINI_API_KEY'))
+
+    def _generate(self, prompt, system_instruction, temperature, json_output) -> str:
+        config = {}
+        if system_instruction:
+            config['system_instruction'] = system_instruction
+        if temperature is not None:
+            config['temperature'] = temperature
+        if json_output:
+            config['response_mime_type'] = 'application/json'
+        try:
+            response = self.client.models.generate_content(
+                model=self.model,
+                contents=prompt,
+                config=self._types.GenerateContentConfig(**config)
+            )
+        except Exception as e:
+            code = getattr(e, 'code', None)
+            message = str(e)
+            if code == 429 or 'RESOURCE_EXHAUSTED' in message:
+                match = _RETRY_DELAY_RE.search(message)
+                raise RateLimitError(message, retry_after=float(match.group(1)) if match else None) from e
+            if isinstance(code, int) and code >= 500:
+                raise BackendError(message, status=code) from e
+            raise
+        return response.text
+
+
+class StubBackend(LLMBackend):
+    """
+    네트워크 없이 동작하는 결정적 스텁.
+    프롬프트 안의 "id" 값을 찾아 배치(JSON 배열) 또는 단건(JSON 객체) 응답을 만들어 돌려줍니다.
+    """
+
+    name = 'stub'
+
+    def __init__(self, latency_ms: float = 300, jitter_ms: float = 100, error_rate: float = 0.0,
+                 quota_rps: Optional[float] = None, seed: int = 42):
+        super().__init__()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.quota_rps = quota_rps
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+    def _admit(self) -> Optional[float]:
+        """1초 고정 윈도우 쿼터. 초과 시 Retry-After(초) 반환"""
+        if not self.quota_rps:
+            return None
+        with self._rng_lock:
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_count = 0
+            if self._window_count >= self.quota_rps:
+                return max(0.05, 1.0 - (now - self._window_start))
+            self._window_count += 1
+            return None
+
+    def _generate(self, prompt, system_instruction, temperature, json_output) -> str:
+        retry_after = self._admit()
+        if retry_after is not None:
+            raise RateLimitError(f'429 RESOURCE_EXHAUSTED (stub quota {self.quota_rps} rps)', retry_after=retry_after)
+
+        with self._rng_lock:
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0
+            failed = self._rng.random() < self.error_rate
+        time.sleep(delay)
+        if failed:
+            raise BackendError('503 UNAVAILABLE (stub injected error)', status=503)
+        return stub_response(prompt)
+
+
+def stub_response(prompt: str) -> str:
+    """감사/보완 프롬프트 양쪽에서 파싱 가능한 결정적 응답 생성"""
+    def record(item_id: Optional[str]) -> Dict:
+        data = {
+            'country': '대한민국',
+            'region': None,
+            'distillery': 'Stub Distillery',
+            'bottler': None,
+            'abv': 40.0,
+            'metadata': {'importer': None},
+            'corrections': [],
+            'tasting_note': '스텁 테이스팅 노트',
+            'description': '스텁 소개글',
+        }
+        if item_id is not None:
+            data = {'id': item_id, **data}
+        return data
+
+    ids = list(dict.fromkeys(_ID_RE.findall(prompt)))
+    # 프롬프트 예시의 placeholder id는 제외
+    ids = [item_id for item_id in ids if item_id not in ('...', 'item_id')]
+    if ids:
+        return json.dumps([record(item_id) for item_id in ids], ensure_ascii=False)
+    return json.dumps(record(None), ensure_ascii=False)
+
+
+class HttpBackend(LLMBackend):
+    """StubServer(또는 호환 서버)에 HTTP로 요청"""
+
+    name = 'http'
+
+    def __init__(self, url: str, timeout: float = 60.0):
+        super().__init__()
+        self.url = url.rstrip('/') + '/v1/generate'
+        self.timeout = timeout
+
+    def _generate(self, prompt, system_instruction, temperature, json_output) -> str:
+        body = json.dumps({
+            'prompt': prompt,
+            'system_instruction': system_instruction,
+            'temperature': temperature,
+            'json': json_output,
+        }).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode('utf-8'))['text']
+        except urllib.error.HTTPError as e:
+            retry_after = e.headers.get('Retry-After')
+            retry_after = float(retry_after) if retry_after else None
+            if e.code == 429:
+                raise RateLimitError(f'429 RESOURCE_EXHAUSTED ({self.url})', retry_after=retry_after) from e
+            raise BackendError(f'{e.code} {e.reason}', status=e.code, retry_after=retry_after) from e
+
+
+class StubServer:
+    """StubBackend를 localhost HTTP로 노출 (백그라운드 스레드)"""
+
+    def __init__(self, backend: StubBackend, host: str = '127.0.0.1', port: int = 0):
+        self.backend = backend
+        handler = self._make_handler(backend)
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @staticmethod
+    def _make_handler(backend: StubBackend):
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                try:
+                    text = backend.generate(payload.get('prompt', ''), payload.get('system_instruction'),
+                                            payload.get('temperature'), payload.get('json', True))
+                    self._reply(200, {'text': text})
+                except BackendError as e:
+                    headers = {'Retry-After': f'{e.retry_after:.2f}'} if e.retry_after else {}
+                    self._reply(e.status or 500, {'error': str(e)}, headers)
+
+            def _reply(self, status: int, body: Dict, headers: Optional[Dict] = None):
+                encoded = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(encoded)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(encoded)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'StubServer':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def create_backend(spec: Optional[str] = None, model: str = DEFAULT_MODEL_ID) -> LLMBackend:
+    """LLM_BACKEND 설정값으로 백엔드 생성"""
+    spec = spec or os.getenv('LLM_BACKEND', 'gemini')
+    if spec == 'gemini':
+        return GeminiBackend(model=model)
+    if spec == 'stub':
+        return StubBackend()
+    if spec.startswith('http://') or spec.startswith('https://'):
+        return HttpBackend(spec)
+    raise ValueError(f"Unknown LLM_BACKEND: {spec}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local deterministic LLM stub server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency-ms', type=float, default=300)
+    parser.add_argument('--jitter-ms', type=float, default=100)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Probability of an injected 503')
+    parser.add_argument('--quota-rps', type=float, default=None, help='Requests per second before returning 429')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    backend = StubBackend(args.latency_ms, args.jitter_ms, args.error_rate, args.quota_rps, args.seed)
+    server = StubServer(backend, args.host, args.port)
+    print(f"🧪 LLM stub server listening on {server.url} (set LLM_BACKEND={server.url})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped.")
+        print(f"Stats: {backend.stats}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Name Analyzer
+=============
+제품명 정규화 필요 여부 분석 (analyze_normalization.py, analyze_all_spirits.py 공용).
+
+- 용량 / 로트 / 도수 / 괄호 패턴을 미리 컴파일한 하나의 정규식(named group)으로 한 번에 훑음
+- 한 번의 스캔 결과에서 두 리포트의 규칙을 각각 판정 (기존 analyze_name / has_normalization_needs와 같은 결과)
+  * normalization 리포트: 용량/로트/도수 매칭 텍스트와 위치
+  * full 리포트: 빈 괄호, 괄호 내용, 용량/도수/로트 포함 여부 (단어 경계 규칙이 조금 더 엄격함)
+- 로트 키워드와 여는 괄호는 뒤쪽을 lookahead로만 확인하므로 "(700ml)", "Lot 40도"처럼 겹치는 패턴도 놓치지 않음
+- 대량 입력은 프로세스 풀로 나눠 처리
+
+Usage:
+    python scripts/name_analyzer.py bench [--data-file lib/db/ingested-data.json] [--scale 20] [--workers 4]
+    python scripts/name_analyzer.py analyze "Glenfiddich 12 (700ml) 40%"
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DATA_FILE = 'lib/db/ingested-data.json'
+POOL_MIN_NAMES = 50_000   # 이보다 적으면 프로세스 풀 기동 비용이 스캔 시간보다 큼
+POOL_CHUNK = 2_000
+
+NAME_TOKEN_RE = re.compile(r"""
+    (?P<lot>lot|batch|로트)(?=(?P<lot_sep>\s*[#:]?\s*)(?:(?P<lot_ascii>[a-z0-9]+)|\d+))
+  | (?<!\d)(?P<num>\d+(?:\.\d*)?)(?P<space>\s*)(?P<unit>ml\b|l\b|밀리리터|리터|%|도|proof)
+  | \((?=(?P<paren>[^)]*)\))
+  | \[(?=(?P<bracket>[^\]]*)\])
+""", re.IGNORECASE | re.VERBOSE)
+_WORD_RE = re.compile(r'\w')
+_LEADING_DIGITS_RE = re.compile(r'\d+')
+
+# normalization 리포트: 카테고리와 기존 PATTERNS 내 순서 (같은 카테고리 안에서는 패턴 순 → 위치 순으로 나열)
+FINDING_CATEGORIES = ('volume', 'lot', 'abv')
+_VOLUME_UNITS = {'ml': 0, 'l': 1, '리터': 2, '밀리리터': 3}
+_ABV_UNITS = {'%': 0, '도': 1, 'proof': 2}
+_LOT_KEYWORDS = {'lot': 0, 'batch': 1, '로트': 2}
+
+# full 리포트: 이슈 이름과 출력 순서
+ISSUE_TYPES = ('empty_parentheses', 'empty_brackets', 'has_parentheses_content', 'has_brackets_content',
+               'has_volume', 'has_abv', 'has_lot')
+
+
+def _word_at(text: str, index: int) -> bool:
+    return _WORD_RE.match(text, index) is not None
+
+
+def scan_name(name: str) -> Tuple[Dict[str, List[Dict[str, Any]]], List[str]]:
+    """
+    이름 한 번 스캔으로 (normalization findings, full 리포트 issues) 반환.
+    findings는 기존 analyze_name과 같이 소문자 이름 기준 text/position을 담습니다.
+    """
+    text = name.lower()
+    found: Dict[str, List[Tuple[int, int, str, Tuple[int, int]]]] = defaultdict(list)
+    issues = set()
+
+    for match in NAME_TOKEN_RE.finditer(text):
+        if match.group('lot'):
+            keyword, separator = match.group('lot'), match.group('lot_sep')
+            # full 리포트 규칙은 ASCII 영숫자 식별자 ([A-Z0-9]+), normalization 규칙은 숫자(\d+)
+            if match.group('lot_ascii'):
+                issues.add('has_lot')
+            digits = _LEADING_DIGITS_RE.match(text, match.end('lot_sep'))
+            # '로트'는 기존 패턴에 [#:] 구분자가 없음
+            if digits and not (keyword == '로트' and separator.strip()):
+                start, end = match.start(), digits.end()
+                found['lot'].append((_LOT_KEYWORDS[keyword], start, text[start:end], (start, end)))
+
+        elif match.group('unit'):
+            number, unit, end = match.group('num'), match.group('unit'), match.end()
+            followed_by_word = _word_at(text, end)
+            if unit in _VOLUME_UNITS:
+                # full 리포트는 모든 단위 뒤에 단어 경계를 요구 (ml/l은 정규식에서 이미 확인)
+                if unit in ('ml', 'l') or not followed_by_word:
+                    issues.add('has_volume')
+                # 기존 용량 패턴은 정수부만 (\d+\s*ml) - "1.5l"이면 "5l"
+                digits = number.rsplit('.', 1)[-1]
+                if digits:
+                    start = match.start('num') + len(number) - len(digits)
+                    found['volume'].append((_VOLUME_UNITS[unit], start, text[start:end], (start, end)))
+            else:
+                # '%'는 비단어 문자라 뒤에 단어 문자가 있어야 \b가 성립 (기존 규칙 그대로)
+                if followed_by_word == (unit == '%'):
+                    issues.add('has_abv')
+                start = match.start()
+                found['abv'].append((_ABV_UNITS[unit], start, text[start:end], (start, end)))
+
+        elif match.group('paren') is not None:
+            inner = match.group('paren')
+            issues.add('has_parentheses_content' if inner else 'empty_parentheses')
+            if inner.isspace():
+                issues.add('empty_parentheses')
+
+        else:
+            inner = match.group('bracket')
+            issues.add('has_brackets_content' if inner else 'empty_brackets')
+            if inner.isspace():
+                issues.add('empty_brackets')
+
+    findings = {
+        category: [{'text': match_text, 'position': span} for _, _, match_text, span in sorted(found[category])]
+        for category in FINDING_CATEGORIES if found.get(category)
+    }
+    return findings, [issue for issue in ISSUE_TYPES if issue in issues]
+
+
+def analyze_name(name: str) -> dict:
+    """Analyze a spirit name for patterns that should be extracted (normalization 리포트 형식)"""
+    return scan_name(name)[0]
+
+
+def has_normalization_needs(name: str) -> dict:
+    """Check if a spirit name needs normalization (full 리포트 형식)"""
+    issues = scan_name(name)[1]
+    return {'needs_normalization': len(issues) > 0, 'issues': issues, 'name': name}
+
+
+def _scan_chunk(job: Tuple[int, List[str]]) -> List[Tuple[int, Dict[str, List[Dict[str, Any]]], List[str]]]:
+    """(시작 index, 이름 목록) → 결과가 있는 이름만 (index, findings, issues) (프로세스 간 전송량 최소화)"""
+    offset, names = job
+    results = []
+    for index, name in enumerate(names, offset):
+        findings, issues = scan_name(name)
+        if findings or issues:
+            results.append((index, findings, issues))
+    return results
+
+
+def scan_names(names: List[str], workers: Optional[int] = None, chunksize: int = POOL_CHUNK):
+    """
+    이름 목록을 입력 순서대로 스캔.
+    workers=None이면 POOL_MIN_NAMES 이상일 때만 CPU 수만큼 프로세스 풀 사용, 0/1이면 현재 프로세스에서 처리.
+    """
+    if workers is None:
+        workers = (os.cpu_count() or 1) if len(names) >= POOL_MIN_NAMES else 1
+    scanned: List[Tuple[Dict[str, List[Dict[str, Any]]], List[str]]] = [({}, [])] * len(names)
+    if workers <= 1 or len(names) <= chunksize:
+        hits = _scan_chunk((0, names))
+    else:
+        jobs = [(i, names[i:i + chunksize]) for i in range(0, len(names), chunksize)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            hits = [hit for chunk in pool.map(_scan_chunk, jobs) for hit in chunk]
+    for index, findings, issues in hits:
+        scanned[index] = (findings, issues)
+    return scanned
+
+
+def analyze_spirits(spirits: Iterable[Dict[str, Any]], workers: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    두 리포트의 stats와 항목 목록을 한 번의 스캔으로 생성.
+    반환: {'normalization': {'stats', 'issues'}, 'full': {'stats', 'spirits_needing_normalization'}}
+    (각 스크립트가 저장하는 JSON 리포트와 같은 구조)
+    """
+    spirits = list(spirits)
+    scanned = scan_names([spirit.get('name') or '' for spirit in spirits], workers)
+
+    norm_stats = {'total': len(spirits), 'with_volume_in_name': 0, 'with_lot_in_name': 0,
+                  'with_abv_in_name': 0, 'needs_normalization': 0}
+    full_stats = dict({'total': len(spirits), 'needs_normalization': 0}, **{issue: 0 for issue in ISSUE_TYPES})
+    norm_issues, full_issues = [], []
+
+    for spirit, (findings, issues) in zip(spirits, scanned):
+        if findings:
+            for category in findings:
+                norm_stats[f'with_{category}_in_name'] += 1
+            norm_stats['needs_normalization'] += 1
+            norm_issues.append({
+                'id': spirit.get('id', 'unknown'),
+                'name': spirit.get('name', ''),
+                'current_volume': spirit.get('volume'),
+                'current_abv': spirit.get('abv'),
+                'findings': findings,
+            })
+        if issues:
+            full_stats['needs_normalization'] += 1
+            full_issues.append({'id': spirit.get('id'), 'name': spirit.get('name'), 'issues': issues})
+            for issue in issues:
+                full_stats[issue] += 1
+
+    return {
+        'normalization': {'stats': norm_stats, 'issues': norm_issues},
+        'full': {'stats': full_stats, 'spirits_needing_normalization': full_issues},
+    }
+
+
+# ==================== Legacy (benchmark 비교용) ====================
+
+LEGACY_PATTERNS = {
+    'volume': [r'\d+\s*ml\b', r'\d+\s*l\b', r'\d+\s*리터', r'\d+\s*밀리리터'],
+    'lot': [r'lot\s*[#:]?\s*\d+', r'batch\s*[#:]?\s*\d+', r'로트\s*\d+'],
+    'abv': [r'\d+\.?\d*\s*%', r'\d+\.?\d*\s*도', r'\d+\.?\d*\s*proof'],
+}
+
+
+def legacy_analyze_name(name: str) -> dict:
+    """기존 analyze_normalization.analyze_name (패턴별 re.finditer)"""
+    findings = defaultdict(list)
+    name_lower = name.lower()
+    for category, patterns in LEGACY_PATTERNS.items():
+        for pattern in patterns:
+            for match in re.finditer(pattern, name_lower, re.IGNORECASE):
+                findings[category].append({'text': match.group(), 'position': match.span()})
+    return dict(findings)
+
+
+def legacy_has_normalization_needs(name: str) -> dict:
+    """기존 analyze_all_spirits.has_normalization_needs (re.search 7회)"""
+    issues = []
+    if re.search(r'\(\s*\)', name):
+        issues.append('empty_parentheses')
+    if re.search(r'\[\s*\]', name):
+        issues.append('empty_brackets')
+    if re.search(r'\([^\)]+\)', name):
+        issues.append('has_parentheses_content')
+    if re.search(r'\[[^\]]+\]', name):
+        issues.append('has_brackets_content')
+    if re.search(r'\d+\.?\d*\s*(ml|l|리터|밀리리터)\b', name, re.I):
+        issues.append('has_volume')
+    if re.search(r'\d+\.?\d*\s*(%|도|proof)\b', name, re.I):
+        issues.append('has_abv')
+    if re.search(r'(lot|batch|로트)\s*[#:]?\s*[A-Z0-9]+', name, re.I):
+        issues.append('has_lot')
+    return {'needs_normalization': len(issues) > 0, 'issues': issues, 'name': name}
+
+
+def _legacy_scan(names: List[str]):
+    return [(legacy_analyze_name(name), legacy_has_normalization_needs(name)['issues']) for name in names]
+
+
+def _best_of(func, repeat: int) -> Tuple[Any, float]:
+    timings, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return result, statistics.median(timings)
+
+
+def bench(data_file: str = DATA_FILE, scale: int = 20, workers: int = 4, repeat: int = 3):
+    with open(data_file, 'r', encoding='utf-8') as f:
+        names = [spirit.get('name') or '' for spirit in json.load(f)]
+
+    print("=" * 80)
+    print(f"🧪 Name Analyzer Benchmark ({len(names)} names from {data_file})")
+    print("=" * 80)
+
+    legacy, legacy_sec = _best_of(lambda: _legacy_scan(names), repeat)
+    single, single_sec = _best_of(lambda: scan_names(names, workers=1), repeat)
+    mismatches = [name for name, old, new in zip(names, legacy, single)
+                  if json.loads(json.dumps(old)) != json.loads(json.dumps(new))]
+    print(f"  legacy (10 finditer + 7 search) : {legacy_sec * 1000:>9.1f} ms  ({len(names) / legacy_sec:>10,.0f} names/s)")
+    print(f"  single pass                     : {single_sec * 1000:>9.1f} ms  ({len(names) / single_sec:>10,.0f} names/s)"
+          f"  x{legacy_sec / single_sec:.1f}")
+    print(f"  identical results               : {len(names) - len(mismatches)}/{len(names)}"
+          f" {'✅' if not mismatches else '❌'}")
+    for name in mismatches[:5]:
+        print(f"    ❌ {name}")
+
+    if scale > 1:
+        large = names * scale
+        _, serial_sec = _best_of(lambda: scan_names(large, workers=1), 1)
+        _, pool_sec = _best_of(lambda: scan_names(large, workers=workers), 1)
+        print(f"\n  x{scale} input ({len(large):,} names, {os.cpu_count()} CPUs)")
+        print(f"  single pass, 1 process          : {serial_sec * 1000:>9.1f} ms")
+        print(f"  single pass, {workers} processes        : {pool_sec * 1000:>9.1f} ms  x{serial_sec / pool_sec:.1f}")
+    print("=" * 80)
+    return {'names': len(names), 'legacy_sec': legacy_sec, 'single_sec': single_sec, 'mismatches': len(mismatches)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Single-pass spirit name analyzer')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_bench = sub.add_parser('bench', help='Compare against the per-pattern analyzers over a dataset')
+    p_bench.add_argument('--data-file', default=DATA_FILE, help=f'Dataset JSON (default: {DATA_FILE})')
+    p_bench.add_argument('--scale', type=int, default=20, help='Repeat the names N times for the process pool run (default: 20)')
+    p_bench.add_argument('--workers', type=int, default=4, help='Processes for the pool run (default: 4)')
+    p_bench.add_argument('--repeat', type=int, default=3)
+    p_analyze = sub.add_parser('analyze', help='Show findings for names given on the command line')
+    p_analyze.add_argument('names', nargs='+')
+    args = parser.parse_args()
+
+    if args.command == 'bench':
+        bench(args.data_file, args.scale, args.workers, args.repeat)
+    elif args.command == 'analyze':
+        for name in args.names:
+            findings, issues = scan_name(name)
+            print(f"{name}\n  findings: {json.dumps(findings, ensure_ascii=False)}\n  issues  : {', '.join(issues) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
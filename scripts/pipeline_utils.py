@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pipeline Utilities
+==================
+Gemini/외부 API 스크립트에서 공통으로 쓰는 동시성 도구 모음.
+
+- TokenBucket: 고정 sleep 대신 초당 요청 수를 제한하는 토큰 버킷
+- LatencyStats: 처리량(req/s)과 p50/p95 지연 시간 집계
+- ordered_map: 동시 실행 수를 제한하면서 입력 순서대로 결과를 돌려주는 map
+- chunked: 이터러블을 고정 크기 리스트로 분할
+- estimate_tokens / chunked_by_tokens: 토큰 수 추정과 토큰 예산 기준 배치 분할
+- AdaptiveConcurrency: 429/5xx에 반응하는 AIMD 동시성 제어 + 재시도 (Retry-After 준수)
+"""
+
+import math
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+class TokenBucket:
+    """스레드 안전 토큰 버킷 (rate: 초당 토큰, burst: 최대 적립 토큰)"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """토큰을 확보할 때까지 대기하고, 실제로 기다린 시간(초)을 반환"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                shortfall = (tokens - self._tokens) / self.rate
+            time.sleep(shortfall)
+            waited += shortfall
+
+
+class LatencyStats:
+    """요청별 지연 시간을 모아 처리량과 백분위수를 계산"""
+
+    def __init__(self):
+        self._samples: List[float] = []
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> float:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return 0.0
+        # nearest-rank 방식
+        rank = max(0, min(len(samples) - 1, math.ceil(pct / 100.0 * len(samples)) - 1))
+        return samples[rank]
+
+    def summary(self) -> Dict[str, float]:
+        elapsed = time.monotonic() - self._started
+        with self._lock:
+            count = len(self._samples)
+        return {
+            'requests': count,
+            'elapsed_sec': round(elapsed, 3),
+            'requests_per_sec': round(count / elapsed, 3) if elapsed > 0 else 0.0,
+            'p50_ms': round(self.percentile(50) * 1000, 1),
+            'p95_ms': round(self.percentile(95) * 1000, 1),
+        }
+
+
+def ordered_map(func: Callable[[T], R], items: Iterable[T], concurrency: int = 1) -> Iterator[Tuple[T, R]]:
+    """
+    items 각각에 func를 최대 concurrency개까지 동시에 실행하고,
+    완료 순서와 무관하게 입력 순서대로 (item, result)를 yield 합니다.
+    입력이 제너레이터여도 in-flight 개수만큼만 미리 읽습니다.
+    """
+    if concurrency <= 1:
+        for item in items:
+            yield item, func(item)
+        return
+
+    pending = deque()
+    iterator = iter(items)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for item in iterator:
+            pending.append((item, executor.submit(func, item)))
+            if len(pending) >= concurrency * 2:
+                head, future = pending.popleft()
+                yield head, future.result()
+        while pending:
+            head, future = pending.popleft()
+            yield head, future.result()
+
+
+def chunked(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """items를 size 크기의 리스트로 나누어 yield (마지막 조각은 더 작을 수 있음)"""
+    size = max(1, size)
+    chunk: List[T] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    LLM 토큰 수 근사치 (API 호출 없이 배치 크기를 정하는 용도).
+    ASCII는 약 4자당 1토큰, 한글 등 비 ASCII 문자는 1자당 1토큰으로 계산합니다.
+    """
+    ascii_chars = sum(1 for ch in text if ch < '\x80')
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def chunked_by_tokens(items: Iterable[T], cost: Callable[[T], int], max_tokens: int,
+                      max_items: Optional[int] = None) -> Iterator[List[T]]:
+    """
+    항목별 토큰 비용(cost) 합이 max_tokens를 넘지 않도록 묶어서 yield (max_items개 초과도 분할).
+    한 항목이 예산보다 크면 단독 배치로 내보냅니다.
+    """
+    chunk: List[T] = []
+    used = 0
+    for item in items:
+        weight = max(1, cost(item))
+        if chunk and (used + weight > max_tokens or (max_items and len(chunk) >= max_items)):
+            yield chunk
+            chunk, used = [], 0
+        chunk.append(item)
+        used += weight
+    if chunk:
+        yield chunk
+
+
+def classify_error(error: Exception) -> Optional[str]:
+    """
+    API 오류 분류: 'throttle'(429/RESOURCE_EXHAUSTED), 'retry'(5xx/일시 장애), None(재시도 불가).
+    status/code 속성과 메시지를 함께 보므로 SDK별 예외 클래스에 의존하지 않습니다.
+    """
+    status = getattr(error, 'status', None)
+    if not isinstance(status, int):
+        status = getattr(error, 'code', None)
+    message = str(error)
+    if status == 429 or 'RESOURCE_EXHAUSTED' in message or message.startswith('429'):
+        return 'throttle'
+    if (isinstance(status, int) and status >= 500) or 'UNAVAILABLE' in message or 'DEADLINE_EXCEEDED' in message:
+        return 'retry'
+    return None
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD 방식 동시성 제어기 (스레드 안전).
+
+    - 성공할 때마다 limit += 1/limit (limit개 성공마다 +1)
+    - 429/RESOURCE_EXHAUSTED이면 limit을 절반으로 줄이고 Retry-After(없으면 지수 백오프) 동안 신규 호출을 멈춤
+      (이미 줄인 뒤에 시작된 요청의 429만 다시 반영하므로, 동시에 실패한 요청들이 연쇄적으로 줄이지 않음)
+    - 5xx는 동시성은 유지하고 해당 호출만 지수 백오프 후 재시도
+    """
+
+    def __init__(self, initial: int = 1, min_limit: int = 1, max_limit: int = 16, max_retries: int = 5,
+                 backoff_base: float = 1.0, max_backoff: float = 60.0,
+                 classify: Callable[[Exception], Optional[str]] = classify_error):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.classify = classify
+        self.stats = {'calls': 0, 'succeeded': 0, 'throttled': 0, 'server_errors': 0,
+                      'retries': 0, 'gave_up': 0, 'decreases': 0, 'paused_sec': 0.0}
+        self.events = deque(maxlen=100)
+
+        self._limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self._peak = self._limit
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._consecutive_throttles = 0
+        self._started = time.monotonic()
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.max_backoff, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    def acquire(self):
+        """동시 실행 슬롯을 얻을 때까지 대기 (throttle 휴지 기간에도 대기)"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    self._cond.wait(self._paused_until - now)
+                elif self._in_flight >= int(self._limit):
+                    self._cond.wait(0.5)
+                else:
+                    self._in_flight += 1
+                    return
+
+    def release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        with self._cond:
+            self.stats['succeeded'] += 1
+            self._consecutive_throttles = 0
+            self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+            self._peak = max(self._peak, self._limit)
+            self._cond.notify_all()
+
+    def on_throttle(self, started: float, retry_after: Optional[float] = None):
+        with self._cond:
+            now = time.monotonic()
+            self.stats['throttled'] += 1
+            if started >= self._last_decrease:
+                self._limit = max(float(self.min_limit), self._limit / 2)
+                self._last_decrease = now
+                self.stats['decreases'] += 1
+            delay = retry_after if retry_after else self._backoff(self._consecutive_throttles)
+            self._consecutive_throttles += 1
+            pause_end = now + delay
+            if pause_end > self._paused_until:
+                self.stats['paused_sec'] += pause_end - max(now, self._paused_until)
+                self._paused_until = pause_end
+            self.events.append({'t': round(now - self._started, 3), 'limit': self.limit,
+                                'retry_after': retry_after})
+
+    def call(self, func: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+        """func를 슬롯 안에서 실행하고, throttle/5xx는 max_retries까지 재시도 (그 외 예외는 그대로 전달)"""
+        with self._cond:
+            self.stats['calls'] += 1
+        attempt = 0
+        while True:
+            self.acquire()
+            started = time.monotonic()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                self.release()
+                kind = self.classify(e)
+                if kind == 'throttle':
+                    self.on_throttle(started, getattr(e, 'retry_after', None))
+                elif kind == 'retry':
+                    with self._cond:
+                        self.stats['server_errors'] += 1
+                if kind is None or attempt >= self.max_retries:
+                    if kind is not None:
+                        with self._cond:
+                            self.stats['gave_up'] += 1
+                    raise
+                with self._cond:
+                    self.stats['retries'] += 1
+                if kind == 'retry':
+                    time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+            self.release()
+            self.on_success()
+            return result
+
+    def summary(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = dict(self.stats)
+            stats.update({
+                'limit': self.limit,
+                'peak_limit': int(self._peak),
+                'min_limit': self.min_limit,
+                'max_limit': self.max_limit,
+                'paused_sec': round(self.stats['paused_sec'], 2),
+                'throttle_events': list(self.events),
+            })
+        return stats
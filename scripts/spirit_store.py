@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Spirit Store
+============
+수집/보완 스크립트가 공유하는 데이터셋 저장 계층.
+
+지원 형식 (경로 확장자로 판별):
+- .json       기존 indent=2 JSON 배열 (읽기는 스트리밍, 쓰기는 호환용)
+- .jsonl      레코드 1건 = 1줄, append-only
+- .jsonl.zst  zstd 압축 JSONL (append 시 프레임을 이어 붙임, `pip install zstandard` 필요)
+- .sqlite     records 테이블 (id PRIMARY KEY, externalId 인덱스) - 단건 조회/upsert용
+
+- iter_records / write_records / append_records: 형식과 무관한 스트리밍 읽기/쓰기
+- dataset_files: 배치 파일 glob (모든 형식)
+- SQLiteStore: id/externalId 인덱스 기반 조회와 upsert
+- CategoryStore: data/spirits_<category>.json 기준 파일 + .jsonl 로그 (신규 항목 append, compact로 병합)
+
+Usage:
+    python scripts/spirit_store.py convert lib/db/ingested-data.json data/store/ingested-data.jsonl.zst
+    python scripts/spirit_store.py bench lib/db/ingested-data.json
+"""
+
+import argparse
+import io
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from jsonl_journal import JsonlJournal
+
+FORMATS = ('json', 'jsonl', 'jsonl.zst', 'sqlite')
+_READ_CHUNK = 1 << 16
+
+
+def detect_format(path: str) -> str:
+    lower = path.lower()
+    if lower.endswith('.jsonl.zst'):
+        return 'jsonl.zst'
+    if lower.endswith('.jsonl'):
+        return 'jsonl'
+    if lower.endswith('.sqlite') or lower.endswith('.db'):
+        return 'sqlite'
+    return 'json'
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd 형식을 사용하려면 zstandard 패키지가 필요합니다: pip install zstandard")
+    return zstandard
+
+
+def _ensure_dir(path: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+def _fsync_file(path: str):
+    """닫힌 파일의 내용을 디스크에 강제 기록"""
+    fd = os.open(path, os.O_RDWR)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_dir(path: str):
+    """os.replace로 바뀐 디렉터리 엔트리를 디스크에 기록 (디렉터리를 열 수 없는 Windows는 생략)"""
+    if os.name == 'nt':
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# ==================== Readers ====================
+
+def _iter_json_array(f: io.TextIOBase) -> Iterator[Dict[str, Any]]:
+    """JSON 배열을 통째로 올리지 않고 원소 단위로 디코딩"""
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    eof = False
+    started = False
+
+    while True:
+        # 공백/구분자 건너뛰기 (필요하면 더 읽기)
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            chunk = f.read(_READ_CHUNK)
+            buf, pos = buf[pos:] + chunk, 0
+            eof = not chunk
+
+        if pos >= len(buf):
+            return
+        if not started:
+            if buf[pos] != '[':
+                raise ValueError("JSON 배열 형식이 아닙니다")
+            started = True
+            pos += 1
+            continue
+        if buf[pos] == ']':
+            return
+
+        try:
+            obj, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = f.read(_READ_CHUNK)
+            buf, pos = buf[pos:] + chunk, 0
+            eof = not chunk
+            continue
+        yield obj
+        pos = end
+        if pos > _READ_CHUNK:
+            buf, pos = buf[pos:], 0
+
+
+def _iter_jsonl(f: io.TextIOBase) -> Iterator[Dict[str, Any]]:
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            # 크래시로 잘린 마지막 줄은 건너뜀
+            continue
+
+
+def iter_records(path: str) -> Iterator[Dict[str, Any]]:
+    """형식과 무관하게 레코드를 하나씩 yield (파일이 없으면 빈 결과)"""
+    if not os.path.exists(path):
+        return
+    fmt = detect_format(path)
+    if fmt == 'sqlite':
+        with SQLiteStore(path) as store:
+            yield from store.iter_records()
+    elif fmt == 'jsonl.zst':
+        zstandard = _zstd()
+        with open(path, 'rb') as raw:
+            reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+            yield from _iter_jsonl(io.TextIOWrapper(reader, encoding='utf-8'))
+    elif fmt == 'jsonl':
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from _iter_jsonl(f)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from _iter_json_array(f)
+
+
+def load_records(path: str) -> List[Dict[str, Any]]:
+    return list(iter_records(path))
+
+
+def dataset_files(directory: str, pattern: str) -> List[str]:
+    """directory에서 pattern(확장자 제외, 예: 'whisky_enriched_batch_*')에 맞는 모든 형식의 데이터셋 파일"""
+    import glob
+    files = []
+    for ext in ('.json', '.jsonl', '.jsonl.zst', '.sqlite'):
+        files.extend(glob.glob(os.path.join(directory, pattern + ext)))
+    return sorted(path for path in files if not os.path.basename(path).startswith('.tmp_'))
+
+
+# ==================== Writers ====================
+
+def append_records(path: str, records: Iterable[Dict[str, Any]]) -> int:
+    """레코드 추가 (jsonl/jsonl.zst는 파일 끝에 append, sqlite는 upsert)"""
+    fmt = detect_format(path)
+    _ensure_dir(path)
+    if fmt == 'json':
+        raise ValueError("JSON 배열 파일에는 append할 수 없습니다 (.jsonl 또는 .sqlite 사용)")
+    if fmt == 'sqlite':
+        with SQLiteStore(path) as store:
+            return store.upsert(records)
+
+    count = 0
+    if fmt == 'jsonl.zst':
+        zstandard = _zstd()
+        # 새 zstd 프레임을 이어 붙임 (읽을 때 read_across_frames로 이어서 해제)
+        with open(path, 'ab') as raw:
+            with zstandard.ZstdCompressor(level=6).stream_writer(raw, closefd=False) as writer:
+                for record in records:
+                    writer.write((json.dumps(record, ensure_ascii=False, default=str) + '\n').encode('utf-8'))
+                    count += 1
+        return count
+
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+            count += 1
+    return count
+
+
+def write_records(path: str, records: Iterable[Dict[str, Any]]) -> int:
+    """
+    레코드 전체 저장 (임시 파일에 쓰고 fsync → os.replace로 원자적 교체 → 디렉터리 fsync).
+    반환 시점에는 새 내용이 디스크에 있으므로 호출자가 저널 등 복구용 파일을 지워도 됩니다.
+    """
+    fmt = detect_format(path)
+    _ensure_dir(path)
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', dir=os.path.dirname(path) or '.')
+    os.close(fd)
+    try:
+        if fmt == 'json':
+            # 하위 호환 (TS 파이프라인 등이 그대로 읽는 형식). json.dump(indent=2)와 같은 출력을 레코드 단위로 스트리밍
+            count = 0
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for record in records:
+                    f.write('[\n  ' if count == 0 else ',\n  ')
+                    f.write(json.dumps(record, indent=2, ensure_ascii=False).replace('\n', '\n  '))
+                    count += 1
+                f.write('\n]' if count else '[]')
+        elif fmt == 'sqlite':
+            os.remove(tmp_path)
+            with SQLiteStore(tmp_path) as store:
+                count = store.upsert(records)
+        else:
+            os.remove(tmp_path)
+            tmp_path += '.jsonl.zst' if fmt == 'jsonl.zst' else '.jsonl'
+            count = append_records(tmp_path, records)
+        # mkstemp는 0600으로 만들므로 기존 파일 권한(없으면 0644)을 유지
+        os.chmod(tmp_path, os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644)
+        _fsync_file(tmp_path)
+        os.replace(tmp_path, path)
+        _fsync_dir(path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return count
+
+
+def convert(src: str, dst: str) -> int:
+    """기존 JSON 등 임의 형식 → 다른 형식으로 스트리밍 변환"""
+    return write_records(dst, iter_records(src))
+
+
+# ==================== SQLite ====================
+
+class SQLiteStore:
+    """records(id, externalId, data) 테이블 - id/externalId로 전체 로드 없이 조회"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS records (
+        id TEXT PRIMARY KEY,
+        external_id TEXT,
+        data TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_records_external_id ON records(external_id);
+    """
+
+    def __init__(self, path: str):
+        _ensure_dir(path)
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(self.SCHEMA)
+        self.stats = {'inserted': 0, 'replaced': 0, 'missing_id': 0, 'duplicate_ids': 0}
+
+    def upsert(self, records: Iterable[Dict[str, Any]], batch_size: int = 1000) -> int:
+        """
+        id(없으면 externalId) 기준 upsert. 실제로 저장된 서로 다른 행 수를 반환합니다.
+        id가 없는 레코드와 같은 호출 안에서 id가 겹친 레코드(뒤의 것이 남음)는 self.stats에 집계하고 경고합니다.
+        """
+        stats = {'inserted': 0, 'replaced': 0, 'missing_id': 0, 'duplicate_ids': 0}
+        seen: Set[str] = set()
+        duplicates: List[str] = []
+        rows: Dict[str, Tuple[str, Optional[str], str]] = {}
+        for record in records:
+            record_id = record.get('id') or record.get('externalId')
+            if record_id is None:
+                stats['missing_id'] += 1
+                continue
+            record_id = str(record_id)
+            if record_id in seen:
+                stats['duplicate_ids'] += 1
+                if len(duplicates) < 5:
+                    duplicates.append(record_id)
+            seen.add(record_id)
+            rows[record_id] = (record_id, record.get('externalId'), json.dumps(record, ensure_ascii=False, default=str))
+            if len(rows) >= batch_size:
+                self._write(rows, stats)
+                rows = {}
+        if rows:
+            self._write(rows, stats)
+
+        for key, value in stats.items():
+            self.stats[key] += value
+        if stats['missing_id'] or stats['duplicate_ids']:
+            print(f"⚠️ {self.path}: id 없는 레코드 {stats['missing_id']}건 제외, "
+                  f"같은 id로 덮어쓴 레코드 {stats['duplicate_ids']}건{f' (예: {duplicates})' if duplicates else ''}")
+        return len(seen)
+
+    def _write(self, rows: Dict[str, Tuple[str, Optional[str], str]], stats: Dict[str, int]):
+        with self._conn:
+            for record_id, row in rows.items():
+                exists = self._conn.execute('SELECT 1 FROM records WHERE id = ?', (record_id,)).fetchone()
+                stats['replaced' if exists else 'inserted'] += 1
+            self._conn.executemany('INSERT OR REPLACE INTO records (id, external_id, data) VALUES (?, ?, ?)',
+                                   list(rows.values()))
+
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute('SELECT data FROM records WHERE id = ?', (record_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find_by_external_id(self, external_id: str) -> List[Dict[str, Any]]:
+        rows = self._conn.execute('SELECT data FROM records WHERE external_id = ?', (external_id,)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def ids(self) -> Set[str]:
+        return {row[0] for row in self._conn.execute('SELECT id FROM records')}
+
+    def external_ids(self) -> Set[str]:
+        return {row[0] for row in self._conn.execute('SELECT external_id FROM records WHERE external_id IS NOT NULL')}
+
+    def count(self) -> int:
+        return self._conn.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        for row in self._conn.execute('SELECT data FROM records ORDER BY rowid'):
+            yield json.loads(row[0])
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ==================== Category Store ====================
+
+class CategoryStore:
+    """JSON 기준 파일 + append-only JSONL 로그"""
+
+    def __init__(self, json_path: str):
+        self.json_path = json_path
+        self.log_path = os.path.splitext(json_path)[0] + '.jsonl'
+
+    def iter_items(self) -> Iterator[Dict[str, Any]]:
+        """기준 JSON → 로그 순서로 모든 항목 yield"""
+        yield from iter_records(self.json_path)
+        yield from JsonlJournal.read(self.log_path)
+
+    def load_index(self) -> Tuple[Set[str], Set[str], int]:
+        """(externalId 집합, 이름 집합, 전체 건수)"""
+        ids, names, count = set(), set(), 0
+        for item in self.iter_items():
+            count += 1
+            if item.get('externalId'):
+                ids.add(item['externalId'])
+            if item.get('name'):
+                names.add(item['name'].strip())
+        return ids, names, count
+
+    def pending(self) -> int:
+        """compact 되지 않은 로그 항목 수"""
+        return sum(1 for _ in JsonlJournal.read(self.log_path))
+
+    def append(self, items: Iterable[Dict[str, Any]]) -> int:
+        written = 0
+        with JsonlJournal(self.log_path, fsync_every=500) as journal:
+            for item in items:
+                journal.append(item)
+                written += 1
+        return written
+
+    def compact(self) -> int:
+        """로그를 기준 JSON에 합쳐 저장 (임시 파일 → os.replace로 원자적 교체)"""
+        count = write_records(self.json_path, self.iter_items())
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+        return count
+
+
+# ==================== CLI ====================
+
+def _measure(label: str, func) -> Dict[str, Any]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<32} {elapsed * 1000:>9.1f} ms   peak {peak / 1024 / 1024:>7.2f} MB   ({result})")
+    return {'label': label, 'ms': round(elapsed * 1000, 1), 'peak_mb': round(peak / 1024 / 1024, 2)}
+
+
+def bench(src: str) -> List[Dict[str, Any]]:
+    """JSON 배열 전체 로드 vs 스트리밍/JSONL/zstd/SQLite 비교"""
+    records = load_records(src)
+    probe_id = str(records[len(records) // 2].get('id')) if records else ''
+    del records
+
+    with tempfile.TemporaryDirectory() as workdir:
+        targets = {'jsonl': os.path.join(workdir, 'data.jsonl'), 'sqlite': os.path.join(workdir, 'data.sqlite')}
+        try:
+            _zstd()
+            targets['jsonl.zst'] = os.path.join(workdir, 'data.jsonl.zst')
+        except RuntimeError:
+            print("  (zstandard 미설치: jsonl.zst 생략)")
+        for path in targets.values():
+            convert(src, path)
+
+        print(f"\n📏 File sizes: json {os.path.getsize(src) / 1024:.0f} KB" + ''.join(
+            f", {fmt} {os.path.getsize(path) / 1024:.0f} KB" for fmt, path in targets.items()))
+        print("\n⏱️  Full scan / lookup")
+
+        def full_load():
+            with open(src, 'r', encoding='utf-8') as f:
+                return len(json.load(f))
+
+        def lookup_sqlite():
+            with SQLiteStore(targets['sqlite']) as store:
+                return 'found' if store.get(probe_id) else 'missing'
+
+        results = [
+            _measure('json.load (full array)', full_load),
+            _measure('json streaming (iter_records)', lambda: sum(1 for _ in iter_records(src))),
+        ]
+        for fmt, path in targets.items():
+            results.append(_measure(f'{fmt} streaming', lambda path=path: sum(1 for _ in iter_records(path))))
+        results.append(_measure('sqlite get(id)', lookup_sqlite))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Dataset storage tools (json / jsonl / jsonl.zst / sqlite)')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_convert = sub.add_parser('convert', help='Convert a dataset between formats (e.g. legacy JSON → JSONL)')
+    p_convert.add_argument('src')
+    p_convert.add_argument('dst')
+    p_bench = sub.add_parser('bench', help='Compare load time and peak memory across formats')
+    p_bench.add_argument('src', nargs='?', default='lib/db/ingested-data.json')
+    p_count = sub.add_parser('count', help='Count records in a dataset')
+    p_count.add_argument('path')
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        count = convert(args.src, args.dst)
+        print(f"✅ {args.src} → {args.dst} ({count:,} records)")
+    elif args.command == 'bench':
+        print(f"🧪 Storage benchmark: {args.src}")
+        bench(args.src)
+    elif args.command == 'count':
+        print(sum(1 for _ in iter_records(args.path)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
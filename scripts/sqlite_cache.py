@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite Cache
+============
+스크립트 간에 공유하는 로컬 영구 캐시 (key → JSON value).
+
+- 키는 호출 측에서 만든 해시 문자열 (make_key 헬퍼 제공)
+- 전체 크기가 max_bytes를 넘으면 가장 오래 사용되지 않은 항목부터 제거 (LRU)
+- 항목별 TTL 지원 (만료된 항목은 miss로 취급)
+- hits / misses / writes / evictions / bytes 통계 제공
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache(accessed_at);
+"""
+
+
+def make_key(*parts: Any) -> str:
+    """JSON 직렬화 가능한 값들로부터 안정적인 sha256 키 생성"""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SQLiteCache:
+    """스레드 안전 SQLite 기반 LRU 캐시"""
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0, 'bytes_read': 0, 'bytes_written': 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM cache').fetchone()[0]
+
+    def get(self, key: str, allow_expired: bool = False) -> Optional[Any]:
+        """값 조회 (allow_expired이면 TTL이 지난 항목도 반환 - 오프라인 재생용)"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute('SELECT value, size, expires_at FROM cache WHERE key = ?', (key,)).fetchone()
+            if row is None or (not allow_expired and row[2] is not None and row[2] < now):
+                self.stats['misses'] += 1
+                return None
+            self._conn.execute('UPDATE cache SET accessed_at = ? WHERE key = ?', (now, key))
+            self.stats['hits'] += 1
+            self.stats['bytes_read'] += row[1]
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Any, ttl: Optional[float] = None):
+        encoded = json.dumps(value, ensure_ascii=False, default=str)
+        size = len(encoded.encode('utf-8'))
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        with self._lock:
+            old = self._conn.execute('SELECT size FROM cache WHERE key = ?', (key,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO cache (key, value, size, created_at, accessed_at, expires_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (key, encoded, size, now, now, expires_at)
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            self.stats['writes'] += 1
+            self.stats['bytes_written'] += size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def delete(self, key: str):
+        with self._lock:
+            old = self._conn.execute('SELECT size FROM cache WHERE key = ?', (key,)).fetchone()
+            if old:
+                self._conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+                self._total_bytes -= old[0]
+
+    def _evict(self):
+        """최대 크기의 90%까지 LRU 순서로 제거 (잠금 보유 상태에서 호출)"""
+        target = int(self.max_bytes * 0.9)
+        # 만료된 항목 먼저 정리
+        expired = self._conn.execute(
+            'SELECT COALESCE(SUM(size), 0), COUNT(*) FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?',
+            (time.time(),)
+        ).fetchone()
+        if expired[1]:
+            self._conn.execute('DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?', (time.time(),))
+            self._total_bytes -= expired[0]
+            self.stats['evictions'] += expired[1]
+
+        while self._total_bytes > target:
+            rows = self._conn.execute('SELECT key, size FROM cache ORDER BY accessed_at ASC LIMIT 256').fetchall()
+            if not rows:
+                break
+            freed = 0
+            victims = []
+            for key, size in rows:
+                victims.append((key,))
+                freed += size
+                if self._total_bytes - freed <= target:
+                    break
+            self._conn.executemany('DELETE FROM cache WHERE key = ?', victims)
+            self._total_bytes -= freed
+            self.stats['evictions'] += len(victims)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+            stats = dict(self.stats)
+            total_bytes = self._total_bytes
+        lookups = stats['hits'] + stats['misses']
+        stats.update({
+            'entries': entries,
+            'bytes': total_bytes,
+            'hit_rate': round(stats['hits'] / lookups * 100, 1) if lookups else 0.0,
+        })
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._conn.close()